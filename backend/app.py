@@ -8,10 +8,13 @@ from flask_jwt_extended import (
 from flask_sqlalchemy import SQLAlchemy
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import timedelta
-import requests
 import os
 import traceback
-import random
+
+from ml_client import MLClient, MLServiceUnavailable, MLServiceError
+from team_snapshots import TeamSnapshotStore
+from prediction_cache import PredictionCache
+from singleflight import SingleFlight
 
 # ==================== CONFIGURACIÓN ====================
 app = Flask(__name__)
@@ -37,6 +40,37 @@ jwt = JWTManager(app)
 
 ML_SERVICE_URL = os.getenv('ML_SERVICE_URL', 'http://localhost:8000')
 
+# Réplicas del servicio ML separadas por comas (default: solo ML_SERVICE_URL)
+ML_SERVICE_URLS = [url.strip() for url in os.getenv('ML_SERVICE_URLS', ML_SERVICE_URL).split(',') if url.strip()]
+
+# Cliente compartido: pool keep-alive, timeouts cortos, circuit breaker y
+# balanceo con hedging entre réplicas
+ml_client = MLClient(
+    ML_SERVICE_URLS,
+    pool_size=int(os.getenv('ML_POOL_SIZE', 10)),
+    connect_timeout=float(os.getenv('ML_CONNECT_TIMEOUT', 0.5)),
+    read_timeout=float(os.getenv('ML_READ_TIMEOUT', 3.0)),
+    failure_threshold=int(os.getenv('ML_BREAKER_FAILURES', 5)),
+    reset_timeout=float(os.getenv('ML_BREAKER_RESET', 10.0)),
+    hedge_percentile=float(os.getenv('ML_HEDGE_PERCENTILE', 0.95)),
+    health_interval=float(os.getenv('ML_HEALTH_INTERVAL', 5.0))
+)
+ml_client.start_health_checks()
+
+# Estado Elo que genera ml-service (EloEngine): ratings actuales por equipo
+ELO_STATE_PATH = os.getenv(
+    'ELO_STATE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ml-service', 'data', 'elo_state.json')
+)
+
+# Game log que genera ml-service (fetch_real_nba_data.py) y lesiones opcionales {equipo: [jugadores]}
+GAMES_CSV_PATH = os.getenv(
+    'GAMES_CSV_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ml-service', 'data', 'nba_games_clean.csv')
+)
+INJURIES_PATH = os.getenv('INJURIES_PATH')
+TEAM_SNAPSHOT_INTERVAL = float(os.getenv('TEAM_SNAPSHOT_INTERVAL', 300))
+
 # ==================== DATOS DE EQUIPOS NBA ====================
 
 NBA_TEAMS = {
@@ -73,6 +107,26 @@ NBA_TEAMS = {
     'MIN': {'name': 'Timberwolves', 'elo_base': 1560, 'ppg': 113.2, 'rpg': 45.8, 'apg': 26.2, 'topg': 12.8, 'fg_pct': 0.475}
 }
 
+# Tabla de features por equipo, refrescada en segundo plano
+team_snapshots = TeamSnapshotStore(
+    NBA_TEAMS,
+    games_csv_path=GAMES_CSV_PATH,
+    elo_state_path=ELO_STATE_PATH,
+    injuries_path=INJURIES_PATH,
+    refresh_interval=TEAM_SNAPSHOT_INTERVAL
+)
+team_snapshots.start()
+
+# Caché de predicciones por (local, visitante, snapshot, modelo)
+prediction_cache = PredictionCache(
+    max_entries=int(os.getenv('PREDICTION_CACHE_SIZE', 2048)),
+    ttl=float(os.getenv('PREDICTION_CACHE_TTL', 900))
+)
+
+# Requests concurrentes del mismo partido y snapshot comparten una sola llamada al servicio ML
+ml_flights = SingleFlight()
+ML_SINGLEFLIGHT_TIMEOUT = float(os.getenv('ML_SINGLEFLIGHT_TIMEOUT', 5.0))
+
 # ==================== JWT ERROR HANDLERS ====================
 
 @jwt.invalid_token_loader
@@ -171,47 +225,14 @@ def normalize_team_name(team_input: str) -> str:
     
     raise ValueError(f"❌ Equipo no reconocido: '{team_input}'. Usa abreviaturas como LAL, GSW, BOS, etc.")
 
-def get_team_features(team_abbr: str) -> dict:
+def get_team_features(team_abbr: str, snapshot=None) -> dict:
     """
-    Obtiene features dinámicas para un equipo con variación realista.
-    Simula el rendimiento actual del equipo con pequeñas variaciones.
+    Features de un equipo desde el snapshot precalculado (lookup O(1)).
+    Pasar el mismo `snapshot` para ambos equipos garantiza que un partido
+    use una sola versión de features aunque haya un refresco en medio.
     """
-    if team_abbr not in NBA_TEAMS:
-        raise ValueError(f"Equipo {team_abbr} no encontrado")
-    
-    base_stats = NBA_TEAMS[team_abbr]
-    
-    # Añadir variación realista (±5%) para simular forma actual
-    variance = random.uniform(0.96, 1.04)
-    
-    # Calcular rolling 5 games con variación
-    roll5_variance = random.uniform(0.93, 1.07)
-    
-    # Simular lesiones (0-2 jugadores)
-    injuries = random.randint(0, 2)
-    
-    # Ajustar ELO basado en forma reciente
-    elo_adjustment = random.randint(-30, 30)
-    
-    return {
-        'abbreviation': team_abbr,
-        'teamId': hash(team_abbr) % 10000,  # ID simulado
-        'stats': {
-            'points_per_game': round(base_stats['ppg'] * variance, 1),
-            'rebounds': round(base_stats['rpg'] * variance, 1),
-            'assists': round(base_stats['apg'] * variance, 1),
-            'turnovers': round(base_stats['topg'] * variance, 1),
-            'fg_pct': round(base_stats['fg_pct'] * random.uniform(0.97, 1.03), 3)
-        },
-        'lastGames': [],
-        'injuries': [f'Player_{i}' for i in range(injuries)],
-        'roll5_pts': round(base_stats['ppg'] * roll5_variance, 1),
-        'roll5_reb': round(base_stats['rpg'] * roll5_variance, 1),
-        'roll5_ast': round(base_stats['apg'] * roll5_variance, 1),
-        'roll5_tov': round(base_stats['topg'] * roll5_variance, 1),
-        'roll5_fg_pct': round(base_stats['fg_pct'] * random.uniform(0.96, 1.04), 3),
-        'elo': base_stats['elo_base'] + elo_adjustment
-    }
+    snapshot = snapshot or team_snapshots.current
+    return snapshot.features(team_abbr)
 
 # ==================== RUTAS ====================
 
@@ -351,17 +372,18 @@ def analyze_text():
         except ValueError as e:
             return jsonify({'error': str(e)}), 400
         
-        # ✅ OBTENER FEATURES DINÁMICAS
-        print(f"\n📊 Generando features dinámicas...")
-        home_features = get_team_features(home_abbr)
-        away_features = get_team_features(away_abbr)
+        # ✅ FEATURES DEL SNAPSHOT ACTUAL (mismo snapshot para ambos equipos)
+        snapshot = team_snapshots.current
+        print(f"\n📊 Features del snapshot {snapshot.version}...")
+        home_features = get_team_features(home_abbr, snapshot)
+        away_features = get_team_features(away_abbr, snapshot)
         
         features = {
             'home': home_features,
             'away': away_features,
             'metadata': {
-                'source': 'NBA_STATS_DYNAMIC',
-                'generated_at': 'real-time'
+                'source': 'TEAM_SNAPSHOT',
+                'snapshot_version': snapshot.version
             }
         }
         
@@ -378,31 +400,50 @@ def analyze_text():
         print(f"   Roll5 PPG: {away_features['roll5_pts']}")
         print(f"   Lesiones: {len(away_features['injuries'])}")
         
-        # Llamar al servicio ML
-        print(f"\n📡 Enviando a ML Service...")
-        
-        try:
-            ml_response = requests.post(
-                f'{ML_SERVICE_URL}/predict',
-                json=features,
-                timeout=30
-            )
+        # Caché por partido + snapshot + modelo; se invalida si cambia alguna versión
+        model_version = ml_client.model_version
+        prediction_cache.sync_versions(snapshot.version, model_version)
+        cache_key = PredictionCache.key(home_abbr, away_abbr, snapshot.version, model_version)
+        prediction_data = prediction_cache.get(cache_key) if model_version else None
+        cached = prediction_data is not None
+        
+        if cached:
+            print(f"\n⚡ Predicción desde caché (modelo {model_version})")
+        else:
+            def fetch_prediction():
+                # Solo el líder del single-flight llama al servicio ML y llena la caché
+                print(f"\n📡 Enviando a ML Service...")
+                data = ml_client.predict(features)
+                version = data.get('model_version') or model_version
+                if version:
+                    prediction_cache.put(
+                        PredictionCache.key(home_abbr, away_abbr, snapshot.version, version),
+                        data
+                    )
+                return data
             
-            if ml_response.status_code != 200:
-                print(f"❌ ML Service error: {ml_response.status_code}")
+            try:
+                prediction_data, shared = ml_flights.do(
+                    (home_abbr, away_abbr, snapshot.version),
+                    fetch_prediction,
+                    timeout=ML_SINGLEFLIGHT_TIMEOUT
+                )
+            except (MLServiceUnavailable, TimeoutError) as e:
+                print(f"❌ {e}")
+                return jsonify({'error': 'Servicio ML no disponible. Ejecuta: python ml-service/app/main.py'}), 503
+            except MLServiceError as e:
+                print(f"❌ ML Service error: {e.status_code}")
                 return jsonify({'error': 'Error en modelo ML'}), 500
             
-            prediction_data = ml_response.json()
-            
-            print(f"\n✅ PREDICCIÓN DEL MODELO:")
-            print(f"   Ganador: {prediction_data['predicted_winner']}")
-            print(f"   Confianza: {prediction_data['confidence']:.2%}")
-            print(f"   Prob. Home: {prediction_data['home_win_probability']:.2%}")
-            print(f"   Prob. Away: {prediction_data['away_win_probability']:.2%}")
-            
-        except requests.exceptions.ConnectionError:
-            print("❌ No se pudo conectar al servicio ML")
-            return jsonify({'error': 'Servicio ML no disponible. Ejecuta: python ml-service/app/main.py'}), 503
+            if shared:
+                print(f"\n🔗 Predicción compartida con un request en curso")
+            model_version = prediction_data.get('model_version') or model_version
+        
+        print(f"\n✅ PREDICCIÓN DEL MODELO:")
+        print(f"   Ganador: {prediction_data['predicted_winner']}")
+        print(f"   Confianza: {prediction_data['confidence']:.2%}")
+        print(f"   Prob. Home: {prediction_data['home_win_probability']:.2%}")
+        print(f"   Prob. Away: {prediction_data['away_win_probability']:.2%}")
         
         # Guardar en DB
         prediction = Prediction(
@@ -431,7 +472,10 @@ def analyze_text():
                 'away_win_probability': round(prediction_data['away_win_probability'] * 100, 2)
             },
             'id': prediction.id,
-            'stats_source': 'Datos dinámicos de temporada 2024-25'
+            'stats_source': 'Snapshot de features por equipo',
+            'snapshot_version': snapshot.version,
+            'model_version': model_version,
+            'cached': cached
         }), 200
         
     except Exception as e:
@@ -478,10 +522,39 @@ def get_teams():
 def health():
     return jsonify({
         'status': 'healthy',
-        'ml_service': ML_SERVICE_URL,
-        'teams_loaded': len(NBA_TEAMS)
+        'ml_service': ML_SERVICE_URLS,
+        'ml_replicas': {replica.base_url: replica.breaker.state for replica in ml_client.replicas},
+        'teams_loaded': len(NBA_TEAMS),
+        'team_snapshot_version': team_snapshots.version
     }), 200
 
+@app.route('/api/metrics/ml-client', methods=['GET'])
+def ml_client_metrics():
+    """GET /api/metrics/ml-client - Pool de conexiones, réplicas y circuit breakers del cliente ML"""
+    return jsonify(ml_client.stats()), 200
+
+@app.route('/api/metrics/team-snapshots', methods=['GET'])
+def team_snapshot_metrics():
+    """GET /api/metrics/team-snapshots - Versión, antigüedad y origen del snapshot de features"""
+    return jsonify(team_snapshots.stats()), 200
+
+@app.route('/api/metrics/prediction-cache', methods=['GET'])
+def prediction_cache_metrics():
+    """GET /api/metrics/prediction-cache - Hits, misses y tamaño de la caché de predicciones"""
+    return jsonify(prediction_cache.stats()), 200
+
+@app.route('/api/cache/invalidate', methods=['POST'])
+@jwt_required()
+def invalidate_prediction_cache():
+    """POST /api/cache/invalidate - Vacía la caché de predicciones"""
+    removed = prediction_cache.invalidate(reason='manual')
+    return jsonify({'invalidated': removed}), 200
+
+@app.route('/api/metrics/singleflight', methods=['GET'])
+def singleflight_metrics():
+    """GET /api/metrics/singleflight - Llamadas al servicio ML ejecutadas vs compartidas"""
+    return jsonify(ml_flights.stats()), 200
+
 # ==================== INICIALIZACIÓN ====================
 
 with app.app_context():
@@ -492,7 +565,7 @@ if __name__ == '__main__':
     print("\n" + "="*60)
     print("🏀 APUESTA IA - Backend con Features Dinámicas")
     print("="*60)
-    print(f"🔗 ML Service: {ML_SERVICE_URL}")
+    print(f"🔗 ML Service: {', '.join(ML_SERVICE_URLS)}")
     print(f"📊 Equipos NBA cargados: {len(NBA_TEAMS)}")
     print(f"💾 MySQL Database conectada")
     print("="*60 + "\n")
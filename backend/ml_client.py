@@ -0,0 +1,483 @@
+# backend/ml_client.py
+"""
+Cliente HTTP compartido para llamar al servicio ML
+
+- Una sola requests.Session con pool de conexiones keep-alive (sin un
+  handshake TCP nuevo por predicción).
+- Timeouts cortos de conexión y lectura: un servicio ML colgado no retiene
+  un worker de Flask durante 30 s.
+- Circuit breaker: tras varios fallos seguidos deja de llamar al servicio y
+  falla al instante (503) hasta que pasa el tiempo de enfriamiento; entonces
+  deja pasar un request de prueba.
+- Varias réplicas: balanceo por menos requests en curso, un circuit breaker
+  por réplica (salud pasiva), health checks periódicos (salud activa) y
+  request de cobertura (hedging) a otra réplica cuando la primera tarda más
+  que el percentil configurado de latencia.
+"""
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_CONNECT_TIMEOUT = 0.5
+DEFAULT_READ_TIMEOUT = 3.0
+
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 10.0
+
+# Hedging: percentil de latencia que dispara el segundo request y muestras mínimas
+DEFAULT_HEDGE_PERCENTILE = 0.95
+DEFAULT_HEDGE_MIN_SAMPLES = 50
+LATENCY_WINDOW = 1000
+
+# Intentos por llamada como máximo (original + cobertura o failover)
+MAX_ATTEMPTS = 2
+
+DEFAULT_HEALTH_INTERVAL = 5.0
+
+# Estados del circuit breaker
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class MLServiceUnavailable(Exception):
+    """El servicio ML no responde o el circuit breaker está abierto (→ 503)"""
+
+
+class MLServiceError(Exception):
+    """El servicio ML respondió con un error (→ 500)"""
+    
+    def __init__(self, status_code, message):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker thread-safe por conteo de fallos consecutivos
+    
+    closed → open tras `failure_threshold` fallos seguidos; open → half_open
+    pasados `reset_timeout` segundos (un solo request de prueba); el request
+    de prueba cierra el circuito si sale bien o lo vuelve a abrir si falla.
+    """
+    
+    def __init__(self, failure_threshold=DEFAULT_FAILURE_THRESHOLD, reset_timeout=DEFAULT_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._times_opened = 0
+        self._lock = threading.Lock()
+    
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+    
+    def _current_state(self):
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+    
+    def allow(self):
+        """True si el request puede salir; False si hay que fallar rápido"""
+        with self._lock:
+            state = self._current_state()
+            
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            
+            return False
+    
+    def record_success(self):
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+    
+    def trip(self):
+        """Abre el circuito de inmediato (health check activo fallido)"""
+        with self._lock:
+            if self._state != OPEN:
+                self._times_opened += 1
+            self._state = OPEN
+            self._opened_at = time.monotonic()
+            self._probe_in_flight = False
+    
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self._times_opened += 1
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self._probe_in_flight = False
+    
+    def stats(self):
+        with self._lock:
+            state = self._current_state()
+            return {
+                'state': state,
+                'consecutive_failures': self._failures,
+                'failure_threshold': self.failure_threshold,
+                'reset_timeout': self.reset_timeout,
+                'retry_in': round(max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at)), 2)
+                if state == OPEN else 0.0,
+                'times_opened': self._times_opened
+            }
+
+
+def percentile(values, q):
+    """Percentil q (0-1) de una lista ya ordenada (nearest-rank)"""
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+class Replica:
+    """
+    Una réplica del servicio ML con su circuit breaker y sus contadores
+    """
+    
+    def __init__(self, base_url, breaker):
+        self.base_url = base_url.rstrip('/')
+        self.breaker = breaker
+        self.in_flight = 0
+        self.counters = {'requests': 0, 'succeeded': 0, 'failed': 0, 'timeouts': 0}
+        self.total_latency = 0.0
+        self.last_health = None
+    
+    def stats(self):
+        completed = self.counters['requests'] - self.in_flight
+        return {
+            'url': self.base_url,
+            'in_flight': self.in_flight,
+            'avg_latency_ms': round(self.total_latency / completed * 1000, 2) if completed else 0.0,
+            **self.counters,
+            'last_health': self.last_health,
+            'breaker': self.breaker.stats()
+        }
+
+
+class MLClient:
+    """
+    Cliente del servicio ML compartido por todos los workers de Flask
+    """
+    
+    def __init__(self, base_urls, pool_size=DEFAULT_POOL_SIZE, connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout=DEFAULT_READ_TIMEOUT, failure_threshold=DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout=DEFAULT_RESET_TIMEOUT, hedge_percentile=DEFAULT_HEDGE_PERCENTILE,
+                 hedge_min_samples=DEFAULT_HEDGE_MIN_SAMPLES, health_interval=DEFAULT_HEALTH_INTERVAL):
+        """
+        Args:
+            base_urls: URL o lista de URLs de réplicas (ej. "http://localhost:8000,http://localhost:8001")
+            pool_size: Conexiones keep-alive máximas hacia cada réplica
+            connect_timeout: Timeout de conexión (s)
+            read_timeout: Timeout de lectura de la respuesta (s)
+            failure_threshold: Fallos seguidos que abren el circuito de una réplica
+            reset_timeout: Segundos con el circuito abierto antes del request de prueba
+            hedge_percentile: Percentil de latencia tras el cual se envía el request de cobertura (None = sin hedging)
+            hedge_min_samples: Latencias observadas necesarias antes de empezar a cubrir
+            health_interval: Segundos entre health checks activos
+        """
+        if isinstance(base_urls, str):
+            base_urls = base_urls.split(',')
+        base_urls = [url.strip() for url in base_urls if url.strip()]
+        if not base_urls:
+            raise ValueError("Se necesita al menos una URL del servicio ML")
+        
+        self.replicas = [Replica(url, CircuitBreaker(failure_threshold, reset_timeout)) for url in base_urls]
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.hedge_percentile = hedge_percentile if len(self.replicas) > 1 else None
+        self.hedge_min_samples = hedge_min_samples
+        self.health_interval = health_interval
+        
+        # Sin reintentos automáticos: un reintento duplicaría la espera con el servicio caído
+        self._adapter = HTTPAdapter(pool_connections=len(self.replicas), pool_maxsize=pool_size, max_retries=0)
+        self.session = requests.Session()
+        self.session.mount('http://', self._adapter)
+        self.session.mount('https://', self._adapter)
+        
+        # Con varias réplicas cada intento corre en un hilo para poder cubrirlo o abandonarlo
+        self._executor = None
+        if len(self.replicas) > 1:
+            self._executor = ThreadPoolExecutor(
+                max_workers=pool_size * len(self.replicas),
+                thread_name_prefix='ml-client'
+            )
+        
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._counters = {'requests': 0, 'rejected': 0, 'hedged': 0, 'hedge_wins': 0, 'failovers': 0}
+        self._health_thread = None
+        self._stop = threading.Event()
+        self._model_version = None
+    
+    @property
+    def base_url(self):
+        return self.replicas[0].base_url
+    
+    @property
+    def model_version(self):
+        """Última versión de modelo vista (en /health o en una predicción); None si aún no se conoce"""
+        return self._model_version
+    
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+    
+    def _pick(self, exclude=()):
+        """
+        Réplica con menos requests en curso cuyo circuito deje pasar el request
+        
+        Los empates se rompen al azar para no cargar siempre la primera.
+        """
+        with self._lock:
+            candidates = [r for r in self.replicas if r not in exclude and r.breaker.state != OPEN]
+            candidates.sort(key=lambda r: (r.in_flight, random.random()))
+        
+        for replica in candidates:
+            if replica.breaker.allow():
+                return replica
+        return None
+    
+    def hedge_delay(self):
+        """Latencia (s) tras la cual se cubre un request; None si no hay hedging o faltan muestras"""
+        if self.hedge_percentile is None:
+            return None
+        with self._lock:
+            if len(self._latencies) < self.hedge_min_samples:
+                return None
+            latencies = sorted(self._latencies)
+        return percentile(latencies, self.hedge_percentile)
+    
+    def _call(self, replica, path, payload):
+        """Un intento contra una réplica (actualiza su breaker y contadores)"""
+        with self._lock:
+            replica.counters['requests'] += 1
+            replica.in_flight += 1
+        
+        started = time.perf_counter()
+        try:
+            response = self.session.post(f'{replica.base_url}{path}', json=payload, timeout=self.timeout)
+        except requests.exceptions.Timeout:
+            self._fail(replica, timeout=True)
+            raise MLServiceUnavailable(f"Servicio ML no respondió a tiempo ({replica.base_url})")
+        except requests.exceptions.ConnectionError:
+            self._fail(replica)
+            raise MLServiceUnavailable(f"No se pudo conectar al servicio ML ({replica.base_url})")
+        except requests.exceptions.RequestException as e:
+            self._fail(replica)
+            raise MLServiceUnavailable(f"Error de red con el servicio ML ({replica.base_url}): {e}")
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                replica.in_flight -= 1
+                replica.total_latency += elapsed
+        
+        if response.status_code in (502, 503, 504):
+            self._fail(replica)
+            raise MLServiceUnavailable(f"Servicio ML no disponible ({response.status_code}, {replica.base_url})")
+        
+        # Un 200 con cuerpo ilegible cuenta como fallo de la réplica (libera la sonda HALF_OPEN)
+        if response.status_code == 200:
+            try:
+                data = response.json()
+            except ValueError:
+                self._fail(replica)
+                raise MLServiceUnavailable(f"Respuesta inválida del servicio ML ({replica.base_url})")
+        
+        # La réplica respondió: está sana aunque el request sea inválido
+        replica.breaker.record_success()
+        
+        with self._lock:
+            if response.status_code != 200:
+                replica.counters['failed'] += 1
+            else:
+                replica.counters['succeeded'] += 1
+                self._latencies.append(elapsed)
+        
+        if response.status_code != 200:
+            raise MLServiceError(response.status_code, f"Error en modelo ML ({response.status_code})")
+        
+        if isinstance(data, dict) and data.get('model_version'):
+            self._model_version = data['model_version']
+        return data
+    
+    def _fail(self, replica, timeout=False):
+        with self._lock:
+            replica.counters['failed'] += 1
+            if timeout:
+                replica.counters['timeouts'] += 1
+        replica.breaker.record_failure()
+    
+    def post(self, path, payload):
+        """
+        POST JSON al servicio ML (balanceado entre réplicas, con hedging y failover)
+        
+        Returns:
+            Respuesta JSON decodificada
+        
+        Raises:
+            MLServiceUnavailable: sin réplicas disponibles, o todos los intentos fallaron
+                por red, timeout o 502/503/504
+            MLServiceError: una réplica respondió con otro código distinto de 200
+        """
+        replica = self._pick()
+        if replica is None:
+            self._count('rejected')
+            raise MLServiceUnavailable("Servicio ML no disponible (circuit breaker abierto)")
+        
+        self._count('requests')
+        
+        if self._executor is None:
+            return self._call(replica, path, payload)
+        
+        tried = [replica]
+        primary = self._executor.submit(self._call, replica, path, payload)
+        pending = {primary}
+        hedges = set()
+        delay = self.hedge_delay()
+        error = None
+        
+        while pending:
+            done, pending = wait(pending, timeout=delay, return_when=FIRST_COMPLETED)
+            
+            if not done:
+                # El intento supera el percentil de latencia: cubrirlo en otra réplica
+                delay = None
+                other = self._pick(exclude=tried) if len(tried) < MAX_ATTEMPTS else None
+                if other is not None:
+                    tried.append(other)
+                    self._count('hedged')
+                    hedge = self._executor.submit(self._call, other, path, payload)
+                    hedges.add(hedge)
+                    pending.add(hedge)
+                continue
+            
+            for future in done:
+                try:
+                    result = future.result()
+                except MLServiceUnavailable as e:
+                    error = e
+                    continue
+                
+                # Un MLServiceError se propaga: otra réplica respondería lo mismo
+                if future in hedges:
+                    self._count('hedge_wins')
+                return result
+            
+            # Todo lo terminado falló y no queda nada en curso: failover a otra réplica
+            if not pending and len(tried) < MAX_ATTEMPTS:
+                other = self._pick(exclude=tried)
+                if other is not None:
+                    tried.append(other)
+                    self._count('failovers')
+                    pending.add(self._executor.submit(self._call, other, path, payload))
+        
+        raise error
+    
+    def predict(self, features):
+        """POST /predict con el dict {'home', 'away', 'metadata'}"""
+        return self.post('/predict', features)
+    
+    def check_health(self):
+        """
+        Health check activo de todas las réplicas (GET /health)
+        
+        Una réplica que no responde o no tiene modelo cargado abre su
+        circuito de inmediato; una sana lo cierra aunque estuviera abierto.
+        """
+        for replica in self.replicas:
+            started = time.perf_counter()
+            try:
+                response = self.session.get(f'{replica.base_url}/health', timeout=self.timeout)
+                body = response.json() if response.status_code == 200 else {}
+                healthy = bool(body.get('model_loaded'))
+                if healthy and body.get('model_version'):
+                    self._model_version = body['model_version']
+            except (requests.exceptions.RequestException, ValueError):
+                healthy = False
+            
+            replica.last_health = {
+                'healthy': healthy,
+                'checked_at': time.time(),
+                'latency_ms': round((time.perf_counter() - started) * 1000, 2)
+            }
+            
+            if healthy:
+                if replica.breaker.state != CLOSED:
+                    print(f"✅ Réplica ML recuperada: {replica.base_url}")
+                replica.breaker.record_success()
+            elif replica.breaker.state != OPEN:
+                print(f"⚠️  Réplica ML no disponible: {replica.base_url}")
+                replica.breaker.trip()
+    
+    def _health_loop(self):
+        while not self._stop.wait(self.health_interval):
+            self.check_health()
+    
+    def start_health_checks(self):
+        """Inicia el hilo de health checks activos"""
+        if self._health_thread is not None and self._health_thread.is_alive():
+            return
+        
+        self._stop.clear()
+        self._health_thread = threading.Thread(target=self._health_loop, name='ml-health', daemon=True)
+        self._health_thread.start()
+    
+    def stop(self):
+        """Detiene los health checks y el pool de hilos"""
+        self._stop.set()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+    
+    def pool_stats(self):
+        """Conexiones del pool de urllib3 (creadas, ociosas, requests servidos)"""
+        container = self._adapter.poolmanager.pools
+        pools = [container.get(key) for key in container.keys()]
+        pools = [pool for pool in pools if pool is not None]
+        return {
+            'max_size_per_host': self.pool_size,
+            'hosts': len(pools),
+            'connections_created': sum(pool.num_connections for pool in pools),
+            'idle_connections': sum(pool.pool.qsize() for pool in pools if pool.pool is not None),
+            'requests_served': sum(pool.num_requests for pool in pools)
+        }
+    
+    def stats(self):
+        """Métricas del cliente, del pool, de cada réplica y de su circuit breaker"""
+        with self._lock:
+            counters = dict(self._counters)
+            latencies = sorted(self._latencies)
+            replicas = [replica.stats() for replica in self.replicas]
+        
+        hedge_delay = self.hedge_delay()
+        
+        return {
+            'connect_timeout': self.timeout[0],
+            'read_timeout': self.timeout[1],
+            **counters,
+            'latency_ms': {
+                name: round(percentile(latencies, q) * 1000, 2) if latencies else None
+                for name, q in (('p50', 0.5), ('p95', 0.95), ('p99', 0.99))
+            },
+            'hedge_percentile': self.hedge_percentile,
+            'hedge_delay_ms': round(hedge_delay * 1000, 2) if hedge_delay is not None else None,
+            'pool': self.pool_stats(),
+            'replicas': replicas
+        }
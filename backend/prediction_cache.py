@@ -0,0 +1,113 @@
+# backend/prediction_cache.py
+"""
+Caché de predicciones por partido
+
+Clave: (local, visitante, versión del snapshot de features, versión del
+modelo). Con el mismo snapshot y el mismo modelo la predicción es
+determinista, así que los requests repetidos de una noche no vuelven a
+llamar al servicio ML. Las entradas expiran por TTL, se desalojan por LRU
+al llegar al máximo y se invalidan todas cuando cambia el snapshot o el
+modelo.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = 2048
+DEFAULT_TTL = 900.0
+
+
+class PredictionCache:
+    """
+    Caché LRU + TTL thread-safe de respuestas de POST /predict
+    """
+    
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL):
+        """
+        Args:
+            max_entries: Entradas máximas (se desaloja la menos usada)
+            ttl: Segundos de vida de cada entrada
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._versions = None
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0, 'expired': 0, 'evicted': 0, 'invalidations': 0}
+    
+    @staticmethod
+    def key(home, away, snapshot_version, model_version):
+        return (home, away, snapshot_version, model_version)
+    
+    def get(self, key):
+        """Predicción cacheada o None (cuenta hit/miss)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                self._counters['expired'] += 1
+                entry = None
+            
+            if entry is None:
+                self._counters['misses'] += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self._counters['hits'] += 1
+            return dict(entry[1])
+    
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, dict(value))
+            self._entries.move_to_end(key)
+            
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters['evicted'] += 1
+    
+    def invalidate(self, reason=None):
+        """Vacía la caché; retorna las entradas eliminadas"""
+        with self._lock:
+            removed = len(self._entries)
+            self._entries.clear()
+            self._counters['invalidations'] += 1
+        
+        print(f"🧹 Caché de predicciones invalidada ({removed} entradas){f': {reason}' if reason else ''}")
+        return removed
+    
+    def sync_versions(self, snapshot_version, model_version):
+        """
+        Invalida todo si cambió la versión del snapshot o del modelo desde la última llamada
+        
+        Las claves ya incluyen ambas versiones, así que las entradas viejas nunca
+        se servirían; invalidarlas libera la memoria de inmediato.
+        """
+        versions = (snapshot_version, model_version)
+        with self._lock:
+            previous, self._versions = self._versions, versions
+        
+        # Pasar de versión de modelo desconocida a conocida no es un cambio
+        if previous is not None and previous[1] is None:
+            previous = (previous[0], model_version)
+        
+        if previous is not None and previous != versions:
+            changed = 'snapshot' if previous[0] != snapshot_version else 'modelo'
+            self.invalidate(reason=f"cambió la versión del {changed}")
+    
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+            size = len(self._entries)
+            versions = self._versions
+        
+        lookups = counters['hits'] + counters['misses']
+        return {
+            'size': size,
+            'max_entries': self.max_entries,
+            'ttl': self.ttl,
+            'hit_rate': round(counters['hits'] / lookups, 4) if lookups else 0.0,
+            **counters,
+            'snapshot_version': versions[0] if versions else None,
+            'model_version': versions[1] if versions else None
+        }
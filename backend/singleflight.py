@@ -0,0 +1,81 @@
+# backend/singleflight.py
+"""
+Single-flight: agrupa llamadas concurrentes idénticas en una sola
+
+El primer hilo que pide una clave (líder) ejecuta la función; los que
+piden la misma clave mientras tanto esperan su resultado (o su excepción)
+en lugar de repetir la llamada. Al terminar, la clave se libera y el
+siguiente pedido vuelve a ejecutar la función.
+"""
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+DEFAULT_TIMEOUT = 5.0
+
+
+class SingleFlight:
+    """
+    Coalescencia thread-safe de llamadas en curso por clave
+    """
+    
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._counters = {'calls': 0, 'executed': 0, 'shared': 0, 'timeouts': 0}
+    
+    def do(self, key, fn, timeout=DEFAULT_TIMEOUT):
+        """
+        Ejecuta fn() una sola vez por clave entre los hilos concurrentes
+        
+        Args:
+            key: Clave hashable de la llamada
+            fn: Función sin argumentos
+            timeout: Segundos que un hilo que no es el líder espera el resultado
+        
+        Returns:
+            Tupla (resultado, shared): shared=True si el resultado vino de la llamada de otro hilo
+        
+        Raises:
+            La excepción de fn (también en los hilos que esperaban), o
+            TimeoutError si el resultado no llegó dentro de `timeout`
+        """
+        with self._lock:
+            self._counters['calls'] += 1
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+                self._counters['executed'] += 1
+            else:
+                self._counters['shared'] += 1
+        
+        if not leader:
+            try:
+                return future.result(timeout=timeout), True
+            except FutureTimeout:
+                with self._lock:
+                    self._counters['timeouts'] += 1
+                raise TimeoutError(f"Sin resultado para {key} en {timeout}s")
+        
+        try:
+            result = fn()
+        except BaseException as e:
+            self._finish(key)
+            future.set_exception(e)
+            raise
+        
+        self._finish(key)
+        future.set_result(result)
+        return result, False
+    
+    def _finish(self, key):
+        with self._lock:
+            self._calls.pop(key, None)
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'in_flight': len(self._calls),
+                **self._counters
+            }
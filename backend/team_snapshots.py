@@ -0,0 +1,311 @@
+# backend/team_snapshots.py
+"""
+Tabla precalculada de features por equipo (snapshots versionados)
+
+Un hilo de fondo reconstruye cada cierto intervalo la tabla a partir del
+game log (promedios de temporada y últimos 5 partidos), del estado Elo que
+persiste ml-service y de un JSON opcional de lesiones. La tabla es un
+array('d') plano (una fila por equipo) dentro de un snapshot inmutable; los
+requests solo hacen un lookup O(1) en el snapshot actual, así que dos
+predicciones con el mismo snapshot usan exactamente las mismas features.
+
+La versión del snapshot es un hash de su contenido: si los datos no
+cambian entre refrescos, la versión tampoco.
+"""
+import csv
+import hashlib
+import heapq
+import json
+import os
+import threading
+import time
+import zlib
+from array import array
+
+# Columnas de la tabla (una fila por equipo)
+FIELDS = [
+    'ppg', 'rpg', 'apg', 'topg', 'fg_pct',
+    'roll5_pts', 'roll5_reb', 'roll5_ast', 'roll5_tov', 'roll5_fg_pct',
+    'elo'
+]
+FIELD_INDEX = {name: i for i, name in enumerate(FIELDS)}
+
+# Stats del game log: sufijo de columna (home_pts / away_pts) → campos de temporada y roll5
+GAME_LOG_STATS = [
+    ('pts', 'ppg', 'roll5_pts'),
+    ('reb', 'rpg', 'roll5_reb'),
+    ('ast', 'apg', 'roll5_ast'),
+    ('tov', 'topg', 'roll5_tov'),
+    ('fg_pct', 'fg_pct', 'roll5_fg_pct')
+]
+
+# Partidos recientes por equipo para los promedios de "temporada" y para el rolling
+SEASON_GAMES = 82
+ROLL_GAMES = 5
+
+DEFAULT_REFRESH_INTERVAL = 300.0
+
+
+def _mtime(path):
+    try:
+        return os.path.getmtime(path) if path else None
+    except OSError:
+        return None
+
+
+def read_recent_games(path, n_games=SEASON_GAMES):
+    """
+    Últimos `n_games` partidos de cada equipo en el game log (CSV de ml-service)
+    
+    Lee el CSV en streaming y conserva por equipo un heap acotado, así la
+    memoria no depende del largo del archivo.
+    
+    Returns:
+        Dict {equipo: [(fecha, {stat: valor}), ...]} ordenado de más antiguo a más reciente
+    """
+    recent = {}
+    with open(path, newline='') as f:
+        for i, row in enumerate(csv.DictReader(f)):
+            date = row.get('game_date') or row.get('date') or ''
+            for side in ('home', 'away'):
+                team = row.get(f'{side}_team')
+                if not team:
+                    continue
+                try:
+                    stats = {stat: float(row[f'{side}_{stat}']) for stat, _, _ in GAME_LOG_STATS}
+                except (KeyError, TypeError, ValueError):
+                    continue
+                
+                # (fecha, fila) como desempate estable para partidos del mismo día
+                games = recent.setdefault(team, [])
+                heapq.heappush(games, (date, i, stats))
+                if len(games) > n_games:
+                    heapq.heappop(games)
+    
+    return {team: [(date, stats) for date, _, stats in sorted(games)] for team, games in recent.items()}
+
+
+def _mean(values):
+    return sum(values) / len(values)
+
+
+class TeamSnapshot:
+    """
+    Features de todos los equipos en un instante (inmutable)
+    """
+    
+    def __init__(self, teams, values, injuries, sources):
+        """
+        Args:
+            teams: Abreviaturas en el orden de las filas
+            values: array('d') de len(teams) * len(FIELDS)
+            injuries: {equipo: [jugadores lesionados]}
+            sources: Origen de cada dato (para métricas)
+        """
+        self.teams = list(teams)
+        self.index = {team: i for i, team in enumerate(self.teams)}
+        self.values = values
+        self.injuries = injuries
+        self.sources = sources
+        self.built_at = time.time()
+        
+        digest = hashlib.sha1(values.tobytes())
+        digest.update(json.dumps([self.teams, injuries], sort_keys=True).encode())
+        self.version = digest.hexdigest()[:12]
+    
+    def __contains__(self, team):
+        return team in self.index
+    
+    def features(self, team):
+        """
+        Dict de features del equipo con la estructura que espera POST /predict
+        
+        Raises:
+            ValueError: si el equipo no está en el snapshot
+        """
+        if team not in self.index:
+            raise ValueError(f"Equipo {team} no encontrado")
+        
+        offset = self.index[team] * len(FIELDS)
+        row = dict(zip(FIELDS, self.values[offset:offset + len(FIELDS)]))
+        
+        return {
+            'abbreviation': team,
+            'teamId': zlib.crc32(team.encode()) % 10000,  # ID estable entre procesos
+            'stats': {
+                'points_per_game': round(row['ppg'], 1),
+                'rebounds': round(row['rpg'], 1),
+                'assists': round(row['apg'], 1),
+                'turnovers': round(row['topg'], 1),
+                'fg_pct': round(row['fg_pct'], 3)
+            },
+            'lastGames': [],
+            'injuries': list(self.injuries.get(team, [])),
+            'roll5_pts': round(row['roll5_pts'], 1),
+            'roll5_reb': round(row['roll5_reb'], 1),
+            'roll5_ast': round(row['roll5_ast'], 1),
+            'roll5_tov': round(row['roll5_tov'], 1),
+            'roll5_fg_pct': round(row['roll5_fg_pct'], 3),
+            'elo': round(row['elo'], 1)
+        }
+
+
+class TeamSnapshotStore:
+    """
+    Snapshot actual de features por equipo, refrescado en segundo plano
+    """
+    
+    def __init__(self, defaults, games_csv_path=None, elo_state_path=None, injuries_path=None,
+                 refresh_interval=DEFAULT_REFRESH_INTERVAL):
+        """
+        Args:
+            defaults: {equipo: {'elo_base', 'ppg', 'rpg', 'apg', 'topg', 'fg_pct'}} para equipos
+                sin datos (y lista de equipos conocidos)
+            games_csv_path: Game log de ml-service (nba_games_clean.csv)
+            elo_state_path: Estado Elo persistido por ml-service (elo_state.json)
+            injuries_path: JSON opcional {equipo: [jugadores lesionados]}
+            refresh_interval: Segundos entre refrescos del hilo de fondo
+        """
+        self.defaults = defaults
+        self.games_csv_path = games_csv_path
+        self.elo_state_path = elo_state_path
+        self.injuries_path = injuries_path
+        self.refresh_interval = refresh_interval
+        
+        self._snapshot = None
+        self._source_mtimes = None
+        self._refreshes = 0
+        self._refresh_errors = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        
+        self.refresh(force=True)
+    
+    @property
+    def current(self):
+        """Snapshot vigente (referencia fija: no cambia aunque haya un refresco)"""
+        return self._snapshot
+    
+    @property
+    def version(self):
+        return self._snapshot.version
+    
+    def get(self, team):
+        """Features del equipo en el snapshot actual (lookup O(1))"""
+        return self._snapshot.features(team)
+    
+    def _load_json(self, path, key=None):
+        if not path or not os.path.exists(path):
+            return {}
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            return data.get(key, {}) if key else data
+        except (OSError, ValueError) as e:
+            print(f"⚠️  No se pudo leer {path}: {e}")
+            return {}
+    
+    def build(self):
+        """
+        Construye un snapshot nuevo desde las fuentes
+        
+        Returns:
+            TeamSnapshot
+        """
+        recent = {}
+        if self.games_csv_path and os.path.exists(self.games_csv_path):
+            recent = read_recent_games(self.games_csv_path)
+        ratings = self._load_json(self.elo_state_path, key='ratings')
+        injuries = self._load_json(self.injuries_path)
+        
+        teams = sorted(self.defaults)
+        values = array('d', bytes(8 * len(teams) * len(FIELDS)))
+        sources = {'game_log': 0, 'defaults': 0, 'elo_state': 0}
+        
+        for i, team in enumerate(teams):
+            offset = i * len(FIELDS)
+            base = self.defaults[team]
+            games = recent.get(team)
+            
+            if games:
+                sources['game_log'] += 1
+                last = games[-ROLL_GAMES:]
+                for stat, season_field, roll_field in GAME_LOG_STATS:
+                    values[offset + FIELD_INDEX[season_field]] = _mean([g[stat] for _, g in games])
+                    values[offset + FIELD_INDEX[roll_field]] = _mean([g[stat] for _, g in last])
+            else:
+                sources['defaults'] += 1
+                for stat, season_field, roll_field in GAME_LOG_STATS:
+                    values[offset + FIELD_INDEX[season_field]] = base[season_field]
+                    values[offset + FIELD_INDEX[roll_field]] = base[season_field]
+            
+            if team in ratings:
+                sources['elo_state'] += 1
+            values[offset + FIELD_INDEX['elo']] = float(ratings.get(team, base['elo_base']))
+        
+        injuries = {team: list(players) for team, players in injuries.items() if team in self.defaults}
+        
+        return TeamSnapshot(teams, values, injuries, sources)
+    
+    def refresh(self, force=False):
+        """
+        Reconstruye el snapshot si alguna fuente cambió (o si force=True)
+        
+        Returns:
+            True si se publicó un snapshot con versión nueva
+        """
+        mtimes = tuple(_mtime(p) for p in (self.games_csv_path, self.elo_state_path, self.injuries_path))
+        if not force and mtimes == self._source_mtimes:
+            return False
+        
+        started = time.perf_counter()
+        try:
+            snapshot = self.build()
+        except Exception as e:
+            self._refresh_errors += 1
+            print(f"❌ Error refrescando features de equipos: {e}")
+            if self._snapshot is None:
+                raise
+            return False
+        
+        with self._lock:
+            previous = self._snapshot
+            self._snapshot = snapshot
+            self._source_mtimes = mtimes
+            self._refreshes += 1
+        
+        changed = previous is None or previous.version != snapshot.version
+        if changed:
+            print(f"✅ Snapshot de equipos {snapshot.version}: {len(snapshot.teams)} equipos "
+                  f"({snapshot.sources['game_log']} con game log) en {time.perf_counter() - started:.2f}s")
+        return changed
+    
+    def _run(self):
+        while not self._stop.wait(self.refresh_interval):
+            self.refresh()
+    
+    def start(self):
+        """Inicia el hilo de refresco"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='team-snapshots', daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+    
+    def stats(self):
+        snapshot = self._snapshot
+        return {
+            'version': snapshot.version,
+            'built_at': snapshot.built_at,
+            'age_seconds': round(time.time() - snapshot.built_at, 1),
+            'teams': len(snapshot.teams),
+            'sources': snapshot.sources,
+            'refresh_interval': self.refresh_interval,
+            'refreshes': self._refreshes,
+            'refresh_errors': self._refresh_errors
+        }
@@ -0,0 +1,179 @@
+# ml-service/app/data/elo.py
+"""
+Motor Elo secuencial con estado persistente
+
+Procesa el log de partidos en orden cronológico con factor K, ventaja de
+local y multiplicador por margen de victoria. Para cada partido emite el
+Elo previo al juego (sin fuga de información) y guarda los ratings
+actuales en un JSON que leen tanto el entrenamiento como el backend. Un
+resultado nuevo actualiza el estado en O(1) con `update`.
+"""
+import json
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_RATING = 1500.0
+K_FACTOR = 20.0
+HOME_ADVANTAGE = 100.0
+
+# Entre temporadas cada rating vuelve una fracción hacia la media
+SEASON_REVERSION = 0.25
+OFFSEASON_DAYS = 90
+
+ELO_STATE_PATH = os.path.join("data", "elo_state.json")
+
+
+class EloEngine:
+    """
+    Ratings Elo por equipo que se actualizan partido a partido
+    """
+    
+    def __init__(self, k=K_FACTOR, home_advantage=HOME_ADVANTAGE,
+                 season_reversion=SEASON_REVERSION, ratings=None):
+        """
+        Args:
+            k: Factor K (cuánto mueve un resultado el rating)
+            home_advantage: Puntos Elo que se suman al local al calcular la expectativa
+            season_reversion: Fracción de regresión a la media tras un parón largo
+            ratings: Ratings iniciales {equipo: elo} (default: todos en 1500)
+        """
+        self.k = k
+        self.home_advantage = home_advantage
+        self.season_reversion = season_reversion
+        self.ratings = dict(ratings or {})
+        self.last_played = {}
+        self.games_processed = 0
+        self.last_game_id = None
+        self.last_game_date = None
+    
+    def rating(self, team):
+        return self.ratings.get(team, DEFAULT_RATING)
+    
+    def expected_home(self, home_team, away_team):
+        """Probabilidad Elo de victoria local"""
+        diff = self.rating(home_team) + self.home_advantage - self.rating(away_team)
+        return 1.0 / (1.0 + 10 ** (-diff / 400.0))
+    
+    def update(self, home_team, away_team, home_pts, away_pts, game_id=None, game_date=None):
+        """
+        Aplica un resultado y actualiza ambos ratings en O(1)
+        
+        Returns:
+            Tupla (home_elo, away_elo) previa al partido
+        """
+        if game_date is not None:
+            game_date = pd.Timestamp(game_date)
+            self._revert_after_offseason(home_team, game_date)
+            self._revert_after_offseason(away_team, game_date)
+        
+        home_elo = self.rating(home_team)
+        away_elo = self.rating(away_team)
+        
+        expected = self.expected_home(home_team, away_team)
+        margin = home_pts - away_pts
+        actual = 1.0 if margin > 0 else 0.0
+        
+        # Multiplicador por margen de victoria (corrige autocorrelación del favorito)
+        winner_diff = (home_elo + self.home_advantage - away_elo) * (1 if margin > 0 else -1)
+        multiplier = math.log(abs(margin) + 1) * 2.2 / (winner_diff * 0.001 + 2.2)
+        
+        shift = self.k * multiplier * (actual - expected)
+        self.ratings[home_team] = home_elo + shift
+        self.ratings[away_team] = away_elo - shift
+        
+        self.games_processed += 1
+        if game_id is not None:
+            self.last_game_id = str(game_id)
+        if game_date is not None:
+            self.last_played[home_team] = game_date
+            self.last_played[away_team] = game_date
+            self.last_game_date = game_date
+        
+        return home_elo, away_elo
+    
+    def process(self, games, date_column='game_date'):
+        """
+        Procesa partidos en orden cronológico y emite el Elo previo de cada uno
+        
+        Args:
+            games: DataFrame con home_team, away_team, home_pts, away_pts y fecha
+            date_column: Columna de fecha del partido
+        
+        Returns:
+            DataFrame con el índice de `games` y columnas home_elo, away_elo, elo_diff
+        """
+        sort_columns = [date_column] + (['game_id'] if 'game_id' in games.columns else [])
+        ordered = games.sort_values(sort_columns, kind='mergesort')
+        
+        home_teams = ordered['home_team'].astype(str).to_numpy()
+        away_teams = ordered['away_team'].astype(str).to_numpy()
+        home_pts = ordered['home_pts'].to_numpy(dtype=np.float64)
+        away_pts = ordered['away_pts'].to_numpy(dtype=np.float64)
+        dates = pd.to_datetime(ordered[date_column]).to_numpy()
+        game_ids = ordered['game_id'].to_numpy() if 'game_id' in ordered.columns else [None] * len(ordered)
+        
+        home_elo = np.empty(len(ordered), dtype=np.float32)
+        away_elo = np.empty(len(ordered), dtype=np.float32)
+        
+        # Dependencia secuencial: cada partido usa los ratings del anterior
+        for i in range(len(ordered)):
+            home_elo[i], away_elo[i] = self.update(
+                home_teams[i], away_teams[i], home_pts[i], away_pts[i],
+                game_id=game_ids[i], game_date=dates[i]
+            )
+        
+        result = pd.DataFrame(
+            {'home_elo': home_elo, 'away_elo': away_elo},
+            index=ordered.index
+        ).reindex(games.index)
+        result['elo_diff'] = result['home_elo'] - result['away_elo']
+        
+        return result
+    
+    def _revert_after_offseason(self, team, game_date):
+        """Regresión a la media si el equipo no juega hace más de OFFSEASON_DAYS"""
+        last = self.last_played.get(team)
+        if last is not None and (game_date - last).days > OFFSEASON_DAYS:
+            rating = self.rating(team)
+            self.ratings[team] = rating + (DEFAULT_RATING - rating) * self.season_reversion
+    
+    def to_dict(self):
+        return {
+            'params': {
+                'k': self.k,
+                'home_advantage': self.home_advantage,
+                'season_reversion': self.season_reversion
+            },
+            # Precisión completa: recargar el estado debe dar lo mismo que recalcular
+            'ratings': {team: float(r) for team, r in sorted(self.ratings.items())},
+            'last_played': {team: d.isoformat() for team, d in sorted(self.last_played.items())},
+            'games_processed': self.games_processed,
+            'last_game_id': self.last_game_id,
+            'last_game_date': self.last_game_date.isoformat() if self.last_game_date is not None else None
+        }
+    
+    def save(self, path=ELO_STATE_PATH):
+        """Guarda el estado actual (escritura atómica)"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(tmp_path, path)
+    
+    @classmethod
+    def load(cls, path=ELO_STATE_PATH):
+        """Carga un estado guardado con save()"""
+        with open(path) as f:
+            state = json.load(f)
+        
+        engine = cls(ratings=state['ratings'], **state['params'])
+        engine.last_played = {team: pd.Timestamp(d) for team, d in state.get('last_played', {}).items()}
+        engine.games_processed = state.get('games_processed', 0)
+        engine.last_game_id = state.get('last_game_id')
+        if state.get('last_game_date'):
+            engine.last_game_date = pd.Timestamp(state['last_game_date'])
+        
+        return engine
@@ -0,0 +1,147 @@
+# ml-service/app/data/feature_store.py
+import os
+
+import numpy as np
+import pandas as pd
+
+from data.loader import read_games, is_parquet
+from utils.helpers import file_sha256
+
+FEATURE_STORE_DIR = os.path.join("data", "cache", "games")
+MATRIX_CACHE_DIR = os.path.join("data", "cache", "matrix")
+
+
+class FeatureStore:
+    """
+    Caché columnar (Parquet) de los CSV de partidos
+    
+    Cada CSV se parsea una sola vez a un dataset tipado (float32 para stats,
+    int8 para conteos/flags, category para equipos, fechas parseadas) y se
+    guarda bajo el hash de su contenido. Los entrenamientos siguientes con
+    el mismo CSV leen el Parquet directamente.
+    """
+    
+    def __init__(self, root=FEATURE_STORE_DIR, matrix_root=MATRIX_CACHE_DIR):
+        """
+        Args:
+            root: Directorio donde se guardan los datasets convertidos
+            matrix_root: Directorio de las matrices de features (X, y) cacheadas
+        """
+        self.root = root
+        self.matrix_root = matrix_root
+    
+    def dataset_path(self, content_hash):
+        return os.path.join(self.root, f"{content_hash}.parquet")
+    
+    def dataset_source(self, csv_path, content_hash=None):
+        """
+        Mejor archivo para leer un dataset por chunks: el Parquet ya
+        convertido si existe, si no el archivo original
+        """
+        if is_parquet(csv_path):
+            return csv_path
+        
+        path = self.dataset_path(content_hash or file_sha256(csv_path))
+        return path if os.path.exists(path) else csv_path
+    
+    def load_games(self, csv_path, content_hash=None, columns=None):
+        """
+        Retorna el dataset tipado de un CSV, convirtiéndolo solo si hace falta
+        
+        Args:
+            csv_path: Ruta al CSV crudo de partidos (un Parquet se lee directo)
+            content_hash: SHA-256 del CSV si ya se calculó (evita releerlo)
+            columns: Leer solo estas columnas (se ignoran las que no existan)
+        
+        Returns:
+            DataFrame tipado
+        """
+        if is_parquet(csv_path):
+            return read_games(csv_path, columns=columns)
+        
+        content_hash = content_hash or file_sha256(csv_path)
+        path = self.dataset_path(content_hash)
+        
+        if os.path.exists(path):
+            print(f" Feature store: usando caché {path}")
+            return read_games(path, columns=columns)
+        
+        print(f" Feature store: convirtiendo {csv_path} a Parquet...")
+        df = read_games(csv_path)
+        
+        # Escritura atómica: otro proceso nunca lee un Parquet a medias
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+        
+        print(f" Feature store: guardado {path}")
+        
+        if columns is not None:
+            df = df[[c for c in columns if c in df.columns]]
+        return df
+    
+    def matrix_path(self, key):
+        return os.path.join(self.matrix_root, f"{key}.npz")
+    
+    def load_matrix(self, key):
+        """
+        Matriz de features cacheada
+        
+        Args:
+            key: Clave de la matriz (hash del dataset + hash del spec de features)
+        
+        Returns:
+            Tupla (X DataFrame float32, y Series) o None si no está en caché
+        """
+        path = self.matrix_path(key)
+        if not os.path.exists(path):
+            return None
+        
+        with np.load(path, allow_pickle=False) as data:
+            X = pd.DataFrame(data['X'], columns=data['feature_names'].tolist())
+            y = pd.Series(data['y'], name='winner').astype(int)
+        
+        return X, y
+    
+    def save_matrix(self, key, X, y):
+        """Guarda una matriz de features (X, y) bajo `key`"""
+        os.makedirs(self.matrix_root, exist_ok=True)
+        path = self.matrix_path(key)
+        tmp_path = f"{path}.tmp-{os.getpid()}.npz"
+        
+        np.savez(
+            tmp_path,
+            X=X.to_numpy(dtype=np.float32),
+            y=y.to_numpy(dtype=np.int8),
+            feature_names=np.array(X.columns.tolist())
+        )
+        os.replace(tmp_path, path)
+    
+    def load_timeline(self, key):
+        """
+        Matriz de features en orden cronológico, con la fecha de cada fila
+        
+        Returns:
+            Tupla (X float32, y float32, dates datetime64[ns]) o None si no está en caché
+        """
+        path = self.matrix_path(key)
+        if not os.path.exists(path):
+            return None
+        
+        with np.load(path, allow_pickle=False) as data:
+            return data['X'], data['y'], data['dates'].astype('datetime64[ns]')
+    
+    def save_timeline(self, key, X, y, dates):
+        """Guarda una matriz cronológica (arrays numpy) bajo `key`"""
+        os.makedirs(self.matrix_root, exist_ok=True)
+        path = self.matrix_path(key)
+        tmp_path = f"{path}.tmp-{os.getpid()}.npz"
+        
+        np.savez(
+            tmp_path,
+            X=np.asarray(X, dtype=np.float32),
+            y=np.asarray(y, dtype=np.float32),
+            dates=np.asarray(dates, dtype='datetime64[ns]').astype(np.int64)
+        )
+        os.replace(tmp_path, path)
@@ -2,10 +2,23 @@
 """
 Genera datos sintéticos de NBA para entrenar el modelo
 SOLO PARA TESTING - En producción usa datos reales
+
+Todo el generador está vectorizado con numpy y escribe por chunks, así
+que sirve también para datasets de más de un millón de partidos (benchmarks
+de entrenamiento y del pipeline de features):
+    
+    python app/data/generate_sample_data.py --rows 1000000 --format parquet --verify
+
+Cada equipo juega como mucho un partido por fecha; el tamaño máximo lo pone
+el rango de fechas de pandas (ver calendar_for).
 """
+import argparse
+import os
+
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+import pyarrow as pa
+import pyarrow.parquet as pq
 
 # Equipos NBA (30 equipos)
 teams = [
@@ -14,135 +27,364 @@ teams = [
     "OKC", "ORL", "PHI", "PHX", "POR", "SAC", "SA", "TOR", "UTA", "WAS"
 ]
 
-def generate_game_data(num_games=1000):
-    """Genera datos sintéticos de partidos NBA"""
+# Calendario: en cada jornada juegan todos los equipos (15 partidos), una
+# fecha cada 2 días, 82 fechas por temporada, una temporada por año
+GAMES_PER_DAY = len(teams) // 2
+DAYS_PER_SEASON = 82
+DAYS_BETWEEN_GAMES = 2
+SEASON_LENGTH_DAYS = 365
+START_DATE = '2023-10-01'
+
+# Datasets que no caben en el calendario normal antes del límite de los
+# timestamps en ns de pandas: pretemporada corta entre temporadas y, si aún
+# no alcanza, el calendario empieza en la fecha mínima de pandas
+OFFSEASON_DAYS = 14
+COMPACT_SEASON_LENGTH_DAYS = DAYS_PER_SEASON * DAYS_BETWEEN_GAMES + OFFSEASON_DAYS
+MIN_DATE = '1678-01-01'
+MAX_DATE = '2262-04-11'
+
+# Fuerza real de los equipos (escala Elo)
+BASE_RATING = 1500
+RATING_SPREAD = 80          # Dispersión de fuerza entre equipos
+DAILY_DRIFT = 4             # Paseo aleatorio de la fuerza durante la temporada
+SEASON_REVERSION = 0.25     # Regresión a la media entre temporadas
+OFFSEASON_SPREAD = 40       # Cambios de plantilla en el verano
+ELO_NOISE = 25              # Error del Elo observado respecto a la fuerza real
+HOME_ADVANTAGE = 100
+ELO_PER_POINT = 28          # Puntos Elo equivalentes a 1 punto de margen
+
+DEFAULT_CHUNK_SIZE = 500_000
+
+# Orden de columnas del dataset (compatible con el CSV original)
+COLUMNS = [
+    'game_id', 'game_date', 'home_team', 'away_team',
+    'home_pts', 'away_pts', 'home_reb', 'away_reb', 'home_ast', 'away_ast',
+    'home_tov', 'away_tov', 'home_fg_pct', 'away_fg_pct', 'home_elo', 'away_elo',
+    'home_injuries', 'away_injuries',
+    'home_roll5_pts', 'away_roll5_pts', 'home_roll5_reb', 'away_roll5_reb',
+    'home_roll5_ast', 'away_roll5_ast',
+    'point_diff', 'reb_diff', 'ast_diff', 'tov_diff', 'elo_diff', 'injury_diff',
+    'roll5_point_diff', 'roll5_reb_diff', 'roll5_ast_diff',
+    'home_advantage', 'home_win'
+]
+
+
+def calendar_capacity(start_date, season_length):
+    """Partidos que caben desde `start_date` hasta MAX_DATE con temporadas de `season_length` días"""
+    days = int((np.datetime64(MAX_DATE, 'D') - np.datetime64(start_date, 'D')).astype(int))
+    season_span = (DAYS_PER_SEASON - 1) * DAYS_BETWEEN_GAMES
+    seasons = (days - season_span) // season_length + 1
+    return seasons * DAYS_PER_SEASON * GAMES_PER_DAY
+
+
+def calendar_for(num_games):
+    """
+    Fecha inicial y días por temporada para `num_games` partidos
     
-    np.random.seed(42)
-    games = []
+    Usa el calendario normal si alcanza; si no, acorta la pretemporada y
+    luego adelanta el inicio a MIN_DATE. Nunca junta jornadas en una fecha.
     
-    start_date = datetime(2023, 10, 1)
+    Raises:
+        ValueError: si los partidos no caben ni en el calendario más compacto
+    """
+    options = [
+        (START_DATE, SEASON_LENGTH_DAYS),
+        (START_DATE, COMPACT_SEASON_LENGTH_DAYS),
+        (MIN_DATE, COMPACT_SEASON_LENGTH_DAYS)
+    ]
+    for start_date, season_length in options:
+        if num_games <= calendar_capacity(start_date, season_length):
+            return start_date, season_length
     
-    for i in range(num_games):
-        # Seleccionar equipos random
-        home_team = np.random.choice(teams)
-        away_team = np.random.choice([t for t in teams if t != home_team])
+    raise ValueError(
+        f"❌ {num_games:,} partidos no caben entre {MIN_DATE} y {MAX_DATE} con un partido "
+        f"por equipo y fecha (máximo {calendar_capacity(*options[-1]):,})"
+    )
+
+
+class GameGenerator:
+    """
+    Generador de partidos con estado por equipo
+    
+    Cada equipo tiene una fuerza real que hace un paseo aleatorio durante
+    la temporada y regresa parcialmente a la media entre temporadas. Los
+    resultados, las stats y el Elo observado salen de esa fuerza, así que
+    un mismo equipo es consistente a lo largo del dataset.
+    """
+    
+    def __init__(self, seed=42, start_date=START_DATE, season_length=SEASON_LENGTH_DAYS):
+        """
+        Args:
+            seed: Semilla (mismo seed y mismo número de filas = mismo dataset)
+            start_date: Fecha de la primera jornada
+            season_length: Días entre el inicio de una temporada y el de la siguiente
+        """
+        self.rng = np.random.default_rng(seed)
+        self.season_length = season_length
+        self.start_date = np.datetime64(start_date, 'D')
+        self.team_codes = np.array(teams)
+        self.strength = self.rng.normal(BASE_RATING, RATING_SPREAD, len(teams))
+        self.day = 0
+        self.games_generated = 0
+    
+    def chunks(self, num_games, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Genera `num_games` partidos en DataFrames de hasta `chunk_size` filas
+        """
+        days_per_chunk = max(1, chunk_size // GAMES_PER_DAY)
+        remaining = num_games
+        
+        while remaining > 0:
+            days = min(days_per_chunk, -(-remaining // GAMES_PER_DAY))
+            chunk = self._generate_days(days)
+            
+            if len(chunk) > remaining:
+                chunk = chunk.iloc[:remaining]
+            
+            remaining -= len(chunk)
+            yield chunk
+    
+    def _strength_path(self, days):
+        """
+        Fuerza de cada equipo en cada jornada: matriz (días x equipos)
+        
+        El paseo aleatorio se vectoriza con cumsum dentro de cada tramo de
+        temporada; solo se itera sobre los cambios de temporada.
+        """
+        path = np.empty((days, len(teams)))
+        start = 0
+        
+        while start < days:
+            day_in_season = (self.day + start) % DAYS_PER_SEASON
+            
+            if day_in_season == 0 and self.day + start > 0:
+                self.strength = (BASE_RATING
+                                 + (self.strength - BASE_RATING) * (1 - SEASON_REVERSION)
+                                 + self.rng.normal(0, OFFSEASON_SPREAD, len(teams)))
+            
+            end = min(days, start + DAYS_PER_SEASON - day_in_season)
+            steps = self.rng.normal(0, DAILY_DRIFT, (end - start, len(teams)))
+            path[start:end] = self.strength + np.cumsum(steps, axis=0)
+            self.strength = path[end - 1]
+            start = end
         
-        # Stats del equipo local (con ventaja de local)
-        home_pts = np.random.normal(110, 12)
-        home_reb = np.random.normal(45, 5)
-        home_ast = np.random.normal(25, 4)
-        home_tov = np.random.normal(13, 3)
-        home_fg_pct = np.random.normal(0.46, 0.04)
-        home_elo = np.random.normal(1520, 80)  # Ventaja local
+        return path
+    
+    def _generate_days(self, days):
+        rng = self.rng
+        n = days * GAMES_PER_DAY
+        
+        # Calendario: permutación aleatoria de los 30 equipos por jornada,
+        # emparejados de dos en dos (el primero juega de local)
+        pairs = np.argsort(rng.random((days, len(teams))), axis=1).reshape(days, GAMES_PER_DAY, 2)
+        home_idx = pairs[:, :, 0].ravel()
+        away_idx = pairs[:, :, 1].ravel()
+        day_idx = np.repeat(np.arange(days), GAMES_PER_DAY)
+        
+        strength = self._strength_path(days)
+        home_strength = strength[day_idx, home_idx]
+        away_strength = strength[day_idx, away_idx]
+        
+        absolute_day = self.day + day_idx
+        season = absolute_day // DAYS_PER_SEASON
+        day_in_season = absolute_day % DAYS_PER_SEASON
+        offset = season * self.season_length + day_in_season * DAYS_BETWEEN_GAMES
+        game_date = self.start_date + offset.astype('timedelta64[D]')
         
-        # Stats del equipo visitante
-        away_pts = np.random.normal(107, 12)
-        away_reb = np.random.normal(44, 5)
-        away_ast = np.random.normal(24, 4)
-        away_tov = np.random.normal(13, 3)
-        away_fg_pct = np.random.normal(0.45, 0.04)
-        away_elo = np.random.normal(1480, 80)  # Sin ventaja
+        # Puntos esperados según la fuerza relativa (+ ventaja de local)
+        margin = (home_strength + HOME_ADVANTAGE - away_strength) / ELO_PER_POINT
+        home_pts = rng.normal(108.5 + margin / 2, 11, n)
+        away_pts = rng.normal(108.5 - margin / 2, 11, n)
+        
+        # Stats secundarias con una pequeña dependencia de la fuerza
+        home_rel = (home_strength - BASE_RATING) / 100
+        away_rel = (away_strength - BASE_RATING) / 100
+        home_reb = rng.normal(45 + home_rel, 5, n)
+        away_reb = rng.normal(44 + away_rel, 5, n)
+        home_ast = rng.normal(25 + home_rel, 4, n)
+        away_ast = rng.normal(24 + away_rel, 4, n)
+        home_tov = rng.normal(13 - home_rel * 0.5, 3, n)
+        away_tov = rng.normal(13 - away_rel * 0.5, 3, n)
+        home_fg_pct = rng.normal(0.46 + home_rel * 0.01, 0.04, n)
+        away_fg_pct = rng.normal(0.45 + away_rel * 0.01, 0.04, n)
+        
+        # Elo observado: fuerza real + ruido de estimación
+        home_elo = home_strength + rng.normal(0, ELO_NOISE, n)
+        away_elo = away_strength + rng.normal(0, ELO_NOISE, n)
         
         # Lesiones (random 0-3 por equipo)
-        home_injuries = np.random.randint(0, 4)
-        away_injuries = np.random.randint(0, 4)
+        home_injuries = rng.integers(0, 4, n, dtype=np.int8)
+        away_injuries = rng.integers(0, 4, n, dtype=np.int8)
+        
+        # Rolling stats (últimos 5 juegos): media esperada del equipo + ruido de 5 partidos
+        home_expected = 108.5 + (home_strength - BASE_RATING) / ELO_PER_POINT / 2
+        away_expected = 108.5 + (away_strength - BASE_RATING) / ELO_PER_POINT / 2
+        home_roll5_pts = rng.normal(home_expected, 11 / np.sqrt(5), n)
+        away_roll5_pts = rng.normal(away_expected, 11 / np.sqrt(5), n)
+        home_roll5_reb = rng.normal(45 + home_rel, 5 / np.sqrt(5), n)
+        away_roll5_reb = rng.normal(44 + away_rel, 5 / np.sqrt(5), n)
+        home_roll5_ast = rng.normal(25 + home_rel, 4 / np.sqrt(5), n)
+        away_roll5_ast = rng.normal(24 + away_rel, 4 / np.sqrt(5), n)
         
-        # Rolling stats (últimos 5 juegos)
-        home_roll5_pts = np.random.normal(110, 8)
-        home_roll5_reb = np.random.normal(45, 3)
-        home_roll5_ast = np.random.normal(25, 3)
+        # Determinar ganador (home_win: 1 si ganó local, 0 si ganó visitante)
+        # Basado en point_diff + algo de randomness
+        point_diff = home_pts - away_pts
+        prob_home_win = 1 / (1 + np.exp(-0.1 * (point_diff + rng.normal(0, 3, n))))
+        home_win = (rng.random(n) < prob_home_win).astype(np.int8)
+        
+        columns = {
+            # IDs con ceros a la izquierda, como los de NBA Stats (orden de texto = cronológico)
+            'game_id': np.char.zfill((self.games_generated + np.arange(n)).astype(str), 10),
+            'game_date': game_date,
+            'home_team': self.team_codes[home_idx],
+            'away_team': self.team_codes[away_idx],
+            'home_pts': home_pts, 'away_pts': away_pts,
+            'home_reb': home_reb, 'away_reb': away_reb,
+            'home_ast': home_ast, 'away_ast': away_ast,
+            'home_tov': home_tov, 'away_tov': away_tov,
+            'home_fg_pct': home_fg_pct, 'away_fg_pct': away_fg_pct,
+            'home_elo': home_elo, 'away_elo': away_elo,
+            'home_injuries': home_injuries, 'away_injuries': away_injuries,
+            'home_roll5_pts': home_roll5_pts, 'away_roll5_pts': away_roll5_pts,
+            'home_roll5_reb': home_roll5_reb, 'away_roll5_reb': away_roll5_reb,
+            'home_roll5_ast': home_roll5_ast, 'away_roll5_ast': away_roll5_ast,
+        }
         
-        away_roll5_pts = np.random.normal(107, 8)
-        away_roll5_reb = np.random.normal(44, 3)
-        away_roll5_ast = np.random.normal(24, 3)
+        # Redondeo como en el CSV original (stats a 1 decimal, % a 3)
+        for name, values in columns.items():
+            if values.dtype == np.float64:
+                columns[name] = np.round(values, 3 if name.endswith('fg_pct') else 1)
         
         # Calcular diferencias (features principales)
-        point_diff = home_pts - away_pts
-        reb_diff = home_reb - away_reb
-        ast_diff = home_ast - away_ast
-        tov_diff = home_tov - away_tov
-        elo_diff = home_elo - away_elo
-        injury_diff = away_injuries - home_injuries
-        roll5_point_diff = home_roll5_pts - away_roll5_pts
-        roll5_reb_diff = home_roll5_reb - away_roll5_reb
-        roll5_ast_diff = home_roll5_ast - away_roll5_ast
+        columns['point_diff'] = np.round(columns['home_pts'] - columns['away_pts'], 1)
+        columns['reb_diff'] = np.round(columns['home_reb'] - columns['away_reb'], 1)
+        columns['ast_diff'] = np.round(columns['home_ast'] - columns['away_ast'], 1)
+        columns['tov_diff'] = np.round(columns['home_tov'] - columns['away_tov'], 1)
+        columns['elo_diff'] = np.round(columns['home_elo'] - columns['away_elo'], 1)
+        columns['injury_diff'] = (away_injuries - home_injuries).astype(np.int8)
+        columns['roll5_point_diff'] = np.round(columns['home_roll5_pts'] - columns['away_roll5_pts'], 1)
+        columns['roll5_reb_diff'] = np.round(columns['home_roll5_reb'] - columns['away_roll5_reb'], 1)
+        columns['roll5_ast_diff'] = np.round(columns['home_roll5_ast'] - columns['away_roll5_ast'], 1)
         
         # Ventaja de local (1 = local, 0 = visitante)
-        home_advantage = 1
+        columns['home_advantage'] = np.ones(n, dtype=np.int8)
+        columns['home_win'] = home_win
         
-        # Determinar ganador (home_win: 1 si ganó local, 0 si ganó visitante)
-        # Basado en point_diff + algo de randomness
-        prob_home_win = 1 / (1 + np.exp(-0.1 * (point_diff + np.random.normal(0, 3))))
-        home_win = 1 if np.random.random() < prob_home_win else 0
-        
-        # Fecha del partido
-        game_date = start_date + timedelta(days=i % 180)
-        
-        games.append({
-            'game_date': game_date.strftime('%Y-%m-%d'),
-            'home_team': home_team,
-            'away_team': away_team,
-            'home_pts': round(home_pts, 1),
-            'away_pts': round(away_pts, 1),
-            'home_reb': round(home_reb, 1),
-            'away_reb': round(away_reb, 1),
-            'home_ast': round(home_ast, 1),
-            'away_ast': round(away_ast, 1),
-            'home_tov': round(home_tov, 1),
-            'away_tov': round(away_tov, 1),
-            'home_fg_pct': round(home_fg_pct, 3),
-            'away_fg_pct': round(away_fg_pct, 3),
-            'home_elo': round(home_elo, 1),
-            'away_elo': round(away_elo, 1),
-            'home_injuries': home_injuries,
-            'away_injuries': away_injuries,
-            'home_roll5_pts': round(home_roll5_pts, 1),
-            'away_roll5_pts': round(away_roll5_pts, 1),
-            'home_roll5_reb': round(home_roll5_reb, 1),
-            'away_roll5_reb': round(away_roll5_reb, 1),
-            'home_roll5_ast': round(home_roll5_ast, 1),
-            'away_roll5_ast': round(away_roll5_ast, 1),
-            # Features calculados
-            'point_diff': round(point_diff, 1),
-            'reb_diff': round(reb_diff, 1),
-            'ast_diff': round(ast_diff, 1),
-            'tov_diff': round(tov_diff, 1),
-            'elo_diff': round(elo_diff, 1),
-            'injury_diff': injury_diff,
-            'roll5_point_diff': round(roll5_point_diff, 1),
-            'roll5_reb_diff': round(roll5_reb_diff, 1),
-            'roll5_ast_diff': round(roll5_ast_diff, 1),
-            'home_advantage': home_advantage,
-            # Target
-            'home_win': home_win
-        })
-    
-    return pd.DataFrame(games)
+        self.day += days
+        self.games_generated += n
+        
+        return pd.DataFrame(columns, columns=COLUMNS)
+
+
+def generate_game_data(num_games=1000, seed=42):
+    """Genera datos sintéticos de partidos NBA (en memoria)"""
+    start_date, season_length = calendar_for(num_games)
+    generator = GameGenerator(seed=seed, start_date=start_date, season_length=season_length)
+    chunks = list(generator.chunks(num_games))
+    
+    if len(chunks) == 1:
+        return chunks[0]
+    
+    return pd.concat(chunks, ignore_index=True)
+
+
+def write_game_data(output_path, num_games, seed=42, chunk_size=DEFAULT_CHUNK_SIZE, file_format=None):
+    """
+    Genera y escribe partidos por chunks, sin tener el dataset completo en memoria
+    
+    Args:
+        output_path: Archivo de salida (.csv o .parquet)
+        num_games: Número de partidos
+        seed: Semilla
+        chunk_size: Filas por chunk
+        file_format: 'csv' o 'parquet' (default: según la extensión)
+    
+    Returns:
+        Dict con número de partidos y victorias locales
+    
+    Raises:
+        ValueError: si `num_games` no cabe en el rango de fechas (ver calendar_for)
+    """
+    start_date, season_length = calendar_for(num_games)
+    file_format = file_format or ('parquet' if output_path.endswith('.parquet') else 'csv')
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    
+    tmp_path = f"{output_path}.tmp"
+    writer = None
+    total = 0
+    home_wins = 0
+    
+    try:
+        generator = GameGenerator(seed=seed, start_date=start_date, season_length=season_length)
+        for i, chunk in enumerate(generator.chunks(num_games, chunk_size)):
+            if file_format == 'parquet':
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp_path, table.schema)
+                writer.write_table(table)
+            else:
+                chunk.to_csv(tmp_path, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+            
+            total += len(chunk)
+            home_wins += int(chunk['home_win'].sum())
+            print(f"   ... {total:,} / {num_games:,} partidos")
+    finally:
+        if writer is not None:
+            writer.close()
+    
+    os.replace(tmp_path, output_path)
+    
+    return {'games': total, 'home_wins': home_wins}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Genera datos sintéticos de partidos NBA")
+    parser.add_argument("--rows", type=int, default=2000, help="Número de partidos")
+    parser.add_argument("--seed", type=int, default=42, help="Semilla aleatoria")
+    parser.add_argument("--output", default="data/nba_games_clean.csv",
+                        help="Archivo de salida (.csv o .parquet)")
+    parser.add_argument("--format", choices=["csv", "parquet"], default=None,
+                        help="Formato de salida (default: según la extensión)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Filas generadas y escritas por chunk")
+    parser.add_argument("--verify", action="store_true",
+                        help="Releer el archivo con el loader compartido (fechas, tipos y filas)")
+    return parser.parse_args(argv)
+
 
 if __name__ == "__main__":
+    args = parse_args()
+    
     print("🏀 Generando datos sintéticos de NBA...")
     print("=" * 50)
     
-    # Generar 2000 partidos sintéticos
-    df = generate_game_data(num_games=2000)
-    
-    # Crear carpeta data si no existe
-    import os
-    os.makedirs("data", exist_ok=True)
+    try:
+        summary = write_game_data(
+            args.output, args.rows, seed=args.seed,
+            chunk_size=args.chunk_size, file_format=args.format
+        )
+    except ValueError as e:
+        raise SystemExit(str(e))
     
-    # Guardar CSV
-    output_path = "data/nba_games_clean.csv"
-    df.to_csv(output_path, index=False)
+    total = summary['games']
+    home_wins = summary['home_wins']
     
     print(f"\n✅ Datos generados exitosamente")
-    print(f"📊 Total de partidos: {len(df)}")
-    print(f"📂 Archivo: {output_path}")
-    print(f"🏆 Victorias locales: {df['home_win'].sum()} ({df['home_win'].mean()*100:.1f}%)")
-    print(f"✈️  Victorias visitantes: {(1-df['home_win']).sum()} ({(1-df['home_win']).mean()*100:.1f}%)")
+    print(f"📊 Total de partidos: {total:,}")
+    print(f"📂 Archivo: {args.output}")
+    print(f"🏆 Victorias locales: {home_wins:,} ({home_wins / max(total, 1) * 100:.1f}%)")
+    print(f"✈️  Victorias visitantes: {total - home_wins:,} ({(total - home_wins) / max(total, 1) * 100:.1f}%)")
+    
+    if args.verify:
+        from loader import read_games
+        
+        df = read_games(args.output, columns=['game_date'])
+        if len(df) != total:
+            raise SystemExit(f"❌ Verificación fallida: {len(df):,} filas leídas de {total:,}")
+        print(f"🔎 Verificado con read_games: {df['game_date'].min().date()} → {df['game_date'].max().date()}")
+    
     print("\n📋 Columnas del dataset:")
-    print(df.columns.tolist())
-    print("\n👀 Primeras 3 filas:")
-    print(df.head(3))
+    print(COLUMNS)
     print("\n" + "=" * 50)
     print("🎯 Ahora ejecuta: python main.py")
-    print("📡 Luego entrena el modelo: POST http://localhost:8000/train")
\ No newline at end of file
+    print("📡 Luego entrena el modelo: POST http://localhost:8000/train")
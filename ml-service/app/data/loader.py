@@ -0,0 +1,182 @@
+# ml-service/app/data/loader.py
+"""
+Lectura tipada de datasets de partidos (CSV o Parquet)
+
+Único camino de lectura para entrenamiento, feature store y scripts:
+esquema explícito (float32 para stats, int8 para conteos/flags, category
+para equipos, fechas parseadas), proyección de columnas y lectura por
+chunks para archivos más grandes que la memoria.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+# Columnas con códigos de equipo: se guardan como category
+TEAM_COLUMNS = ['home_team', 'away_team']
+
+# Columnas enteras pequeñas (conteos y flags)
+INT8_COLUMNS = [
+    'home_injuries', 'away_injuries', 'injury_diff',
+    'home_advantage', 'home_win'
+]
+
+# Posibles columnas de fecha, en orden de preferencia
+DATE_COLUMNS = ['game_date', 'date']
+
+# Identificadores de texto (conservan los ceros iniciales de NBA Stats)
+STRING_COLUMNS = ['game_id', 'matchup', 'season', 'season_type']
+
+# Filas por chunk en lecturas por streaming
+DEFAULT_CHUNK_ROWS = 250_000
+
+
+def is_parquet(path):
+    return path.endswith('.parquet') or path.endswith('.pq')
+
+
+def read_columns(path):
+    """Nombres de columna del archivo sin leer los datos"""
+    if is_parquet(path):
+        return pq.read_schema(path).names
+    return pd.read_csv(path, nrows=0).columns.tolist()
+
+
+def project(available, columns):
+    """Columnas pedidas que existen, en el orden del archivo (None = todas)"""
+    if columns is None:
+        return list(available)
+    wanted = set(columns)
+    return [c for c in available if c in wanted]
+
+
+def is_stat_column(column):
+    """Stats numéricas del esquema: home_*/away_*, *_diff y conteos/flags"""
+    if column in TEAM_COLUMNS or column in STRING_COLUMNS or column in DATE_COLUMNS:
+        return False
+    return column.startswith(('home_', 'away_')) or column.endswith('_diff') or column in INT8_COLUMNS
+
+
+def csv_dtypes(columns, float_dtype=np.float32):
+    """
+    dtypes para read_csv: las columnas se parsean directamente al tipo final
+    
+    Los enteros pequeños se leen como float y se reducen en apply_schema,
+    porque un NaN en el CSV haría fallar un int8 directo. Las columnas
+    fuera del esquema se dejan a la inferencia de pandas.
+    """
+    dtypes = {}
+    for column in columns:
+        if column in TEAM_COLUMNS:
+            dtypes[column] = 'category'
+        elif column in STRING_COLUMNS:
+            dtypes[column] = str
+        elif is_stat_column(column):
+            dtypes[column] = float_dtype
+    return dtypes
+
+
+def apply_schema(df, float_dtype=np.float32):
+    """
+    Aplica el esquema compacto a un DataFrame ya leído (in place)
+    
+    Args:
+        df: DataFrame de partidos
+        float_dtype: dtype de las stats (float32 por defecto)
+    
+    Returns:
+        El mismo DataFrame tipado
+    """
+    for column in df.columns:
+        values = df[column]
+        
+        if column in TEAM_COLUMNS:
+            if not isinstance(values.dtype, pd.CategoricalDtype):
+                df[column] = values.astype('category')
+        elif column in DATE_COLUMNS:
+            if not pd.api.types.is_datetime64_any_dtype(values):
+                df[column] = pd.to_datetime(values)
+        elif column in STRING_COLUMNS:
+            continue
+        elif column in INT8_COLUMNS and pd.api.types.is_numeric_dtype(values) and not values.isna().any():
+            df[column] = values.astype(np.int8)
+        elif pd.api.types.is_numeric_dtype(values) and values.dtype != float_dtype:
+            df[column] = values.astype(float_dtype)
+    
+    return df
+
+
+def iter_games(path, columns=None, chunk_rows=DEFAULT_CHUNK_ROWS, float_dtype=np.float32):
+    """
+    Lee un dataset de partidos por chunks tipados (memoria acotada)
+    
+    Args:
+        path: CSV o Parquet
+        columns: Leer solo estas columnas (se ignoran las que no existan)
+        chunk_rows: Filas por chunk
+        float_dtype: dtype de las stats
+    
+    Yields:
+        DataFrames tipados de hasta `chunk_rows` filas
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"❌ Dataset no encontrado: {path}")
+    
+    usecols = project(read_columns(path), columns)
+    
+    if is_parquet(path):
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows, columns=usecols):
+            yield apply_schema(batch.to_pandas(), float_dtype)
+        return
+    
+    reader = pd.read_csv(
+        path,
+        usecols=usecols,
+        dtype=csv_dtypes(usecols, float_dtype),
+        parse_dates=[c for c in DATE_COLUMNS if c in usecols],
+        chunksize=chunk_rows
+    )
+    with reader:
+        for chunk in reader:
+            yield apply_schema(chunk, float_dtype)
+
+
+def read_games(path, columns=None, chunk_rows=None, float_dtype=np.float32):
+    """
+    Lee un dataset de partidos completo con el esquema compacto
+    
+    Args:
+        path: CSV o Parquet
+        columns: Leer solo estas columnas (se ignoran las que no existan)
+        chunk_rows: Si se indica, parsea por chunks para limitar el pico de memoria
+        float_dtype: dtype de las stats (float64 si el resultado se vuelve a escribir a CSV)
+    
+    Returns:
+        DataFrame tipado
+    """
+    if chunk_rows is not None:
+        chunks = list(iter_games(path, columns, chunk_rows, float_dtype))
+        if not chunks:
+            return pd.DataFrame(columns=project(read_columns(path), columns))
+        
+        df = pd.concat(chunks, ignore_index=True)
+        # Cada chunk trae sus propias categorías: unificarlas
+        return apply_schema(df, float_dtype)
+    
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"❌ Dataset no encontrado: {path}")
+    
+    usecols = project(read_columns(path), columns)
+    
+    if is_parquet(path):
+        return apply_schema(pd.read_parquet(path, columns=usecols), float_dtype)
+    
+    df = pd.read_csv(
+        path,
+        usecols=usecols,
+        dtype=csv_dtypes(usecols, float_dtype),
+        parse_dates=[c for c in DATE_COLUMNS if c in usecols]
+    )
+    
+    return apply_schema(df, float_dtype)
@@ -0,0 +1,242 @@
+# ml-service/app/data/nba_stats_client.py
+"""
+Cliente de la API de NBA Stats con pool de conexiones, concurrencia
+limitada, rate limiting (token bucket), reintentos con backoff y caché de
+respuestas en disco direccionada por contenido.
+
+La caché permite reanudar backfills interrumpidos sin volver a descargar
+lo ya obtenido y reproducir todo offline (offline=True) desde fixtures.
+"""
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# API oficial de NBA Stats (NO REQUIERE API KEY)
+NBA_STATS_BASE = "https://stats.nba.com/stats"
+
+# Headers para simular navegador (requerido por NBA.com)
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept': 'application/json',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Referer': 'https://www.nba.com/',
+    'Origin': 'https://www.nba.com',
+    'Connection': 'keep-alive',
+}
+
+HTTP_CACHE_DIR = os.path.join("data", "cache", "http")
+
+# Códigos que vale la pena reintentar
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class OfflineCacheMiss(Exception):
+    """La respuesta no está en caché y el cliente está en modo offline"""
+
+
+class TokenBucket:
+    """
+    Rate limiter thread-safe: `rate` requests por segundo con ráfagas de hasta `capacity`
+    """
+    
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """Bloquea hasta que haya un token disponible y lo consume"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                
+                wait = (1 - self._tokens) / self.rate
+            
+            time.sleep(wait)
+
+
+class ResponseCache:
+    """
+    Caché en disco de respuestas JSON, con clave = hash de (url, params)
+    
+    Estructura: <root>/<2 primeros chars>/<sha256>.json
+    """
+    
+    def __init__(self, root=HTTP_CACHE_DIR):
+        self.root = root
+    
+    @staticmethod
+    def key(url, params):
+        payload = json.dumps([url, sorted((params or {}).items())], default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+    
+    def path(self, key):
+        return os.path.join(self.root, key[:2], f"{key}.json")
+    
+    def get(self, key, max_age=None):
+        """Respuesta cacheada, o None si no existe o es más vieja que max_age (s)"""
+        path = self.path(key)
+        if not os.path.exists(path):
+            return None
+        
+        with open(path) as f:
+            entry = json.load(f)
+        
+        if max_age is not None and time.time() - entry['fetched_at'] > max_age:
+            return None
+        
+        return entry['data']
+    
+    def put(self, key, url, params, data):
+        """Guarda una respuesta (escritura atómica)"""
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        
+        tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        with open(tmp_path, 'w') as f:
+            json.dump({'url': url, 'params': params, 'fetched_at': time.time(), 'data': data}, f)
+        os.replace(tmp_path, path)
+
+
+class NBAStatsClient:
+    """
+    Cliente HTTP para stats.nba.com pensado para backfills de varias temporadas
+    """
+    
+    def __init__(self, cache_dir=HTTP_CACHE_DIR, concurrency=4, rate=2.0, burst=4,
+                 max_retries=4, backoff=1.0, timeout=30, cache_ttl=None, offline=False):
+        """
+        Args:
+            cache_dir: Directorio de la caché de respuestas
+            concurrency: Requests simultáneos como máximo (y tamaño del pool)
+            rate: Requests por segundo permitidos (token bucket)
+            burst: Ráfaga máxima del token bucket
+            max_retries: Reintentos ante errores de red o códigos 429/5xx
+            backoff: Segundos base del backoff exponencial
+            timeout: Timeout por request (s)
+            cache_ttl: Antigüedad máxima (s) de una respuesta cacheada; None = sin límite
+            offline: Solo responder desde caché (sin red)
+        """
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+        self.offline = offline
+        
+        self.cache = ResponseCache(cache_dir)
+        self.bucket = TokenBucket(rate, burst)
+        
+        # Sesión con pool keep-alive compartido por todos los hilos
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
+        adapter = HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
+        self.stats = {'cache_hits': 0, 'requests': 0, 'retries': 0}
+        self._stats_lock = threading.Lock()
+    
+    def get_json(self, endpoint, params, max_age=None):
+        """
+        GET a un endpoint de NBA Stats, con caché, rate limit y reintentos
+        
+        Args:
+            endpoint: Nombre del endpoint (ej: 'leaguegamelog')
+            params: Dict de query params
+            max_age: Antigüedad máxima (s) aceptada en caché para esta llamada
+                     (default: cache_ttl; 0 = siempre ir a la red)
+        
+        Returns:
+            JSON de la respuesta
+        """
+        url = f"{NBA_STATS_BASE}/{endpoint}"
+        key = self.cache.key(url, params)
+        
+        if max_age is None:
+            max_age = self.cache_ttl
+        
+        cached = self.cache.get(key, max_age=None if self.offline else max_age)
+        if cached is not None:
+            self._count('cache_hits')
+            return cached
+        
+        if self.offline:
+            raise OfflineCacheMiss(f"Sin respuesta en caché para {endpoint} {params}")
+        
+        last_error = None
+        
+        for attempt in range(self.max_retries + 1):
+            if attempt > 0:
+                self._count('retries')
+                time.sleep(self._retry_delay(attempt, last_error))
+            
+            self.bucket.acquire()
+            self._count('requests')
+            
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                last_error = e
+                continue
+            
+            if response.status_code == 200:
+                data = response.json()
+                self.cache.put(key, url, params, data)
+                return data
+            
+            last_error = requests.HTTPError(
+                f"{response.status_code} en {endpoint}: {response.text[:200]}",
+                response=response
+            )
+            if response.status_code not in RETRY_STATUSES:
+                raise last_error
+        
+        raise last_error
+    
+    def fetch_many(self, calls):
+        """
+        Ejecuta varios get_json en paralelo (hasta `concurrency` a la vez)
+        
+        Args:
+            calls: Lista de tuplas (endpoint, params) o (endpoint, params, max_age)
+        
+        Returns:
+            Lista en el mismo orden con el JSON o la excepción de cada llamada
+        """
+        def run(call):
+            try:
+                return self.get_json(*call)
+            except Exception as e:
+                return e
+        
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            return list(pool.map(run, calls))
+    
+    def _retry_delay(self, attempt, error):
+        """Backoff exponencial con jitter; respeta Retry-After si viene"""
+        response = getattr(error, 'response', None)
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        
+        return self.backoff * (2 ** (attempt - 1)) * (1 + random.random() * 0.25)
+    
+    def _count(self, name):
+        with self._stats_lock:
+            self.stats[name] += 1
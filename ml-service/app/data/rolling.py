@@ -0,0 +1,124 @@
+# ml-service/app/data/rolling.py
+"""
+Motor de promedios móviles (roll-N) por equipo, sin fuga de información
+
+Cada partido aporta dos filas a una línea de tiempo por equipo (local y
+visitante), así la forma reciente de un equipo mezcla sus partidos de
+local y de visitante. Las medias usan solo partidos anteriores al actual y
+se calculan con sumas acumuladas: O(n) por ventana, para todas las stats a
+la vez y sin lambdas de Python.
+"""
+import numpy as np
+import pandas as pd
+
+DEFAULT_STATS = ['pts', 'reb', 'ast', 'tov', 'fg_pct']
+DEFAULT_WINDOWS = (5,)
+
+
+def build_team_timeline(games, stats=DEFAULT_STATS, date_column='game_date'):
+    """
+    Convierte partidos (una fila por juego) en filas equipo-partido
+    
+    Args:
+        games: DataFrame con home_team, away_team, fecha y columnas home_<stat>/away_<stat>
+        stats: Stats a incluir
+        date_column: Columna de fecha del partido
+    
+    Returns:
+        DataFrame ordenado por equipo y fecha con columnas
+        game_pos (posición en `games`), side (0 local, 1 visitante), team, date y stats
+    """
+    n = len(games)
+    
+    # Orden cronológico estable; game_id desempata partidos del mismo día
+    sort_columns = [date_column] + (['game_id'] if 'game_id' in games.columns else [])
+    order = (games[sort_columns].reset_index(drop=True)
+             .sort_values(sort_columns, kind='mergesort').index.to_numpy())
+    chrono = np.empty(n, dtype=np.int64)
+    chrono[order] = np.arange(n)
+    
+    sides = []
+    for side, prefix in enumerate(('home', 'away')):
+        sides.append(pd.DataFrame({
+            'game_pos': np.arange(n),
+            'chrono': chrono,
+            'side': np.int8(side),
+            'team': games[f'{prefix}_team'].astype(str).to_numpy(),
+            **{stat: games[f'{prefix}_{stat}'].to_numpy(dtype=np.float64) for stat in stats}
+        }))
+    
+    timeline = pd.concat(sides, ignore_index=True)
+    timeline = timeline.sort_values(['team', 'chrono'], kind='mergesort', ignore_index=True)
+    
+    return timeline
+
+
+def rolling_means(timeline, stats, window):
+    """
+    Media de los `window` partidos previos de cada equipo (excluye el actual)
+    
+    Args:
+        timeline: Salida de build_team_timeline (ordenada por equipo y fecha)
+        stats: Columnas a promediar
+        window: Tamaño de la ventana
+    
+    Returns:
+        Array (filas x stats) con las medias; NaN si el equipo no tiene partidos previos
+    """
+    values = timeline[stats].to_numpy(dtype=np.float64)
+    valid = ~np.isnan(values)
+    
+    # Sumas y conteos acumulados con una fila inicial de ceros:
+    # sum(values[a:b]) = sums[b] - sums[a]
+    sums = np.zeros((len(values) + 1, len(stats)))
+    counts = np.zeros((len(values) + 1, len(stats)))
+    np.cumsum(np.where(valid, values, 0.0), axis=0, out=sums[1:])
+    np.cumsum(valid, axis=0, out=counts[1:])
+    
+    # Inicio del bloque de cada equipo en la línea de tiempo
+    team = timeline['team'].to_numpy()
+    is_block_start = np.r_[True, team[1:] != team[:-1]]
+    block_start = np.maximum.accumulate(np.where(is_block_start, np.arange(len(team)), 0))
+    
+    end = np.arange(len(team))
+    start = np.maximum(block_start, end - window)
+    
+    window_sums = sums[end] - sums[start]
+    window_counts = counts[end] - counts[start]
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(window_counts > 0, window_sums / window_counts, np.nan)
+
+
+def compute_rolling_features(games, windows=DEFAULT_WINDOWS, stats=DEFAULT_STATS,
+                             date_column='game_date'):
+    """
+    Calcula home/away roll-N para todas las stats y ventanas pedidas
+    
+    Args:
+        games: DataFrame con una fila por partido
+        windows: Tamaños de ventana (ej: (5, 10, 20))
+        stats: Stats a promediar (deben existir home_<stat> y away_<stat>)
+        date_column: Columna de fecha del partido
+    
+    Returns:
+        DataFrame con el mismo índice que `games` y columnas
+        home_roll<N>_<stat> / away_roll<N>_<stat> en float32
+    """
+    timeline = build_team_timeline(games, stats=stats, date_column=date_column)
+    game_pos = timeline['game_pos'].to_numpy()
+    side = timeline['side'].to_numpy()
+    
+    columns = {}
+    for window in windows:
+        means = rolling_means(timeline, stats, window)
+        
+        for side_id, prefix in enumerate(('home', 'away')):
+            rows = side == side_id
+            out = np.empty((len(games), len(stats)), dtype=np.float32)
+            out[game_pos[rows]] = means[rows]
+            
+            for j, stat in enumerate(stats):
+                columns[f'{prefix}_roll{window}_{stat}'] = out[:, j]
+    
+    return pd.DataFrame(columns, index=games.index)
@@ -1,12 +1,16 @@
 # ml-service/main.py
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 import uvicorn
 import os
-from typing import Optional
-from model.predictor import Predictor
-from model.trainer import Trainer
+from typing import Optional, List
+from model.jobs import TrainingJobRunner, DEFAULT_TRAIN_NTHREAD, TRAIN_MODES, TUNE_MODE
+from model.tuner import SEARCH_STRATEGIES, DEFAULT_TRIALS, DEFAULT_FOLDS, DEFAULT_WORKERS
+from model.simulator import SeasonSimulator, DEFAULT_SEASONS, create_pool
+from model.batcher import MicroBatcher
+from model.registry import ModelRegistry
+from model.manager import ModelManager
 
 app = FastAPI(
     title="NBA ML Prediction Service",
@@ -23,9 +27,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Global predictor instance
-predictor = None
-MODEL_PATH = os.path.join("models", "nba_xgb_model.pkl")
+# Registro de versiones y gestor del predictor activo (hot swap atómico)
+registry = ModelRegistry()
+manager = ModelManager(registry=registry)
+
+MAX_BATCH_SIZE = int(os.getenv("ML_MAX_BATCH_SIZE", 500))
+TRAIN_NTHREAD = int(os.getenv("ML_TRAIN_NTHREAD", DEFAULT_TRAIN_NTHREAD))
+
+# Entrenamientos en un proceso aparte; al terminar se activa el modelo nuevo
+training_jobs = TrainingJobRunner(
+    on_success=lambda metadata: manager.load(metadata['version']),
+    n_jobs=TRAIN_NTHREAD
+)
+
+# Micro-batching opcional de /predict (desactivado por defecto)
+MICROBATCH_ENABLED = os.getenv("ML_MICROBATCH_ENABLED", "false").lower() in ("1", "true", "yes")
+MICROBATCH_MAX_SIZE = int(os.getenv("ML_MICROBATCH_MAX_SIZE", 32))
+MICROBATCH_MAX_WAIT_MS = float(os.getenv("ML_MICROBATCH_MAX_WAIT_MS", 2))
+batcher = None
+
+# Simulación Monte Carlo de temporadas
+MAX_SIMULATED_SEASONS = int(os.getenv("ML_MAX_SIMULATED_SEASONS", 1_000_000))
+SIMULATION_WORKERS = int(os.getenv("ML_SIMULATION_WORKERS", DEFAULT_WORKERS))
+simulation_pool = None
 
 # ==================== MODELS ====================
 
@@ -48,38 +72,107 @@ class PredictRequest(BaseModel):
     metadata: Optional[dict] = {}
 
 class PredictResponse(BaseModel):
+    # model_version choca con el namespace protegido 'model_' de pydantic
+    model_config = ConfigDict(protected_namespaces=())
+    
     predicted_winner: str
     home_win_probability: float
     away_win_probability: float
     confidence: float
+    model_version: Optional[str] = None
+
+class BatchPredictRequest(BaseModel):
+    games: List[dict]
+
+class BatchPredictItem(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+    
+    index: int
+    predicted_winner: Optional[str] = None
+    home_win_probability: Optional[float] = None
+    away_win_probability: Optional[float] = None
+    confidence: Optional[float] = None
+    model_version: Optional[str] = None
+    error: Optional[str] = None
+
+class BatchPredictResponse(BaseModel):
+    total: int
+    succeeded: int
+    failed: int
+    predictions: List[BatchPredictItem]
 
 class TrainRequest(BaseModel):
     data_path: str = "data/nba_games_clean.csv"
     test_size: float = 0.2
+    force: bool = False
+    mode: str = "full"
+
+class TuneRequest(BaseModel):
+    data_path: str = "data/nba_games_clean.csv"
+    test_size: Optional[float] = None
+    force: bool = False
+    strategy: str = "random"
+    n_trials: int = DEFAULT_TRIALS
+    n_folds: int = DEFAULT_FOLDS
+    workers: int = DEFAULT_WORKERS
+
+class ScheduledGame(BaseModel):
+    home: str
+    away: str
+
+class SimulateSeasonRequest(BaseModel):
+    teams: List[TeamFeatures]
+    schedule: List[ScheduledGame]
+    records: Optional[dict] = {}
+    n_seasons: int = DEFAULT_SEASONS
+    seed: Optional[int] = None
+    conferences: Optional[dict] = None
 
 # ==================== STARTUP ====================
 
 @app.on_event("startup")
 def startup_event():
     """Cargar modelo al iniciar el servidor"""
-    global predictor
+    global batcher, simulation_pool
     
     print("\n" + "="*50)
     print(" Iniciando NBA ML Prediction Service...")
     print("="*50 + "\n")
     
-    if os.path.exists(MODEL_PATH):
-        try:
-            predictor = Predictor()
-            print(" Predictor XGBoost cargado correctamente")
-            print(f" Modelo: {MODEL_PATH}\n")
-        except Exception as e:
-            print(f"  Error cargando predictor: {e}")
-            print(" Entrena un modelo primero con POST /train\n")
-    else:
+    try:
+        predictor = manager.load()
+        print(" Predictor XGBoost cargado correctamente")
+        print(f" Modelo: {predictor.model_path} (versión {predictor.version})\n")
+    except FileNotFoundError:
         print("  Modelo no encontrado")
-        print(f" Esperado en: {MODEL_PATH}")
+        print(f" Esperado en: {registry.root}/<version>/")
         print(" Entrena un modelo primero con POST /train\n")
+    except Exception as e:
+        print(f"  Error cargando predictor: {e}")
+        print(" Entrena un modelo primero con POST /train\n")
+    
+    training_jobs.start()
+    
+    # Un solo pool para todas las simulaciones (spawn por request es más lento que simular)
+    simulation_pool = create_pool(SIMULATION_WORKERS)
+    
+    if MICROBATCH_ENABLED:
+        batcher = MicroBatcher(
+            max_batch_size=MICROBATCH_MAX_SIZE,
+            max_wait_ms=MICROBATCH_MAX_WAIT_MS
+        )
+        batcher.start()
+
+@app.on_event("shutdown")
+def shutdown_event():
+    """Vaciar la cola de micro-batching, detener entrenamientos y el pool de simulación"""
+    if batcher is not None:
+        batcher.stop()
+    
+    training_jobs.stop()
+    
+    if simulation_pool is not None:
+        simulation_pool.shutdown(cancel_futures=True)
 
 # ==================== ENDPOINTS ====================
 
@@ -90,22 +183,34 @@ def root():
         "service": "NBA ML Prediction Service",
         "version": "1.0.0",
         "status": "running",
-        "model_loaded": predictor is not None,
+        "model_loaded": manager.predictor is not None,
         "endpoints": {
             "health": "/health",
             "predict": "POST /predict",
-            "train": "POST /train"
+            "predict_batch": "POST /predict/batch",
+            "batching_metrics": "/metrics/batching",
+            "train": "POST /train",
+            "train_status": "/train/{job_id}",
+            "tune": "POST /tune",
+            "simulate_season": "POST /simulate/season",
+            "model_versions": "/model/versions",
+            "model_activate": "POST /model/activate/{version}",
+            "model_rollback": "POST /model/rollback"
         }
     }
 
 @app.get("/health")
 def health():
     """Health check endpoint"""
+    predictor = manager.predictor
+    current_version = registry.get_current_version()
+    
     return {
         "status": "healthy",
         "model_loaded": predictor is not None,
-        "model_path": MODEL_PATH,
-        "model_exists": os.path.exists(MODEL_PATH)
+        "model_version": predictor.version if predictor is not None else None,
+        "model_path": predictor.model_path if predictor is not None else registry.root,
+        "model_exists": current_version is not None
     }
 
 @app.post("/predict", response_model=PredictResponse)
@@ -122,8 +227,10 @@ def predict(req: PredictRequest):
     - home_win_probability: Probabilidad de victoria local (0-1)
     - away_win_probability: Probabilidad de victoria visitante (0-1)
     - confidence: Nivel de confianza de la predicción (0-1)
+    - model_version: Versión del modelo que hizo la predicción
     """
-    global predictor
+    # Referencia fija: el request termina con el modelo con el que empezó
+    predictor = manager.predictor
     
     if predictor is None:
         raise HTTPException(
@@ -138,13 +245,13 @@ def predict(req: PredictRequest):
         features_dict = req.dict()
         
         # Realizar predicción
-        prediction = predictor.predict(features_dict)
+        prediction = predictor.predict(features_dict, batcher=batcher)
         
         print(f" Predicción: {prediction['predicted_winner']} "
               f"(Confianza: {prediction['confidence']:.2%})\n")
         
         return prediction
-        
+    
     except Exception as e:
         print(f" Error en predicción: {e}\n")
         raise HTTPException(
@@ -152,18 +259,158 @@ def predict(req: PredictRequest):
             detail=f"Error generando predicción: {str(e)}"
         )
 
+@app.get("/metrics/batching")
+def batching_metrics():
+    """Histogramas de tamaño de batch y espera en cola del micro-batcher"""
+    if batcher is None:
+        return {"enabled": False}
+    
+    return batcher.stats()
+
+@app.post("/predict/batch", response_model=BatchPredictResponse)
+def predict_batch(req: BatchPredictRequest):
+    """
+    Predice varios partidos en una sola llamada y una sola inferencia
+    
+    - **games**: Lista de partidos con la misma estructura que POST /predict
+    
+    Los partidos inválidos devuelven `error` en su posición sin hacer
+    fallar el resto del batch.
+    """
+    # Referencia fija: el request termina con el modelo con el que empezó
+    predictor = manager.predictor
+    
+    if predictor is None:
+        raise HTTPException(
+            status_code=503, 
+            detail="Modelo no cargado. Entrena un modelo primero con POST /train"
+        )
+    
+    if len(req.games) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch demasiado grande: {len(req.games)} partidos (máximo {MAX_BATCH_SIZE})"
+        )
+    
+    print(f"\n Prediciendo batch de {len(req.games)} partidos")
+    
+    # Validar cada partido por separado para aislar errores por item
+    items = [None] * len(req.games)
+    valid_games = []
+    valid_indexes = []
+    
+    for i, game in enumerate(req.games):
+        try:
+            valid_games.append(PredictRequest(**game).dict())
+            valid_indexes.append(i)
+        except Exception as e:
+            items[i] = BatchPredictItem(index=i, error=f"Partido inválido: {e}")
+    
+    try:
+        predictions = predictor.predict_batch(valid_games) if valid_games else []
+    except Exception as e:
+        print(f" Error en predicción batch: {e}\n")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error generando predicciones: {str(e)}"
+        )
+    
+    for i, prediction in zip(valid_indexes, predictions):
+        items[i] = BatchPredictItem(index=i, **prediction)
+    
+    failed = sum(1 for item in items if item.error is not None)
+    
+    print(f" Batch completado: {len(items) - failed} OK, {failed} con error\n")
+    
+    return BatchPredictResponse(
+        total=len(items),
+        succeeded=len(items) - failed,
+        failed=failed,
+        predictions=items
+    )
+
+@app.post("/simulate/season")
+def simulate_season(req: SimulateSeasonRequest):
+    """
+    Simula el resto de la temporada (Monte Carlo)
+    
+    - **teams**: Features actuales de cada equipo (misma estructura que en /predict)
+    - **schedule**: Partidos pendientes como {home, away} con abreviaturas
+    - **records**: Récord actual {abreviatura: {wins, losses}} (default: 0-0)
+    - **n_seasons**: Temporadas a simular
+    - **seed**: Semilla para resultados reproducibles
+    - **conferences**: {abreviatura: conferencia} (default: conferencias NBA)
+    
+    Todas las probabilidades de cruce salen de una sola inferencia; las
+    simulaciones grandes se reparten en el pool de procesos del servicio. Devuelve por equipo la distribución de
+    victorias y las probabilidades de cada puesto, playoffs y play-in.
+    """
+    # Referencia fija: la simulación entera usa el mismo modelo
+    predictor = manager.predictor
+    
+    if predictor is None:
+        raise HTTPException(
+            status_code=503, 
+            detail="Modelo no cargado. Entrena un modelo primero con POST /train"
+        )
+    
+    if not 1 <= req.n_seasons <= MAX_SIMULATED_SEASONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"n_seasons debe estar entre 1 y {MAX_SIMULATED_SEASONS}"
+        )
+    
+    if not req.schedule:
+        raise HTTPException(status_code=400, detail="El calendario está vacío")
+    
+    print(f"\n Simulando {req.n_seasons} temporadas: {len(req.teams)} equipos, {len(req.schedule)} partidos")
+    
+    simulator = SeasonSimulator(predictor, workers=SIMULATION_WORKERS, pool=simulation_pool)
+    
+    try:
+        return simulator.simulate(
+            teams=[team.dict() for team in req.teams],
+            schedule=[(game.home, game.away) for game in req.schedule],
+            records=req.records,
+            n_seasons=req.n_seasons,
+            seed=req.seed,
+            conferences=req.conferences
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f" Error en simulación: {e}\n")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error simulando temporada: {str(e)}"
+        )
+
 @app.post("/train")
-def train(background_tasks: BackgroundTasks, req: TrainRequest = None):
+def train(req: TrainRequest = None):
     """
     Entrena un nuevo modelo con datos históricos
     
     - **data_path**: Ruta al CSV con datos históricos (default: data/nba_games_clean.csv)
     - **test_size**: Proporción de datos para validación (default: 0.2)
+    - **force**: Reentrenar aunque ya exista un modelo con los mismos datos y parámetros
+    - **mode**: "full" (desde cero), "incremental" (continúa el modelo activo con los partidos nuevos),
+      "quantile" (lee el dataset por chunks a un QuantileDMatrix, sin cargarlo entero en RAM)
+      o "external" (igual, con las páginas en disco para datasets más grandes que la memoria)
     
-    El entrenamiento se ejecuta en background y el modelo se recarga automáticamente.
+    El entrenamiento corre en un proceso aparte para no afectar la latencia
+    de /predict. Consulta el progreso con GET /train/{job_id}; al terminar,
+    el modelo nuevo se activa automáticamente.
     """
     data_path = req.data_path if req else "data/nba_games_clean.csv"
     test_size = req.test_size if req else 0.2
+    force = req.force if req else False
+    mode = req.mode if req else "full"
+    
+    if mode not in TRAIN_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Modo de entrenamiento inválido: {mode} (usa {', '.join(TRAIN_MODES)})"
+        )
     
     if not os.path.exists(data_path):
         raise HTTPException(
@@ -171,47 +418,103 @@ def train(background_tasks: BackgroundTasks, req: TrainRequest = None):
             detail=f"Archivo de datos no encontrado: {data_path}"
         )
     
-    def run_training():
-        """Función que se ejecuta en background"""
-        global predictor
-        
-        print("\n" + "="*50)
-        print(" INICIANDO ENTRENAMIENTO")
-        print("="*50)
-        print(f" Dataset: {data_path}")
-        print(f" Test size: {test_size}")
-        print()
-        
-        try:
-            trainer = Trainer(data_csv=data_path)
-            trainer.train(test_size=test_size)
-            
-            # Recargar predictor con nuevo modelo
-            predictor = Predictor()
-            
-            print("\n" + "="*50)
-            print(" ENTRENAMIENTO COMPLETADO")
-            print(" Predictor recargado con nuevo modelo")
-            print("="*50 + "\n")
-            
-        except Exception as e:
-            print("\n" + "="*50)
-            print(f"❌ ERROR EN ENTRENAMIENTO: {e}")
-            print("="*50 + "\n")
+    job = training_jobs.submit(data_path=data_path, test_size=test_size, force=force, mode=mode)
     
-    # Ejecutar en background
-    background_tasks.add_task(run_training)
+    print(f"\n Entrenamiento encolado: job {job['job_id']} ({data_path})\n")
     
     return {
         "status": "training_started",
-        "message": "El entrenamiento se está ejecutando en background",
+        "message": "El entrenamiento se está ejecutando en un proceso aparte",
+        "job_id": job["job_id"],
+        "status_url": f"/train/{job['job_id']}",
         "data_path": data_path,
-        "test_size": test_size
+        "test_size": test_size,
+        "mode": mode
     }
 
+@app.post("/tune")
+def tune(req: TuneRequest = None):
+    """
+    Búsqueda de hiperparámetros y entrenamiento del modelo final
+    
+    - **strategy**: "random" (random search) o "halving" (successive halving)
+    - **n_trials**: Configuraciones a probar
+    - **n_folds**: Folds walk-forward (ordenados por game_date)
+    - **workers**: Trials en paralelo (cada uno con ML_TRAIN_NTHREAD // workers hilos)
+    
+    Corre como un job de entrenamiento: el progreso (incluido cada trial con
+    su tiempo) se consulta en GET /train/{job_id}, y el modelo entrenado
+    con la mejor configuración se activa al terminar.
+    """
+    req = req or TuneRequest()
+    
+    if req.strategy not in SEARCH_STRATEGIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Estrategia inválida: {req.strategy} (usa {', '.join(SEARCH_STRATEGIES)})"
+        )
+    
+    invalid = [name for name in ('n_trials', 'n_folds', 'workers') if getattr(req, name) < 1]
+    if invalid:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Deben ser enteros >= 1: {', '.join(invalid)}"
+        )
+    
+    if not os.path.exists(req.data_path):
+        raise HTTPException(
+            status_code=404,
+            detail=f"Archivo de datos no encontrado: {req.data_path}"
+        )
+    
+    job = training_jobs.submit(
+        data_path=req.data_path,
+        test_size=req.test_size,
+        force=req.force,
+        mode=TUNE_MODE,
+        options={
+            'strategy': req.strategy,
+            'n_trials': req.n_trials,
+            'n_folds': req.n_folds,
+            'workers': req.workers
+        }
+    )
+    
+    print(f"\n Búsqueda de hiperparámetros encolada: job {job['job_id']} ({req.strategy}, {req.n_trials} trials)\n")
+    
+    return {
+        "status": "tuning_started",
+        "job_id": job["job_id"],
+        "status_url": f"/train/{job['job_id']}",
+        "strategy": req.strategy,
+        "n_trials": req.n_trials
+    }
+
+@app.get("/train")
+def list_training_jobs():
+    """Lista los entrenamientos recientes"""
+    return {"jobs": training_jobs.list()}
+
+@app.get("/train/{job_id}")
+def training_status(job_id: str):
+    """
+    Estado de un entrenamiento
+    
+    Incluye la etapa actual, la duración de cada etapa terminada, las
+    métricas de evaluación por ronda y la metadata del modelo al terminar.
+    """
+    job = training_jobs.get(job_id)
+    
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job no encontrado: {job_id}")
+    
+    return job
+
 @app.get("/model/info")
 def model_info():
     """Información sobre el modelo actual"""
+    predictor = manager.predictor
+    
     if predictor is None:
         return {
             "model_loaded": False,
@@ -220,15 +523,61 @@ def model_info():
     
     return {
         "model_loaded": True,
-        "model_path": MODEL_PATH,
-        "model_type": "XGBoost Classifier",
-        "features": [
-            "point_diff", "reb_diff", "ast_diff", "tov_diff",
-            "roll5_point_diff", "roll5_reb_diff", "roll5_ast_diff",
-            "home_advantage", "elo_diff", "injury_diff"
+        "model_path": predictor.model_path,
+        "model_type": "XGBoost Booster",
+        "version": predictor.version,
+        "created_at": predictor.metadata.get("created_at"),
+        "data_hash": predictor.metadata.get("data_hash"),
+        "metrics": predictor.metadata.get("metrics", {}),
+        "features": predictor.metadata["feature_names"]
+    }
+
+@app.get("/model/versions")
+def model_versions():
+    """Versiones registradas, la activa y las disponibles para rollback"""
+    predictor = manager.predictor
+    
+    return {
+        "active": predictor.version if predictor is not None else None,
+        "rollback_available": manager.history(),
+        "versions": [
+            {
+                "version": m["version"],
+                "mode": m.get("mode", "full"),
+                "parent_version": m.get("parent_version"),
+                "created_at": m.get("created_at"),
+                "data_hash": m.get("data_hash"),
+                "metrics": m.get("metrics", {})
+            }
+            for m in registry.list_versions()
         ]
     }
 
+@app.post("/model/activate/{version}")
+def model_activate(version: str):
+    """Carga, calienta y activa una versión del registro"""
+    try:
+        predictor = manager.load(version)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error activando versión {version}: {str(e)}"
+        )
+    
+    return {"status": "activated", "version": predictor.version}
+
+@app.post("/model/rollback")
+def model_rollback():
+    """Vuelve al modelo activo anterior"""
+    try:
+        predictor = manager.rollback()
+    except LookupError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    return {"status": "rolled_back", "version": predictor.version}
+
 # ==================== MAIN ====================
 
 if __name__ == "__main__":
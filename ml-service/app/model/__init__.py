@@ -6,5 +6,14 @@ Módulo de Machine Learning para predicciones NBA
 from .predictor import Predictor
 from .trainer import Trainer
 from .feature_engineer import FeatureEngineer
+from .batcher import MicroBatcher
+from .registry import ModelRegistry
+from .manager import ModelManager
+from .jobs import TrainingJobRunner
+from .tuner import Tuner
+from .backtest import Backtester
+from .simulator import SeasonSimulator
 
-__all__ = ['Predictor', 'Trainer', 'FeatureEngineer']
\ No newline at end of file
+__all__ = ['Predictor', 'Trainer', 'FeatureEngineer', 'MicroBatcher',
+           'ModelRegistry', 'ModelManager', 'TrainingJobRunner', 'Tuner', 'Backtester',
+           'SeasonSimulator']
\ No newline at end of file
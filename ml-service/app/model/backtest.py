@@ -0,0 +1,257 @@
+# ml-service/app/model/backtest.py
+"""
+Backtesting walk-forward sobre el histórico de partidos
+
+Recorre el dataset en orden de fecha: en cada checkpoint de reentrenamiento
+entrena con todos los partidos anteriores y predice la ventana siguiente en
+un solo batch. Las ventanas son independientes entre sí, así que corren en
+paralelo en un pool de procesos; cada proceso recibe una sola vez la matriz
+cronológica (cacheada en el feature store) y cada ventana usa slices de ella.
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import xgboost as xgb
+
+from model.trainer import Trainer, DEFAULT_PARAMS
+from model.registry import ModelRegistry
+
+DEFAULT_RETRAIN_DAYS = 30
+DEFAULT_MIN_TRAIN_GAMES = 500
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
+# Fracción final (más reciente) del pasado usada para early stopping
+EARLY_STOPPING_FRACTION = 0.1
+
+BACKTEST_MAX_BIN = 256
+
+# Clip de probabilidades para el log-loss
+EPSILON = 1e-15
+
+
+def build_windows(dates, retrain_days=DEFAULT_RETRAIN_DAYS, min_train_games=DEFAULT_MIN_TRAIN_GAMES):
+    """
+    Ventanas walk-forward sobre fechas ordenadas
+    
+    El primer checkpoint es la primera fecha con al menos `min_train_games`
+    partidos anteriores; los siguientes, cada `retrain_days` días.
+    
+    Returns:
+        Lista de tuplas (train_end, test_end): se entrena con [0, train_end)
+        y se predice [train_end, test_end)
+    """
+    if len(dates) <= min_train_games:
+        return []
+    
+    step = np.timedelta64(retrain_days, 'D')
+    # Un checkpoint nunca parte un día: arranca en el primer partido de su fecha
+    train_end = int(np.searchsorted(dates, dates[min_train_games], side='left'))
+    if train_end == 0:
+        train_end = int(np.searchsorted(dates, dates[0], side='right'))
+    
+    windows = []
+    while train_end < len(dates):
+        test_end = int(np.searchsorted(dates, dates[train_end] + step, side='left'))
+        windows.append((train_end, test_end))
+        train_end = test_end
+    
+    return windows
+
+
+def window_metrics(y, proba):
+    """Accuracy, log-loss y Brier score de una ventana"""
+    clipped = np.clip(proba, EPSILON, 1 - EPSILON)
+    return {
+        'accuracy': float(np.mean((proba > 0.5) == (y > 0.5))),
+        'logloss': float(-np.mean(y * np.log(clipped) + (1 - y) * np.log(1 - clipped))),
+        'brier': float(np.mean((proba - y) ** 2))
+    }
+
+
+# Estado de cada proceso del pool: la matriz cronológica completa
+_worker = {}
+
+
+def _init_worker(X, y):
+    _worker.update(X=X, y=y)
+
+
+def _run_window(index, train_end, test_end, params, nthread, seed):
+    """Entrena con el pasado y predice la ventana (corre en un proceso del pool)"""
+    started = time.perf_counter()
+    X, y = _worker['X'], _worker['y']
+    
+    # Early stopping con la cola más reciente del pasado (nunca con la ventana)
+    n_stop = max(1, int(train_end * EARLY_STOPPING_FRACTION))
+    fit_end = train_end - n_stop
+    
+    dtrain = xgb.QuantileDMatrix(X[:fit_end], label=y[:fit_end], max_bin=BACKTEST_MAX_BIN, nthread=nthread)
+    dstop = xgb.QuantileDMatrix(X[fit_end:train_end], label=y[fit_end:train_end], ref=dtrain,
+                                max_bin=BACKTEST_MAX_BIN, nthread=nthread)
+    
+    booster = xgb.train(
+        {
+            'objective': 'binary:logistic',
+            'eval_metric': params.get('eval_metric', 'logloss'),
+            'max_depth': params['max_depth'],
+            'learning_rate': params['learning_rate'],
+            'subsample': params['subsample'],
+            'colsample_bytree': params['colsample_bytree'],
+            'tree_method': 'hist',
+            'max_bin': BACKTEST_MAX_BIN,
+            'seed': seed,
+            'nthread': nthread
+        },
+        dtrain,
+        num_boost_round=params['n_estimators'],
+        evals=[(dstop, 'validation')],
+        early_stopping_rounds=params.get('early_stopping_rounds'),
+        verbose_eval=False
+    )
+    
+    # Toda la ventana en una sola predicción
+    iteration_range = (0, booster.best_iteration + 1)
+    proba = booster.inplace_predict(X[train_end:test_end], iteration_range=iteration_range)
+    
+    return {
+        'window': index,
+        'train_games': train_end,
+        'test_games': test_end - train_end,
+        'best_iteration': int(booster.best_iteration),
+        'proba': np.asarray(proba, dtype=np.float32),
+        'seconds': round(time.perf_counter() - started, 3)
+    }
+
+
+class Backtester:
+    """
+    Backtest walk-forward del modelo sobre el CSV histórico
+    """
+    
+    def __init__(self, data_csv="data/nba_games_clean.csv", params=None,
+                 workers=DEFAULT_WORKERS, total_threads=None, seed=42):
+        """
+        Args:
+            data_csv: Dataset de partidos (debe tener game_date)
+            params: Hiperparámetros (default: DEFAULT_PARAMS)
+            workers: Ventanas entrenadas en paralelo
+            total_threads: Hilos totales a repartir entre los workers (default: todos los cores)
+            seed: Semilla de XGBoost
+        """
+        self.trainer = Trainer(data_csv=data_csv)
+        self.params = dict(DEFAULT_PARAMS, **(params or {}))
+        self.workers = max(1, workers)
+        self.total_threads = total_threads or os.cpu_count() or 1
+        self.nthread = max(1, self.total_threads // self.workers)
+        self.seed = seed
+    
+    def run(self, retrain_days=DEFAULT_RETRAIN_DAYS, min_train_games=DEFAULT_MIN_TRAIN_GAMES):
+        """
+        Ejecuta el backtest
+        
+        Args:
+            retrain_days: Días entre checkpoints de reentrenamiento (tamaño de ventana)
+            min_train_games: Partidos mínimos antes del primer checkpoint
+        
+        Returns:
+            Dict con métricas por ventana y agregadas
+        """
+        started = time.perf_counter()
+        
+        X, y, dates = self.trainer.chronological_matrix()
+        windows = build_windows(dates, retrain_days, min_train_games)
+        if not windows:
+            raise ValueError(f"❌ Se necesitan más de {min_train_games} partidos para el backtest")
+        
+        print(f"\n📈 Backtest walk-forward: {len(windows)} ventanas de {retrain_days} días")
+        print(f" {self.workers} workers x {self.nthread} hilos\n")
+        
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=mp.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(X, y)
+        ) as executor:
+            # Ventanas más grandes (más pasado) primero: mejor reparto entre workers
+            order = sorted(range(len(windows)), key=lambda i: -windows[i][0])
+            futures = {
+                i: executor.submit(_run_window, i, *windows[i], self.params, self.nthread, self.seed)
+                for i in order
+            }
+            results = [futures[i].result() for i in range(len(windows))]
+        
+        proba = np.empty(windows[-1][1] - windows[0][0], dtype=np.float32)
+        offset = windows[0][0]
+        
+        report = []
+        for (train_end, test_end), result in zip(windows, results):
+            proba[train_end - offset:test_end - offset] = result['proba']
+            metrics = window_metrics(y[train_end:test_end], result['proba'])
+            
+            report.append({
+                'window': result['window'],
+                'start': str(dates[train_end].astype('datetime64[D]')),
+                'end': str(dates[test_end - 1].astype('datetime64[D]')),
+                'train_games': result['train_games'],
+                'test_games': result['test_games'],
+                'best_iteration': result['best_iteration'],
+                'seconds': result['seconds'],
+                **metrics
+            })
+            
+            print(f"   {report[-1]['start']} → {report[-1]['end']}: "
+                  f"acc={metrics['accuracy']:.3f} logloss={metrics['logloss']:.4f} "
+                  f"brier={metrics['brier']:.4f} ({result['test_games']} partidos, {result['seconds']:.1f}s)")
+        
+        overall = window_metrics(y[offset:windows[-1][1]], proba)
+        summary = {
+            'data_path': self.trainer.data_csv,
+            'data_hash': self.trainer.dataset_hash(),
+            'params': self.params,
+            'retrain_days': retrain_days,
+            'min_train_games': min_train_games,
+            'windows': report,
+            'overall': dict(overall, games=int(len(proba))),
+            'baseline_home_win_rate': float(np.mean(y[offset:windows[-1][1]])),
+            'wall_time': round(time.perf_counter() - started, 3)
+        }
+        
+        print(f"\n Total: acc={overall['accuracy']:.3f} logloss={overall['logloss']:.4f} "
+              f"brier={overall['brier']:.4f} en {summary['wall_time']:.1f}s")
+        
+        return summary
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest walk-forward del modelo NBA")
+    parser.add_argument("--data", default="data/nba_games_clean.csv", help="Dataset de partidos")
+    parser.add_argument("--retrain-days", type=int, default=DEFAULT_RETRAIN_DAYS,
+                        help="Días entre reentrenamientos")
+    parser.add_argument("--min-train-games", type=int, default=DEFAULT_MIN_TRAIN_GAMES)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--version", default=None,
+                        help="Usar los hiperparámetros de esta versión del registro")
+    parser.add_argument("--output", default=None, help="Guardar el reporte en JSON")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    """Ejecutar desde app/: python -m model.backtest --retrain-days 14"""
+    args = parse_args()
+    
+    params = None
+    if args.version:
+        params = ModelRegistry().get_metadata(args.version).get('params')
+    
+    backtester = Backtester(data_csv=args.data, params=params, workers=args.workers)
+    summary = backtester.run(retrain_days=args.retrain_days, min_train_games=args.min_train_games)
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(summary, f, indent=2)
+        print(f" Reporte guardado en {args.output}")
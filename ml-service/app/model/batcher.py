@@ -0,0 +1,137 @@
+# ml-service/app/model/batcher.py
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+from utils.helpers import Histogram
+
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128]
+QUEUE_WAIT_BUCKETS_MS = [0.1, 0.25, 0.5, 1, 2, 5, 10, 25, 50, 100]
+
+_STOP = object()
+
+
+class MicroBatcher:
+    """
+    Agrupa requests concurrentes de /predict en una sola inferencia
+    
+    Los hilos del threadpool de FastAPI encolan su fila de features y
+    esperan un Future. Un hilo de fondo junta hasta `max_batch_size` filas
+    o espera como máximo `max_wait_ms` desde la primera, hace una única
+    llamada a predict_proba_matrix y reparte los resultados.
+    """
+    
+    def __init__(self, max_batch_size=32, max_wait_ms=2.0, result_timeout=5.0):
+        """
+        Args:
+            max_batch_size: Máximo de filas por inferencia
+            max_wait_ms: Espera máxima (ms) para completar un batch
+            result_timeout: Segundos que un request espera su resultado
+        """
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.result_timeout = result_timeout
+        
+        self.batch_size_hist = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_wait_hist = Histogram(QUEUE_WAIT_BUCKETS_MS)
+        
+        self._queue = queue.Queue()
+        self._thread = None
+    
+    def start(self):
+        """Inicia el hilo que procesa los batches"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+        
+        print(f" Micro-batching activo: max {self.max_batch_size} filas / "
+              f"{self.max_wait * 1000:.1f} ms")
+    
+    def stop(self):
+        """Procesa lo pendiente y detiene el hilo"""
+        if self._thread is None:
+            return
+        
+        self._queue.put(_STOP)
+        self._thread.join(timeout=self.result_timeout)
+        self._thread = None
+    
+    def submit(self, predictor, row):
+        """
+        Encola una fila para el próximo batch
+        
+        Args:
+            predictor: Predictor con el que se debe evaluar la fila
+            row: Array float32 (1 x F); no debe modificarse hasta tener el resultado
+        
+        Returns:
+            Future que se resuelve con P(home_win) como float
+        """
+        future = Future()
+        self._queue.put((predictor, row, time.perf_counter(), future))
+        return future
+    
+    def stats(self):
+        """Histogramas de tamaño de batch y espera en cola (ms)"""
+        return {
+            'enabled': True,
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000,
+            'queue_depth': self._queue.qsize(),
+            'batch_size': self.batch_size_hist.snapshot(),
+            'queue_wait_ms': self.queue_wait_hist.snapshot()
+        }
+    
+    def _run(self):
+        """Bucle del hilo de fondo: junta filas y despacha batches"""
+        stopping = False
+        
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            
+            batch = [item]
+            deadline = time.perf_counter() + self.max_wait
+            
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            
+            self._process(batch)
+    
+    def _process(self, batch):
+        """Ejecuta la inferencia del batch y resuelve los Futures"""
+        now = time.perf_counter()
+        self.batch_size_hist.observe(len(batch))
+        
+        # Agrupar por predictor: cada request termina con el modelo con el que empezó
+        groups = {}
+        for predictor, row, enqueued_at, future in batch:
+            self.queue_wait_hist.observe((now - enqueued_at) * 1000)
+            groups.setdefault(id(predictor), (predictor, []))[1].append((row, future))
+        
+        for predictor, items in groups.values():
+            try:
+                X = np.vstack([row for row, _ in items])
+                probabilities = predictor.predict_proba_matrix(X)
+            except Exception as e:
+                for _, future in items:
+                    future.set_exception(e)
+                continue
+            
+            for (_, future), probability in zip(items, probabilities):
+                future.set_result(float(probability))
@@ -0,0 +1,86 @@
+# ml-service/app/model/data_iter.py
+"""
+Iterador de datos para XGBoost sobre el dataset leído por chunks
+
+Permite construir un QuantileDMatrix (o un DMatrix en memoria externa)
+sin tener nunca el dataset completo ni sus copias (X, X_train, X_val)
+en RAM: cada chunk se lee, se convierte a features y se entrega a
+XGBoost, que solo conserva su representación cuantizada.
+"""
+import numpy as np
+import xgboost as xgb
+
+from data.loader import iter_games, DEFAULT_CHUNK_ROWS
+
+# Split train/validación determinista: la fila i va a validación si
+# i % VALIDATION_MODULUS < test_size * VALIDATION_MODULUS
+VALIDATION_MODULUS = 100
+
+
+def validation_mask(positions, test_size):
+    """
+    Máscara de validación para posiciones globales de fila
+    
+    Es la misma en cada pasada del iterador y entre entrenamientos, sin
+    necesidad de guardar índices.
+    """
+    cutoff = int(round(test_size * VALIDATION_MODULUS))
+    return (positions % VALIDATION_MODULUS) < cutoff
+
+
+class GameBatchIter(xgb.DataIter):
+    """
+    Entrega a XGBoost la matriz de features chunk a chunk
+    """
+    
+    def __init__(self, path, engineer, subset='train', test_size=0.2, columns=None,
+                 chunk_rows=DEFAULT_CHUNK_ROWS, cache_prefix=None):
+        """
+        Args:
+            path: Dataset de partidos (CSV o Parquet)
+            engineer: FeatureEngineer que convierte cada chunk en features
+            subset: 'train' o 'validation' (según validation_mask)
+            test_size: Fracción de filas para validación
+            columns: Columnas a leer (proyección; default: todas)
+            chunk_rows: Filas por chunk
+            cache_prefix: Prefijo de caché en disco para memoria externa (None = en memoria)
+        """
+        super().__init__(cache_prefix=cache_prefix)
+        self.path = path
+        self.engineer = engineer
+        self.subset = subset
+        self.test_size = test_size
+        self.columns = columns
+        self.chunk_rows = chunk_rows
+        self.feature_names = engineer.get_feature_names()
+        self._chunks = None
+        self._offset = 0
+    
+    def reset(self):
+        """XGBoost pide volver al principio del dataset"""
+        self._chunks = None
+        self._offset = 0
+    
+    def next(self, input_data):
+        """Entrega el siguiente chunk; retorna 0 cuando no quedan más"""
+        if self._chunks is None:
+            self._chunks = iter_games(self.path, columns=self.columns, chunk_rows=self.chunk_rows)
+        
+        for chunk in self._chunks:
+            positions = self._offset + np.arange(len(chunk))
+            self._offset += len(chunk)
+            
+            mask = validation_mask(positions, self.test_size)
+            if self.subset == 'train':
+                mask = ~mask
+            if not mask.any():
+                continue
+            
+            features = self.engineer.build_features_from_csv(chunk[mask], verbose=False)
+            X = features[self.feature_names].to_numpy(dtype=np.float32)
+            y = features['winner'].to_numpy(dtype=np.float32)
+            
+            input_data(data=X, label=y, feature_names=self.feature_names)
+            return 1
+        
+        return 0
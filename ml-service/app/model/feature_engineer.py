@@ -1,7 +1,26 @@
 # ml-service/app/model/feature_engineer.py
+import hashlib
 import pandas as pd
 import numpy as np
 
+# Subir cuando cambie la forma de calcular alguna feature: invalida las
+# matrices cacheadas y las huellas de entrenamiento
+FEATURE_SPEC_VERSION = 1
+
+# Features de diferencia del CSV: columnas local/visitante de las que se
+# calculan cuando el CSV no trae la diferencia ya hecha
+CSV_DIFF_SOURCES = {
+    'point_diff': ('home_pts', 'away_pts'),
+    'reb_diff': ('home_reb', 'away_reb'),
+    'ast_diff': ('home_ast', 'away_ast'),
+    'tov_diff': ('home_tov', 'away_tov'),
+    'roll5_point_diff': ('home_roll5_pts', 'away_roll5_pts'),
+    'roll5_reb_diff': ('home_roll5_reb', 'away_roll5_reb'),
+    'roll5_ast_diff': ('home_roll5_ast', 'away_roll5_ast'),
+    'elo_diff': ('home_elo', 'away_elo'),
+    'injury_diff': ('away_injuries', 'home_injuries'),
+}
+
 class FeatureEngineer:
     """
     Clase para construir features desde datos crudos
@@ -10,7 +29,7 @@ class FeatureEngineer:
     def __init__(self):
         pass
     
-    def build_features_from_csv(self, df):
+    def build_features_from_csv(self, df, verbose=True):
         """
         Construye features desde un DataFrame con datos históricos
         
@@ -25,79 +44,59 @@ class FeatureEngineer:
                 - home_injuries, away_injuries
                 - home_roll5_pts, away_roll5_pts (rolling stats)
                 - home_win (target: 1 si ganó local, 0 si ganó visitante)
+            verbose: Imprimir shapes y columnas (se apaga al procesar por chunks)
         
         Returns:
             DataFrame con features procesados y target 'winner'
         """
-        print(f"Shape original: {df.shape}")
-        print(f"Columnas disponibles: {df.columns.tolist()}")
-        
-        # Crear features de diferencia (más importantes para ML)
-        features = pd.DataFrame()
-        
-        # 1. Diferencias de stats básicas
-        if 'point_diff' in df.columns:
-            features['point_diff'] = df['point_diff']
-        else:
-            features['point_diff'] = df['home_pts'] - df['away_pts']
-        
-        if 'reb_diff' in df.columns:
-            features['reb_diff'] = df['reb_diff']
-        else:
-            features['reb_diff'] = df['home_reb'] - df['away_reb']
-        
-        if 'ast_diff' in df.columns:
-            features['ast_diff'] = df['ast_diff']
-        else:
-            features['ast_diff'] = df['home_ast'] - df['away_ast']
-        
-        if 'tov_diff' in df.columns:
-            features['tov_diff'] = df['tov_diff']
-        else:
-            features['tov_diff'] = df['home_tov'] - df['away_tov']
-        
-        # 2. Rolling stats differences (forma reciente)
-        if 'roll5_point_diff' in df.columns:
-            features['roll5_point_diff'] = df['roll5_point_diff']
-        else:
-            features['roll5_point_diff'] = df['home_roll5_pts'] - df['away_roll5_pts']
-        
-        if 'roll5_reb_diff' in df.columns:
-            features['roll5_reb_diff'] = df['roll5_reb_diff']
-        else:
-            features['roll5_reb_diff'] = df['home_roll5_reb'] - df['away_roll5_reb']
-        
-        if 'roll5_ast_diff' in df.columns:
-            features['roll5_ast_diff'] = df['roll5_ast_diff']
-        else:
-            features['roll5_ast_diff'] = df['home_roll5_ast'] - df['away_roll5_ast']
-        
-        # 3. Home advantage
-        if 'home_advantage' in df.columns:
-            features['home_advantage'] = df['home_advantage']
-        else:
-            features['home_advantage'] = 1  # Siempre 1 (es el equipo local)
-        
-        # 4. Elo rating difference
-        if 'elo_diff' in df.columns:
-            features['elo_diff'] = df['elo_diff']
-        else:
-            features['elo_diff'] = df['home_elo'] - df['away_elo']
-        
-        # 5. Injury difference
-        if 'injury_diff' in df.columns:
-            features['injury_diff'] = df['injury_diff']
-        else:
-            features['injury_diff'] = df['away_injuries'] - df['home_injuries']
+        if verbose:
+            print(f"Shape original: {df.shape}")
+            print(f"Columnas disponibles: {df.columns.tolist()}")
+        
+        # Crear features de diferencia (más importantes para ML).
+        # Si el CSV ya trae la diferencia se usa; si no, se calcula.
+        def diff(name):
+            home_col, away_col = CSV_DIFF_SOURCES[name]
+            if name in df.columns:
+                return df[name].to_numpy(dtype=np.float32)
+            return (df[home_col].to_numpy(dtype=np.float32)
+                    - df[away_col].to_numpy(dtype=np.float32))
+        
+        columns = {
+            # 1. Diferencias de stats básicas
+            'point_diff': diff('point_diff'),
+            'reb_diff': diff('reb_diff'),
+            'ast_diff': diff('ast_diff'),
+            'tov_diff': diff('tov_diff'),
+            
+            # 2. Rolling stats differences (forma reciente)
+            'roll5_point_diff': diff('roll5_point_diff'),
+            'roll5_reb_diff': diff('roll5_reb_diff'),
+            'roll5_ast_diff': diff('roll5_ast_diff'),
+            
+            # 3. Home advantage (siempre 1: es el equipo local)
+            'home_advantage': (
+                df['home_advantage'].to_numpy(dtype=np.float32)
+                if 'home_advantage' in df.columns
+                else np.ones(len(df), dtype=np.float32)
+            ),
+            
+            # 4. Elo rating difference
+            'elo_diff': diff('elo_diff'),
+            
+            # 5. Injury difference (más lesiones en visitante favorece al local)
+            'injury_diff': diff('injury_diff'),
+        }
+        
+        # Construir el DataFrame de una sola vez; NaN -> 0
+        features = pd.DataFrame(columns, index=df.index).fillna(0)
         
         # 6. Target: home_win
-        features['winner'] = df['home_win']
-        
-        # Eliminar NaN si existen
-        features = features.fillna(0)
+        features['winner'] = df['home_win'].fillna(0).to_numpy(dtype=np.int8)
         
-        print(f" Features construidos: {features.shape}")
-        print(f" Features: {features.columns.tolist()}")
+        if verbose:
+            print(f" Features construidos: {features.shape}")
+            print(f" Features: {features.columns.tolist()}")
         
         return features
     
@@ -121,6 +120,28 @@ class FeatureEngineer:
         Returns:
             Array con features en el orden correcto para predicción
         """
+        return list(self._api_feature_values(home_data, away_data))
+    
+    def fill_features_from_api(self, home_data, away_data, out):
+        """
+        Escribe las features de un partido directamente en un array existente
+        
+        Camino rápido para inferencia: evita construir listas y DataFrames
+        por request y permite reutilizar un buffer float32 preasignado.
+        
+        Args:
+            home_data: Dict con stats del equipo local (ver build_features_from_api)
+            away_data: Dict con stats del equipo visitante
+            out: Array 1D de numpy con len(get_feature_names()) posiciones
+        
+        Returns:
+            El mismo array `out` con las features escritas
+        """
+        out[:] = self._api_feature_values(home_data, away_data)
+        return out
+    
+    def _api_feature_values(self, home_data, away_data):
+        """Calcula las features de API como tupla en el orden de get_feature_names"""
         # Extraer stats
         home_stats = home_data.get('stats', {})
         away_stats = away_data.get('stats', {})
@@ -151,8 +172,8 @@ class FeatureEngineer:
         # 8. Injury difference (más lesiones en visitante favorece al local)
         injury_diff = len(away_data.get('injuries', [])) - len(home_data.get('injuries', []))
         
-        # Crear array en el orden correcto
-        features = [
+        # Tupla en el orden correcto
+        return (
             point_diff,
             reb_diff,
             ast_diff,
@@ -163,9 +184,29 @@ class FeatureEngineer:
             home_advantage,
             elo_diff,
             injury_diff
-        ]
+        )
+    
+    def spec_hash(self):
+        """Hash del spec de features (nombres, orden y versión de cálculo)"""
+        spec = f"{FEATURE_SPEC_VERSION}:" + ",".join(self.get_feature_names())
+        return hashlib.sha256(spec.encode()).hexdigest()
+    
+    def get_source_columns(self, available=None):
+        """
+        Columnas del CSV que lee build_features_from_csv (incluye el target)
         
-        return features
+        Sirve para proyectar la lectura del dataset a lo que se usa.
+        
+        Args:
+            available: Columnas del archivo; si se indican, las columnas
+                       local/visitante solo se piden cuando falta la diferencia
+        """
+        columns = ['home_advantage', 'home_win']
+        for name, sources in CSV_DIFF_SOURCES.items():
+            columns.append(name)
+            if available is None or name not in available:
+                columns.extend(sources)
+        return columns
     
     def get_feature_names(self):
         """Retorna los nombres de las features en orden"""
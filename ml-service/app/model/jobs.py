@@ -0,0 +1,311 @@
+# ml-service/app/model/jobs.py
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+import traceback
+import uuid
+
+from model.trainer import Trainer
+from model.tuner import Tuner
+
+# Hilos de XGBoost en el proceso de entrenamiento: deja un core libre para /predict
+DEFAULT_TRAIN_NTHREAD = max(1, (os.cpu_count() or 2) - 1)
+MAX_JOBS_KEPT = 50
+
+TERMINAL_STATUSES = ('completed', 'failed')
+TRAIN_MODES = ('full', 'incremental', 'quantile', 'external')
+
+# Búsqueda de hiperparámetros + entrenamiento final (usa su propio pool de procesos)
+TUNE_MODE = 'tune'
+
+
+def _run_training_job(job_id, params, events):
+    """
+    Punto de entrada del proceso hijo: entrena y reporta progreso por la cola
+    
+    Corre en un proceso aparte (spawn) para no competir por el GIL con el
+    servidor que atiende /predict.
+    """
+    def report(event, **data):
+        events.put({'job_id': job_id, 'event': event, 'time': time.time(), **data})
+    
+    try:
+        # Menor prioridad de CPU que el proceso que sirve predicciones
+        if hasattr(os, 'nice'):
+            os.nice(10)
+        
+        report('started', pid=os.getpid())
+        
+        if params['mode'] == TUNE_MODE:
+            options = params['options']
+            tuner = Tuner(
+                data_csv=params['data_path'],
+                n_folds=options['n_folds'],
+                workers=options['workers'],
+                total_threads=params['n_jobs']
+            )
+            metadata = tuner.tune(
+                strategy=options['strategy'],
+                n_trials=options['n_trials'],
+                test_size=params['test_size'],
+                progress=report,
+                force=params['force']
+            )
+            report('completed', result=metadata)
+            return
+        
+        trainer = Trainer(data_csv=params['data_path'])
+        
+        if params['mode'] == 'incremental':
+            metadata = trainer.train_incremental(
+                test_size=params['test_size'],
+                n_jobs=params['n_jobs'],
+                progress=report
+            )
+        elif params['mode'] in ('quantile', 'external'):
+            metadata = trainer.train_external(
+                test_size=params['test_size'],
+                n_jobs=params['n_jobs'],
+                progress=report,
+                force=params['force'],
+                external_memory=params['mode'] == 'external'
+            )
+        else:
+            metadata = trainer.train(
+                test_size=params['test_size'],
+                n_jobs=params['n_jobs'],
+                progress=report,
+                force=params['force']
+            )
+        
+        report('completed', result=metadata)
+        
+    except Exception as e:
+        report('failed', error=str(e), traceback=traceback.format_exc())
+
+
+class TrainingJobRunner:
+    """
+    Ejecuta entrenamientos en un proceso separado, de a uno por vez
+    
+    Cada job tiene un ID y un estado consultable (etapas con su duración y
+    métricas por ronda). Un hilo despacha los jobs en orden y otro escucha
+    los eventos que envía el proceso hijo.
+    """
+    
+    def __init__(self, on_success=None, n_jobs=DEFAULT_TRAIN_NTHREAD):
+        """
+        Args:
+            on_success: Callback on_success(metadata) al terminar un job con éxito
+            n_jobs: Hilos de XGBoost para cada entrenamiento
+        """
+        self.on_success = on_success
+        self.n_jobs = n_jobs
+        
+        self._ctx = mp.get_context('spawn')
+        self._events = None
+        self._pending = queue.Queue()
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._threads = []
+        self._process = None
+    
+    def start(self):
+        """Inicia los hilos de despacho y de escucha de eventos"""
+        if self._threads:
+            return
+        
+        self._events = self._ctx.Queue()
+        self._threads = [
+            threading.Thread(target=self._dispatch_loop, name="train-dispatcher", daemon=True),
+            threading.Thread(target=self._event_loop, name="train-events", daemon=True)
+        ]
+        for thread in self._threads:
+            thread.start()
+    
+    def stop(self):
+        """Detiene los hilos y termina el entrenamiento en curso"""
+        if not self._threads:
+            return
+        
+        process = self._process
+        if process is not None and process.is_alive():
+            process.terminate()
+        
+        self._pending.put(None)
+        self._events.put(None)
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+    
+    def submit(self, data_path, test_size, force=False, mode='full', options=None):
+        """
+        Encola un entrenamiento
+        
+        Args:
+            data_path: Dataset de partidos
+            test_size: Proporción de validación
+            force: Entrenar aunque exista un modelo con la misma huella
+            mode: Uno de TRAIN_MODES, o TUNE_MODE
+            options: Opciones propias del modo (ej: estrategia y trials del tuner)
+        
+        Returns:
+            Dict con el estado inicial del job (incluye job_id)
+        """
+        job_id = uuid.uuid4().hex[:12]
+        job = {
+            'job_id': job_id,
+            'status': 'queued',
+            'params': {
+                'data_path': data_path,
+                'test_size': test_size,
+                'force': force,
+                'mode': mode,
+                'options': dict(options or {}),
+                'n_jobs': self.n_jobs
+            },
+            'created_at': time.time(),
+            'started_at': None,
+            'finished_at': None,
+            'current_stage': None,
+            'stages': {},
+            'rounds': [],
+            'trials': [],
+            'result': None,
+            'model_activated': False,
+            'activation_error': None,
+            'error': None
+        }
+        
+        with self._lock:
+            self._jobs[job_id] = job
+            self._trim_jobs()
+        
+        self._pending.put(job_id)
+        return self.get(job_id)
+    
+    def get(self, job_id):
+        """Copia del estado de un job o None si no existe"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            return dict(job, stages=dict(job['stages']), rounds=list(job['rounds']),
+                        trials=list(job['trials']))
+    
+    def list(self):
+        """Resumen de los jobs, del más reciente al más antiguo"""
+        with self._lock:
+            jobs = sorted(self._jobs.values(), key=lambda j: j['created_at'], reverse=True)
+            return [
+                {
+                    'job_id': j['job_id'],
+                    'status': j['status'],
+                    'current_stage': j['current_stage'],
+                    'created_at': j['created_at'],
+                    'finished_at': j['finished_at']
+                }
+                for j in jobs
+            ]
+    
+    def _trim_jobs(self):
+        """Descarta los jobs terminados más antiguos (llamar con el lock tomado)"""
+        finished = sorted(
+            (j for j in self._jobs.values() if j['status'] in TERMINAL_STATUSES),
+            key=lambda j: j['created_at']
+        )
+        for job in finished[:max(0, len(self._jobs) - MAX_JOBS_KEPT)]:
+            del self._jobs[job['job_id']]
+    
+    def _dispatch_loop(self):
+        """Lanza un proceso por job, en orden, y detecta procesos caídos"""
+        while True:
+            job_id = self._pending.get()
+            if job_id is None:
+                break
+            
+            with self._lock:
+                params = dict(self._jobs[job_id]['params'])
+            
+            self._process = self._ctx.Process(
+                target=_run_training_job,
+                args=(job_id, params, self._events),
+                name=f"train-{job_id}",
+                # Un proceso daemon no puede crear el pool de procesos del tuner
+                daemon=params['mode'] != TUNE_MODE
+            )
+            self._process.start()
+            self._process.join()
+            exitcode = self._process.exitcode
+            self._process = None
+            
+            # Si el hijo murió sin reportar (OOM, kill), marcar el job como fallido
+            if exitcode != 0:
+                with self._lock:
+                    job = self._jobs.get(job_id)
+                    if job is not None and job['status'] not in TERMINAL_STATUSES:
+                        job['status'] = 'failed'
+                        job['error'] = f"El proceso de entrenamiento terminó con código {exitcode}"
+                        job['finished_at'] = time.time()
+    
+    def _event_loop(self):
+        """Aplica al estado de cada job los eventos enviados por el proceso hijo"""
+        while True:
+            event = self._events.get()
+            if event is None:
+                break
+            
+            completed_result = None
+            
+            with self._lock:
+                job = self._jobs.get(event['job_id'])
+                if job is None:
+                    continue
+                
+                kind = event['event']
+                if kind == 'started':
+                    job['status'] = 'running'
+                    job['started_at'] = event['time']
+                elif kind == 'stage_started':
+                    job['current_stage'] = event['stage']
+                elif kind == 'stage_finished':
+                    job['stages'][event['stage']] = round(event['seconds'], 3)
+                elif kind == 'round':
+                    job['rounds'].append({'round': event['round'], 'metrics': event['metrics']})
+                elif kind == 'trial':
+                    job['trials'].append({
+                        'trial_id': event['trial_id'],
+                        'params': event['params'],
+                        'logloss': event['logloss'],
+                        'num_rounds': event['num_rounds'],
+                        'seconds': event['seconds']
+                    })
+                elif kind == 'completed':
+                    # Con on_success el job queda 'completed' recién después de activar
+                    job['status'] = 'completed' if self.on_success is None else 'running'
+                    job['current_stage'] = None if self.on_success is None else 'activate'
+                    job['result'] = event['result']
+                    job['finished_at'] = event['time']
+                    completed_result = event['result']
+                elif kind == 'failed':
+                    job['status'] = 'failed'
+                    job['error'] = event['error']
+                    job['finished_at'] = event['time']
+                    print(f"❌ ERROR EN ENTRENAMIENTO {job['job_id']}: {event['error']}")
+                    print(event['traceback'])
+            
+            if completed_result is not None and self.on_success is not None:
+                activation_error = None
+                try:
+                    self.on_success(completed_result)
+                except Exception as e:
+                    activation_error = str(e)
+                    print(f"  Error activando el modelo de {event['job_id']}: {e}")
+                
+                with self._lock:
+                    job['status'] = 'completed'
+                    job['current_stage'] = None
+                    job['model_activated'] = activation_error is None
+                    job['activation_error'] = activation_error
@@ -0,0 +1,99 @@
+# ml-service/app/model/manager.py
+import threading
+
+import numpy as np
+from model.predictor import Predictor
+from model.registry import ModelRegistry
+
+WARMUP_BATCH_SIZE = 32
+
+
+class ModelManager:
+    """
+    Mantiene el Predictor activo y lo reemplaza sin cortar el servicio
+    
+    Los modelos nuevos se cargan y se calientan fuera del camino de los
+    requests; el reemplazo es una sola asignación de referencia. Cada
+    request toma `manager.predictor` una vez al empezar, así que termina
+    con el modelo con el que empezó aunque haya un swap en medio.
+    """
+    
+    def __init__(self, registry=None, history_size=3):
+        """
+        Args:
+            registry: ModelRegistry de donde cargar versiones (default: models/)
+            history_size: Predictores anteriores que se guardan para rollback
+        """
+        self.registry = registry or ModelRegistry()
+        self.history_size = history_size
+        
+        self._predictor = None
+        self._history = []
+        # Serializa cargas/swaps entre sí; los requests nunca lo toman
+        self._lock = threading.Lock()
+    
+    @property
+    def predictor(self):
+        """Predictor activo (None si no hay modelo cargado)"""
+        return self._predictor
+    
+    def load(self, version=None):
+        """
+        Carga, calienta y activa una versión del registro
+        
+        Args:
+            version: Versión a activar (default: la apuntada por `current`)
+        
+        Returns:
+            El nuevo Predictor activo
+        """
+        with self._lock:
+            new_predictor = Predictor(version=version, registry=self.registry)
+            self._warm_up(new_predictor)
+            
+            if new_predictor.version != 'legacy':
+                self.registry.set_current(new_predictor.version)
+            
+            self._swap(new_predictor)
+        
+        print(f" Modelo activo: {new_predictor.version}")
+        return new_predictor
+    
+    def rollback(self):
+        """
+        Vuelve al predictor anterior (ya cargado en memoria)
+        
+        Returns:
+            El Predictor restaurado
+        """
+        with self._lock:
+            if not self._history:
+                raise LookupError("No hay una versión anterior a la que volver")
+            
+            previous = self._history.pop()
+            if previous.version != 'legacy':
+                self.registry.set_current(previous.version)
+            
+            self._predictor = previous
+        
+        print(f" Rollback al modelo {previous.version}")
+        return previous
+    
+    def history(self):
+        """Versiones disponibles para rollback, de la más reciente a la más antigua"""
+        return [p.version for p in reversed(self._history)]
+    
+    def _swap(self, new_predictor):
+        """Reemplaza el predictor activo y guarda el anterior para rollback"""
+        previous = self._predictor
+        self._predictor = new_predictor
+        
+        if previous is not None and previous.version != new_predictor.version:
+            self._history.append(previous)
+            del self._history[:-self.history_size]
+    
+    def _warm_up(self, predictor):
+        """Primeras inferencias fuera del camino de los requests"""
+        X = np.zeros((WARMUP_BATCH_SIZE, predictor.n_features), dtype=np.float32)
+        predictor.predict_proba_matrix(X[:1])
+        predictor.predict_proba_matrix(X)
@@ -1,35 +1,72 @@
 # ml-service/app/model/predictor.py
 import os
+import threading
 import joblib
 import numpy as np
-import pandas as pd
 from model.feature_engineer import FeatureEngineer
+from model.registry import ModelRegistry
 
-MODEL_PATH = os.path.join("models", "nba_xgb_model.pkl")
+# Pickle del wrapper de sklearn generado por versiones anteriores del Trainer
+LEGACY_MODEL_PATH = os.path.join("models", "nba_xgb_model.pkl")
 
 class Predictor:
     """
     Clase para realizar predicciones con el modelo entrenado
     """
     
-    def __init__(self):
-        """Carga el modelo entrenado"""
-        if not os.path.exists(MODEL_PATH):
+    def __init__(self, version=None, registry=None):
+        """
+        Carga el modelo entrenado
+        
+        Args:
+            version: Versión del registro a cargar (default: la activa)
+            registry: ModelRegistry a usar (default: models/)
+        """
+        self.registry = registry or ModelRegistry()
+        self.engineer = FeatureEngineer()
+        feature_names = self.engineer.get_feature_names()
+        self.n_features = len(feature_names)
+        
+        version = version or self.registry.get_current_version()
+        
+        if version is not None:
+            # Booster nativo (UBJSON): sin sklearn ni pickle
+            self.booster, self.metadata = self.registry.load(version)
+            self.model_path = self.registry.model_path(version)
+        elif os.path.exists(LEGACY_MODEL_PATH):
+            self.booster = joblib.load(LEGACY_MODEL_PATH).get_booster()
+            self.metadata = {'version': 'legacy', 'feature_names': feature_names}
+            self.model_path = LEGACY_MODEL_PATH
+        else:
             raise FileNotFoundError(
-                f" Modelo no encontrado en {MODEL_PATH}. "
+                f" Modelo no encontrado en {self.registry.root}. "
                 "Entrena un modelo primero con POST /train"
             )
         
-        self.model = joblib.load(MODEL_PATH)
-        self.engineer = FeatureEngineer()
+        self.version = self.metadata['version']
+        
+        if self.metadata.get('feature_names', feature_names) != feature_names:
+            raise ValueError(
+                f"El modelo {self.version} fue entrenado con otras features: "
+                f"{self.metadata['feature_names']}"
+            )
         
-        print(f" Modelo cargado desde {MODEL_PATH}")
+        # inplace_predict sobre float32 evita DMatrix y pandas
+        best_iteration = self.booster.attr('best_iteration')
+        self.iteration_range = (0, int(best_iteration) + 1) if best_iteration is not None else (0, 0)
+        
+        # Un buffer (1 x F) por hilo: FastAPI atiende /predict en un threadpool
+        self._local = threading.local()
+        
+        print(f" Modelo {self.version} cargado desde {self.model_path}")
     
-    def predict(self, game_data):
+    def predict(self, game_data, batcher=None):
         """
         Predice el ganador de un partido
         
         Args:
+            batcher: MicroBatcher opcional; si se pasa, la fila se agrupa
+                con otros requests concurrentes en una sola inferencia
             game_data: Dict con estructura:
                 {
                     'home': {
@@ -60,48 +97,23 @@ class Predictor:
                     'predicted_winner': 'LAL',
                     'home_win_probability': 0.65,
                     'away_win_probability': 0.35,
-                    'confidence': 0.65
+                    'confidence': 0.65,
+                    'model_version': 'v20250101-120000'
                 }
         """
         try:
-            print(f"\n Prediciendo: {game_data['home']['abbreviation']} vs {game_data['away']['abbreviation']}")
-            
-            # 1. Construir features desde datos de APIs
-            features = self.engineer.build_features_from_api(
-                game_data['home'], 
-                game_data['away']
-            )
-            
-            # 2. Convertir a DataFrame con nombres de columnas correctos
-            feature_names = self.engineer.get_feature_names()
-            X = pd.DataFrame([features], columns=feature_names)
-            
-            print(f" Features construidos: {X.shape}")
-            print(f" Valores: {features}")
-            
-            # 3. Predecir
-            prediction = self.model.predict(X)[0]
-            probabilities = self.model.predict_proba(X)[0]
-            
-            # prediction = 1 significa que gana el equipo local (home)
-            # prediction = 0 significa que gana el equipo visitante (away)
-            
-            home_win_prob = float(probabilities[1])
-            away_win_prob = float(probabilities[0])
-            
-            predicted_winner = game_data['home']['abbreviation'] if prediction == 1 else game_data['away']['abbreviation']
-            confidence = max(home_win_prob, away_win_prob)
+            # 1. Escribir features en el buffer preasignado (sin pandas)
+            row = self._row_buffer()
+            self.engineer.fill_features_from_api(game_data['home'], game_data['away'], row[0])
+            self._check_finite(row)
             
-            result = {
-                'predicted_winner': predicted_winner,
-                'home_win_probability': home_win_prob,
-                'away_win_probability': away_win_prob,
-                'confidence': confidence
-            }
+            # 2. Una sola inferencia: el ganador se deriva de la probabilidad
+            if batcher is None:
+                home_win_prob = float(self.predict_proba_matrix(row)[0])
+            else:
+                home_win_prob = batcher.submit(self, row).result(timeout=batcher.result_timeout)
             
-            print(f" Predicción: {predicted_winner} (Confianza: {confidence:.2%})")
-            
-            return result
+            return self._build_result(game_data, home_win_prob)
             
         except Exception as e:
             print(f" Error en predicción: {e}")
@@ -109,28 +121,97 @@ class Predictor:
     
     def predict_batch(self, games_data):
         """
-        Predice múltiples partidos
+        Predice múltiples partidos con una sola inferencia
+        
+        Construye una matriz de features (N x F) con todos los partidos
+        válidos y hace una única inferencia sobre el Booster. Los partidos con
+        datos inválidos devuelven un error propio sin afectar al resto.
         
         Args:
             games_data: Lista de dicts con estructura game_data
         
         Returns:
-            Lista de predicciones
+            Lista de predicciones en el mismo orden que games_data
         """
-        predictions = []
+        predictions = [None] * len(games_data)
+        X = np.empty((len(games_data), self.n_features), dtype=np.float32)
+        valid_indexes = []
         
-        for game in games_data:
+        # 1. Escribir una fila por partido, aislando errores por item
+        for i, game in enumerate(games_data):
+            row = X[len(valid_indexes)]
             try:
-                pred = self.predict(game)
-                predictions.append(pred)
+                self.engineer.fill_features_from_api(game['home'], game['away'], row)
+                self._check_finite(row)
+                valid_indexes.append(i)
+                
             except Exception as e:
-                print(f" Error prediciendo {game.get('home', {}).get('abbreviation')} vs {game.get('away', {}).get('abbreviation')}: {e}")
-                predictions.append({
-                    'error': str(e),
-                    'predicted_winner': None,
-                    'home_win_probability': None,
-                    'away_win_probability': None,
-                    'confidence': None
-                })
-        
-        return predictions
\ No newline at end of file
+                print(f" Error prediciendo item {i}: {e}")
+                predictions[i] = self._error_result(e)
+        
+        if not valid_indexes:
+            return predictions
+        
+        # 2. Una sola inferencia para toda la matriz
+        home_win_probs = self.predict_proba_matrix(X[:len(valid_indexes)])
+        
+        # 3. Mapear probabilidades de vuelta a cada partido
+        for i, home_win_prob in zip(valid_indexes, home_win_probs):
+            predictions[i] = self._build_result(games_data[i], float(home_win_prob))
+        
+        print(f" Batch: {len(valid_indexes)}/{len(games_data)} partidos predichos")
+        
+        return predictions
+    
+    def predict_proba_matrix(self, X):
+        """
+        Probabilidad de victoria local para una matriz de features
+        
+        Args:
+            X: Array float32 (N x F) en el orden de FeatureEngineer.get_feature_names()
+        
+        Returns:
+            Array (N,) con P(home_win)
+        """
+        return self.booster.inplace_predict(X, iteration_range=self.iteration_range)
+    
+    def _row_buffer(self):
+        """Buffer float32 (1 x F) reutilizable, uno por hilo"""
+        row = getattr(self._local, 'row', None)
+        if row is None:
+            row = np.empty((1, self.n_features), dtype=np.float32)
+            self._local.row = row
+        return row
+    
+    def _check_finite(self, row):
+        """Rechaza features NaN/inf antes de llegar al modelo"""
+        if not np.isfinite(row).all():
+            raise ValueError("features no numéricos o infinitos")
+    
+    def _build_result(self, game_data, home_win_prob):
+        """Construye el dict de predicción a partir de la probabilidad local"""
+        away_win_prob = 1.0 - home_win_prob
+        
+        # Mismo umbral que XGBClassifier.predict (> 0.5 gana el local)
+        if home_win_prob > 0.5:
+            predicted_winner = game_data['home']['abbreviation']
+        else:
+            predicted_winner = game_data['away']['abbreviation']
+        
+        return {
+            'predicted_winner': predicted_winner,
+            'home_win_probability': home_win_prob,
+            'away_win_probability': away_win_prob,
+            'confidence': max(home_win_prob, away_win_prob),
+            'model_version': self.version
+        }
+    
+    def _error_result(self, error):
+        """Resultado vacío para un partido que no se pudo predecir"""
+        return {
+            'error': str(error),
+            'predicted_winner': None,
+            'home_win_probability': None,
+            'away_win_probability': None,
+            'confidence': None
+        }
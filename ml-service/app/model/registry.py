@@ -0,0 +1,157 @@
+# ml-service/app/model/registry.py
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+
+import xgboost as xgb
+
+MODELS_DIR = "models"
+CURRENT_POINTER = "current"
+MODEL_FILENAME = "model.ubj"
+METADATA_FILENAME = "metadata.json"
+
+
+class ModelRegistry:
+    """
+    Registro versionado de modelos en formato nativo de XGBoost
+    
+    Estructura en disco:
+        models/
+            current                  <- texto con la versión activa
+            <version>/model.ubj      <- Booster en UBJSON
+            <version>/metadata.json  <- features, hash de datos, métricas...
+    """
+    
+    def __init__(self, root=MODELS_DIR):
+        """
+        Args:
+            root: Directorio raíz del registro (default: models)
+        """
+        self.root = root
+    
+    def new_version(self):
+        """Genera un identificador de versión único basado en la fecha UTC"""
+        base = datetime.now(timezone.utc).strftime("v%Y%m%d-%H%M%S")
+        version = base
+        suffix = 1
+        while os.path.exists(self.version_dir(version)):
+            version = f"{base}-{suffix}"
+            suffix += 1
+        return version
+    
+    def version_dir(self, version):
+        return os.path.join(self.root, version)
+    
+    def model_path(self, version):
+        return os.path.join(self.version_dir(version), MODEL_FILENAME)
+    
+    def metadata_path(self, version):
+        return os.path.join(self.version_dir(version), METADATA_FILENAME)
+    
+    def save(self, booster, metadata, version=None, activate=True):
+        """
+        Guarda un Booster y su metadata como una nueva versión
+        
+        Se escribe primero en un directorio temporal y se renombra al final,
+        así un lector nunca ve una versión a medio escribir.
+        
+        Args:
+            booster: xgboost.Booster entrenado
+            metadata: Dict con feature_names, data_hash, metrics, etc.
+            version: Versión a usar (default: new_version())
+            activate: Si True, apunta `current` a la nueva versión
+        
+        Returns:
+            Metadata guardada (incluye version, created_at y format)
+        """
+        version = version or self.new_version()
+        metadata = dict(metadata)
+        metadata['version'] = version
+        metadata.setdefault('created_at', datetime.now(timezone.utc).isoformat())
+        metadata['format'] = 'ubj'
+        
+        os.makedirs(self.root, exist_ok=True)
+        tmp_dir = os.path.join(self.root, f".tmp-{version}")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        
+        booster.save_model(os.path.join(tmp_dir, MODEL_FILENAME))
+        with open(os.path.join(tmp_dir, METADATA_FILENAME), 'w') as f:
+            json.dump(metadata, f, indent=2)
+        
+        os.replace(tmp_dir, self.version_dir(version))
+        
+        if activate:
+            self.set_current(version)
+        
+        return metadata
+    
+    def load(self, version=None):
+        """
+        Carga un Booster sin pasar por el wrapper de sklearn ni pickle
+        
+        Args:
+            version: Versión a cargar (default: la apuntada por `current`)
+        
+        Returns:
+            Tupla (booster, metadata)
+        """
+        version = version or self.get_current_version()
+        if version is None:
+            raise FileNotFoundError(f"No hay versión activa en {self.root}")
+        
+        path = self.model_path(version)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Modelo no encontrado: {path}")
+        
+        booster = xgb.Booster()
+        booster.load_model(path)
+        
+        return booster, self.get_metadata(version)
+    
+    def get_metadata(self, version):
+        with open(self.metadata_path(version)) as f:
+            return json.load(f)
+    
+    def get_current_version(self):
+        """Versión activa o None si el registro está vacío"""
+        pointer = os.path.join(self.root, CURRENT_POINTER)
+        if not os.path.exists(pointer):
+            return None
+        
+        with open(pointer) as f:
+            version = f.read().strip()
+        
+        return version or None
+    
+    def set_current(self, version):
+        """Apunta `current` a una versión existente (escritura atómica)"""
+        if not os.path.exists(self.model_path(version)):
+            raise FileNotFoundError(f"Versión no encontrada: {version}")
+        
+        pointer = os.path.join(self.root, CURRENT_POINTER)
+        tmp_pointer = f"{pointer}.tmp"
+        with open(tmp_pointer, 'w') as f:
+            f.write(version)
+        os.replace(tmp_pointer, pointer)
+    
+    def list_versions(self):
+        """Metadata de todas las versiones, de la más reciente a la más antigua"""
+        if not os.path.isdir(self.root):
+            return []
+        
+        versions = []
+        for name in os.listdir(self.root):
+            if name.startswith('.') or not os.path.exists(self.metadata_path(name)):
+                continue
+            versions.append(self.get_metadata(name))
+        
+        return sorted(versions, key=lambda m: m.get('created_at', ''), reverse=True)
+    
+    def find_by_fingerprint(self, fingerprint):
+        """Metadata de la versión más reciente con esa huella, o None"""
+        for metadata in self.list_versions():
+            if metadata.get('fingerprint') == fingerprint:
+                return metadata
+        return None
@@ -0,0 +1,227 @@
+# ml-service/app/model/simulator.py
+"""
+Simulador Monte Carlo de temporadas
+
+1. Matriz de probabilidades P[i, j] = P(gana el local i contra el visitante j)
+   para todos los cruces posibles, en una sola llamada al modelo.
+2. Cada partido pendiente toma su probabilidad de esa matriz y se simulan
+   miles de temporadas a la vez con sorteos Bernoulli vectorizados
+   (matriz temporadas x partidos), repartidos en chunks entre los procesos
+   de un pool persistente (solo si el trabajo es grande: en simulaciones
+   chicas el IPC cuesta más que el sorteo).
+3. Cada chunk devuelve solo contadores (histograma de victorias, puestos
+   por conferencia), que se suman al final.
+"""
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from utils.season_chunks import simulate_chunk
+
+DEFAULT_SEASONS = 100_000
+SEASONS_PER_CHUNK = 10_000
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
+# Sorteos (temporadas x partidos) a partir de los que conviene usar el pool;
+# por debajo se simula en el proceso (~0.2s para 50k x 800)
+PARALLEL_MIN_DRAWS = 200_000_000
+
+# Puestos de playoff directo y de play-in por conferencia
+PLAYOFF_SEEDS = 6
+PLAY_IN_SEEDS = 10
+
+# Conferencias NBA (abreviaturas de NBA Stats)
+CONFERENCES = {
+    'ATL': 'East', 'BOS': 'East', 'BKN': 'East', 'CHA': 'East', 'CHI': 'East',
+    'CLE': 'East', 'DET': 'East', 'IND': 'East', 'MIA': 'East', 'MIL': 'East',
+    'NYK': 'East', 'ORL': 'East', 'PHI': 'East', 'TOR': 'East', 'WAS': 'East',
+    'DAL': 'West', 'DEN': 'West', 'GSW': 'West', 'HOU': 'West', 'LAC': 'West',
+    'LAL': 'West', 'MEM': 'West', 'MIN': 'West', 'NOP': 'West', 'OKC': 'West',
+    'PHX': 'West', 'POR': 'West', 'SAC': 'West', 'SAS': 'West', 'UTA': 'West'
+}
+
+
+def create_pool(workers=DEFAULT_WORKERS):
+    """
+    Pool de procesos para los chunks de temporadas (crear una vez y reutilizar)
+    
+    Los procesos se crean con spawn e importan solo utils.season_chunks.
+    
+    Returns:
+        ProcessPoolExecutor o None si workers <= 1
+    """
+    if workers <= 1:
+        return None
+    return ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context('spawn'))
+
+
+def current_wins(records, abbr):
+    """
+    Victorias actuales de un equipo en `records`
+    
+    Raises:
+        ValueError: si el récord no es un dict o 'wins' no es un entero >= 0
+    """
+    record = records.get(abbr, {})
+    if not isinstance(record, dict):
+        raise ValueError(f"Récord inválido para {abbr}: se espera {{'wins': W, 'losses': L}}")
+    
+    wins = record.get('wins', 0)
+    if isinstance(wins, bool) or not isinstance(wins, (int, np.integer)) or wins < 0:
+        raise ValueError(f"Victorias inválidas para {abbr}: {wins!r}")
+    return int(wins)
+
+
+class SeasonSimulator:
+    """
+    Simula el resto de la temporada con las probabilidades del modelo activo
+    """
+    
+    def __init__(self, predictor, workers=DEFAULT_WORKERS, pool=None):
+        """
+        Args:
+            predictor: Predictor cargado (se usa su booster y su FeatureEngineer)
+            workers: Procesos para repartir los chunks de temporadas
+            pool: Pool compartido (create_pool); sin pool se crea uno por simulación
+        """
+        self.predictor = predictor
+        self.engineer = predictor.engineer
+        self.workers = max(1, workers)
+        self.pool = pool
+    
+    def matchup_matrix(self, teams):
+        """
+        P(gana el local) para cada par (local, visitante) en una sola inferencia
+        
+        Args:
+            teams: Lista de dicts de equipo (misma estructura que en /predict)
+        
+        Returns:
+            Array (N x N) con P[i, j] = P(el local i gana al visitante j); diagonal NaN
+        """
+        n = len(teams)
+        X = np.empty((n * n, self.predictor.n_features), dtype=np.float32)
+        for i, home in enumerate(teams):
+            for j, away in enumerate(teams):
+                self.engineer.fill_features_from_api(home, away, X[i * n + j])
+        
+        if not np.isfinite(X).all():
+            raise ValueError("features no numéricos o infinitos en algún equipo")
+        
+        probs = np.asarray(self.predictor.predict_proba_matrix(X), dtype=np.float32).reshape(n, n)
+        np.fill_diagonal(probs, np.nan)
+        return probs
+    
+    def simulate(self, teams, schedule, records=None, n_seasons=DEFAULT_SEASONS,
+                 seed=None, conferences=None):
+        """
+        Simula `n_seasons` veces los partidos pendientes
+        
+        Args:
+            teams: Lista de dicts de equipo con 'abbreviation'
+            schedule: Partidos pendientes como pares (local, visitante) de abreviaturas
+            records: Récord actual {abreviatura: {'wins': W, 'losses': L}}
+            n_seasons: Temporadas a simular
+            seed: Semilla (mismo seed = mismo resultado)
+            conferences: {abreviatura: conferencia} (default: CONFERENCES)
+        
+        Returns:
+            Dict con distribución de victorias, probabilidades de puesto y de playoffs por equipo
+        """
+        started = time.perf_counter()
+        records = records or {}
+        conferences = conferences or CONFERENCES
+        
+        abbreviations = [team['abbreviation'] for team in teams]
+        index = {abbr: i for i, abbr in enumerate(abbreviations)}
+        
+        unknown = sorted({abbr for game in schedule for abbr in game if abbr not in index})
+        if unknown:
+            raise ValueError(f"Equipos del calendario sin datos: {unknown}")
+        missing_conf = [abbr for abbr in abbreviations if abbr not in conferences]
+        if missing_conf:
+            raise ValueError(f"Equipos sin conferencia: {missing_conf}")
+        same_team = sorted({home for home, away in schedule if home == away})
+        if same_team:
+            raise ValueError(f"Partidos de un equipo contra sí mismo: {same_team}")
+        
+        base_wins = np.array([current_wins(records, abbr) for abbr in abbreviations], dtype=np.int32)
+        
+        home_idx = np.array([index[home] for home, _ in schedule], dtype=np.int64)
+        away_idx = np.array([index[away] for _, away in schedule], dtype=np.int64)
+        
+        # 1. Todas las probabilidades en una sola llamada al modelo
+        probs = self.matchup_matrix(teams)
+        game_probs = probs[home_idx, away_idx]
+        
+        conference_names = sorted({conferences[abbr] for abbr in abbreviations})
+        conference_idx = np.array([conference_names.index(conferences[abbr]) for abbr in abbreviations])
+        
+        # 2. Chunks de temporadas con semillas independientes (SeedSequence.spawn)
+        chunk_sizes = [SEASONS_PER_CHUNK] * (n_seasons // SEASONS_PER_CHUNK)
+        if n_seasons % SEASONS_PER_CHUNK:
+            chunk_sizes.append(n_seasons % SEASONS_PER_CHUNK)
+        seeds = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+        
+        args = (game_probs, home_idx, away_idx, base_wins, conference_idx, len(conference_names))
+        
+        parallel = self.workers > 1 and len(chunk_sizes) > 1 and n_seasons * len(schedule) >= PARALLEL_MIN_DRAWS
+        
+        if not parallel:
+            results = [simulate_chunk(s, size, *args) for s, size in zip(seeds, chunk_sizes)]
+        elif self.pool is not None:
+            futures = [self.pool.submit(simulate_chunk, s, size, *args) for s, size in zip(seeds, chunk_sizes)]
+            results = [future.result() for future in futures]
+        else:
+            with create_pool(self.workers) as executor:
+                futures = [executor.submit(simulate_chunk, s, size, *args) for s, size in zip(seeds, chunk_sizes)]
+                results = [future.result() for future in futures]
+        
+        win_hist = sum(r[0] for r in results)
+        seed_counts = sum(r[1] for r in results)
+        best_record = sum(r[2] for r in results)
+        
+        # 3. Resumen por equipo
+        win_values = np.arange(win_hist.shape[1])
+        win_cdf = np.cumsum(win_hist, axis=1) / n_seasons
+        
+        summary = []
+        for t, abbr in enumerate(abbreviations):
+            n_members = int((conference_idx == conference_idx[t]).sum())
+            seed_probs = seed_counts[t, :n_members] / n_seasons
+            
+            summary.append({
+                'team': abbr,
+                'conference': conferences[abbr],
+                'current_wins': int(base_wins[t]),
+                'remaining_games': int((home_idx == t).sum() + (away_idx == t).sum()),
+                'expected_wins': float(win_hist[t] @ win_values / n_seasons),
+                'wins_p10': int(np.searchsorted(win_cdf[t], 0.10)),
+                'wins_p50': int(np.searchsorted(win_cdf[t], 0.50)),
+                'wins_p90': int(np.searchsorted(win_cdf[t], 0.90)),
+                'win_distribution': {
+                    int(w): float(c / n_seasons) for w, c in zip(win_values, win_hist[t]) if c
+                },
+                'seed_probabilities': [float(p) for p in seed_probs],
+                'playoff_probability': float(seed_probs[:PLAYOFF_SEEDS].sum()),
+                'play_in_probability': float(seed_probs[PLAYOFF_SEEDS:PLAY_IN_SEEDS].sum()),
+                'top_seed_probability': float(seed_probs[0]),
+                'best_record_probability': float(best_record[t] / n_seasons)
+            })
+        
+        summary.sort(key=lambda s: (s['conference'], -s['expected_wins']))
+        
+        elapsed = time.perf_counter() - started
+        print(f" Simulación: {n_seasons} temporadas x {len(schedule)} partidos en {elapsed:.2f}s")
+        
+        return {
+            'n_seasons': n_seasons,
+            'n_games': len(schedule),
+            'seed': seed,
+            'model_version': self.predictor.version,
+            'teams': summary,
+            'elapsed_seconds': round(elapsed, 3)
+        }
@@ -1,78 +1,268 @@
 # ml-service/app/model/trainer.py
+import numpy as np
 import pandas as pd
+import hashlib
+import json
 import os
-import joblib
+import time
+import xgboost as xgb
 from xgboost import XGBClassifier
+from xgboost.callback import TrainingCallback
 from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score, roc_auc_score, classification_report, confusion_matrix
+from sklearn.metrics import accuracy_score, roc_auc_score, log_loss, classification_report, confusion_matrix
 from model.feature_engineer import FeatureEngineer
+from model.registry import ModelRegistry
+from data.feature_store import FeatureStore
+from data.loader import read_columns, read_games, DEFAULT_CHUNK_ROWS
+from model.data_iter import GameBatchIter
+from utils.helpers import file_sha256
+
+# Hiperparámetros por defecto del XGBClassifier
+DEFAULT_PARAMS = {
+    'n_estimators': 500,
+    'max_depth': 6,
+    'learning_rate': 0.05,
+    'subsample': 0.8,
+    'colsample_bytree': 0.8,
+    'eval_metric': 'logloss',
+    'early_stopping_rounds': 30
+}
+
+# Columnas para detectar partidos nuevos, en orden de preferencia
+WATERMARK_COLUMNS = ['game_id', 'game_date']
+
+# Identifican un partido dentro de un día (un equipo juega como mucho una vez por día)
+GAME_KEY_COLUMNS = ['home_team', 'away_team']
+
+# Entrenamiento incremental: rondas extra y tolerancia de degradación del logloss
+INCREMENTAL_ROUNDS = 20
+INCREMENTAL_TOLERANCE = 0.02
+
+# Entrenamiento por chunks (QuantileDMatrix / memoria externa)
+EXTERNAL_MAX_BIN = 256
+EXTERNAL_CACHE_DIR = os.path.join("data", "cache", "xgb")
+
+class ProgressCallback(TrainingCallback):
+    """Reporta las métricas de evaluación de cada ronda de boosting"""
+    
+    def __init__(self, progress):
+        super().__init__()
+        self.progress = progress
+    
+    def after_iteration(self, model, epoch, evals_log):
+        metrics = {
+            data_name: {metric: float(values[-1]) for metric, values in data_log.items()}
+            for data_name, data_log in evals_log.items()
+        }
+        self.progress('round', round=epoch, metrics=metrics)
+        return False
+
+
+class StageTimer:
+    """Mide cuánto dura cada etapa del entrenamiento y la reporta"""
+    
+    def __init__(self, progress):
+        self.progress = progress
+        self.current = None
+        self.started_at = None
+    
+    def mark(self, stage):
+        """Cierra la etapa actual (si hay) y empieza `stage`"""
+        self.finish()
+        self.current = stage
+        self.started_at = time.perf_counter()
+        self.progress('stage_started', stage=stage)
+    
+    def finish(self):
+        if self.current is None:
+            return
+        elapsed = time.perf_counter() - self.started_at
+        self.progress('stage_finished', stage=self.current, seconds=elapsed)
+        self.current = None
+
+
+def _no_progress(event, **data):
+    pass
 
-MODEL_PATH = os.path.join("models", "nba_xgb_model.pkl")
 
 class Trainer:
     """
     Clase para entrenar el modelo de predicción NBA
     """
     
-    def __init__(self, data_csv="data/nba_games_clean.csv"):
+    def __init__(self, data_csv="data/nba_games_clean.csv", registry=None, store=None):
         """
         Args:
             data_csv: Ruta al archivo CSV con datos históricos de partidos
+            registry: ModelRegistry donde guardar el modelo (default: models/)
+            store: FeatureStore para el dataset tipado (default: data/cache/games)
         """
         self.data_csv = data_csv
         self.engineer = FeatureEngineer()
+        self.registry = registry or ModelRegistry()
+        self.store = store or FeatureStore()
+        self.data_hash = None
+    
+    def dataset_hash(self):
+        """SHA-256 del CSV (se calcula una sola vez por Trainer)"""
+        if not os.path.exists(self.data_csv):
+            raise FileNotFoundError(f"❌ Dataset no encontrado: {self.data_csv}")
+        
+        if self.data_hash is None:
+            self.data_hash = file_sha256(self.data_csv)
+        return self.data_hash
+    
+    def fingerprint(self, params, test_size):
+        """
+        Huella de un entrenamiento: dataset + spec de features + hiperparámetros
         
-        # Crear directorio de modelos si no existe
-        os.makedirs("models", exist_ok=True)
+        Dos entrenamientos con la misma huella producen el mismo modelo.
+        """
+        payload = {
+            'data_hash': self.dataset_hash(),
+            'feature_spec': self.engineer.spec_hash(),
+            'params': params,
+            'test_size': test_size
+        }
+        encoded = json.dumps(payload, sort_keys=True).encode()
+        return hashlib.sha256(encoded).hexdigest()
     
-    def load_data(self):
-        """Carga el dataset desde CSV"""
+    def load_data(self, columns=None):
+        """
+        Carga el dataset tipado, solo con las columnas que usan las features
+        
+        Args:
+            columns: Columnas extra a leer además de las de las features
+        """
         if not os.path.exists(self.data_csv):
             raise FileNotFoundError(f"❌ Dataset no encontrado: {self.data_csv}")
         
         print(f" Cargando datos desde {self.data_csv}...")
         
-        #  CORRECCIÓN: No especificar parse_dates o usar 'game_date' si existe
-        try:
-            # Intentar con 'date'
-            df = pd.read_csv(self.data_csv, parse_dates=["date"])
-        except ValueError:
-            # Si falla, intentar con 'game_date'
-            try:
-                df = pd.read_csv(self.data_csv, parse_dates=["game_date"])
-            except ValueError:
-                # Si ambos fallan, cargar sin parse_dates
-                df = pd.read_csv(self.data_csv)
+        # Proyección: las columnas que no entran en las features no se leen
+        projection = self.engineer.get_source_columns(read_columns(self.data_csv)) + list(columns or [])
+        
+        # Parseo tipado una sola vez por contenido; luego se lee el Parquet
+        df = self.store.load_games(self.data_csv, content_hash=self.dataset_hash(), columns=projection)
         
-        print(f" {len(df)} partidos cargados")
+        print(f" {len(df)} partidos cargados ({len(df.columns)} columnas, "
+              f"{df.memory_usage(deep=True).sum() / 1e6:.1f} MB)")
         
         return df
     
-    def train(self, test_size=0.2, random_state=42):
+    def chronological_matrix(self, data_hash=None):
+        """
+        Matriz de features ordenada por game_date (folds walk-forward, backtests)
+        
+        Se cachea en el feature store junto con la fecha de cada fila.
+        
+        Args:
+            data_hash: Hash de una versión anterior del dataset (default: la actual);
+                se lee del feature store
+        
+        Returns:
+            Tupla (X float32, y float32, dates datetime64[ns]) en orden cronológico
+        """
+        data_hash = data_hash or self.dataset_hash()
+        key = f"{data_hash[:16]}-{self.engineer.spec_hash()[:16]}-chrono"
+        cached = self.store.load_timeline(key)
+        if cached is not None:
+            print(f" Matriz cronológica desde caché ({key})")
+            return cached
+        
+        if data_hash == self.dataset_hash():
+            df = self.load_data(columns=['game_date', 'game_id'])
+        else:
+            source = self.store.dataset_path(data_hash)
+            if not os.path.exists(source):
+                raise FileNotFoundError(f"❌ Dataset {data_hash[:16]} no está en el feature store")
+            columns = self.engineer.get_source_columns(read_columns(source)) + ['game_date', 'game_id']
+            df = read_games(source, columns=columns)
+        if 'game_date' not in df.columns:
+            raise ValueError("❌ El dataset no tiene game_date: no se puede ordenar cronológicamente")
+        
+        sort_columns = ['game_date'] + (['game_id'] if 'game_id' in df.columns else [])
+        df = df.sort_values(sort_columns, kind='mergesort')
+        
+        features = self.engineer.build_features_from_csv(df, verbose=False)
+        X = features[self.engineer.get_feature_names()].to_numpy(dtype=np.float32)
+        y = features['winner'].to_numpy(dtype=np.float32)
+        dates = df['game_date'].to_numpy(dtype='datetime64[ns]')
+        
+        self.store.save_timeline(key, X, y, dates)
+        return X, y, dates
+    
+    def train(self, test_size=0.2, random_state=42, n_jobs=-1, progress=None, force=False, params=None,
+              chronological=False):
         """
         Entrena el modelo XGBoost
         
+        Si ya existe un modelo con la misma huella (dataset, features e
+        hiperparámetros) se devuelve ese modelo sin entrenar. Si solo
+        cambiaron los hiperparámetros se reutiliza la matriz de features.
+        
         Args:
             test_size: Proporción de datos para validación (default: 0.2)
             random_state: Semilla para reproducibilidad (default: 42)
+            n_jobs: Hilos de XGBoost (default: -1, todos los cores)
+            progress: Callback opcional progress(event, **data) para reportar
+                etapas ('stage_started', 'stage_finished') y rondas ('round')
+            force: Entrenar aunque exista un modelo con la misma huella
+            params: Hiperparámetros que reemplazan a DEFAULT_PARAMS (ej: los del tuner)
+            chronological: Validar (y hacer early stopping) con el último `test_size`
+                de los partidos por game_date en vez de un split aleatorio estratificado
         
         Returns:
-            Modelo entrenado
+            Metadata de la versión registrada (con reused=True si no se entrenó)
         """
         print("\n" + "="*60)
         print("🎓 INICIANDO ENTRENAMIENTO")
         print("="*60 + "\n")
         
-        # 1. Cargar datos
-        df = self.load_data()
+        progress = progress or _no_progress
+        stages = StageTimer(progress)
         
-        # 2. Feature engineering
-        print("\n🔧 Aplicando feature engineering...")
-        features = self.engineer.build_features_from_csv(df)
+        # 0. Huella del entrenamiento: si ya existe ese modelo, no reentrenar
+        stages.mark('fingerprint')
+        params = dict(DEFAULT_PARAMS, **(params or {}), random_state=random_state)
+        split = 'chronological' if chronological else 'stratified'
+        fingerprint = self.fingerprint(dict(params, split=split) if chronological else params, test_size)
         
-        # 3. Separar features y target
-        X = features.drop(columns=["winner"])
-        y = features["winner"].astype(int)
+        existing = None if force else self.registry.find_by_fingerprint(fingerprint)
+        if existing is not None:
+            stages.finish()
+            print(f" Modelo {existing['version']} ya entrenado con estos datos y parámetros")
+            print(" Se reutiliza sin entrenar (usa force=True para reentrenar)\n")
+            return dict(existing, reused=True)
+        
+        # 1-3. Matriz de features: desde caché si dataset y spec no cambiaron
+        matrix_key = f"{self.dataset_hash()[:16]}-{self.engineer.spec_hash()[:16]}"
+        cached = None if chronological else self.store.load_matrix(matrix_key)
+        
+        if chronological:
+            stages.mark('load_matrix')
+            X, y, _ = self.chronological_matrix()
+            X = pd.DataFrame(X, columns=self.engineer.get_feature_names())
+            y = pd.Series(y, name='winner').astype(int)
+        elif cached is not None:
+            stages.mark('load_matrix')
+            X, y = cached
+            print(f" Matriz de features desde caché ({matrix_key})")
+        else:
+            # 1. Cargar datos
+            stages.mark('load_data')
+            df = self.load_data()
+            
+            # 2. Feature engineering
+            stages.mark('feature_engineering')
+            print("\n🔧 Aplicando feature engineering...")
+            features = self.engineer.build_features_from_csv(df)
+            
+            # 3. Separar features y target
+            X = features.drop(columns=["winner"])
+            y = features["winner"].astype(int)
+            
+            self.store.save_matrix(matrix_key, X, y)
         
         print(f"\n Features shape: {X.shape}")
         print(f" Distribución de clases:")
@@ -80,43 +270,31 @@ class Trainer:
         print(f"   - Away wins: {len(y) - y.sum()} ({1 - y.mean():.1%})")
         
         # 4. Split train/validation
-        X_train, X_val, y_train, y_val = train_test_split(
-            X, y, 
-            test_size=test_size, 
-            random_state=random_state, 
-            stratify=y
-        )
+        stages.mark('split')
+        if chronological:
+            # Los partidos más recientes validan: ningún partido futuro entra al fit
+            n_val = chronological_holdout(len(X), test_size)
+            X_train, X_val = X.iloc[:-n_val], X.iloc[-n_val:]
+            y_train, y_val = y.iloc[:-n_val], y.iloc[-n_val:]
+        else:
+            X_train, X_val, y_train, y_val = train_test_split(
+                X, y, 
+                test_size=test_size, 
+                random_state=random_state, 
+                stratify=y
+            )
         
         print(f"\n Train set: {len(X_train)} partidos")
         print(f" Validation set: {len(X_val)} partidos")
         
         # 5. Entrenar modelo XGBoost
+        stages.mark('fit')
         print("\n Entrenando XGBoost...")
         
         model = XGBClassifier(
-            n_estimators=500,
-            max_depth=6,
-            learning_rate=0.05,
-            subsample=0.8,
-            colsample_bytree=0.8,
-            use_label_encoder=False,
-            eval_metric='logloss',
-            random_state=random_state,
-            n_jobs=-1
-        )
-        
-        #  CORRECCIÓN: early_stopping_rounds ahora va en el constructor
-        model = XGBClassifier(
-            n_estimators=500,
-            max_depth=6,
-            learning_rate=0.05,
-            subsample=0.8,
-            colsample_bytree=0.8,
-            use_label_encoder=False,
-            eval_metric='logloss',
-            random_state=random_state,
-            n_jobs=-1,
-            early_stopping_rounds=30  
+            **params,
+            n_jobs=n_jobs,
+            callbacks=[ProgressCallback(progress)]
         )
         
         model.fit(
@@ -126,6 +304,7 @@ class Trainer:
         )
         
         # 6. Evaluar modelo
+        stages.mark('evaluate')
         print("\n" + "="*60)
         print(" EVALUACIÓN DEL MODELO")
         print("="*60 + "\n")
@@ -143,6 +322,7 @@ class Trainer:
         
         train_auc = roc_auc_score(y_train, train_proba)
         val_auc = roc_auc_score(y_val, val_proba)
+        val_logloss = log_loss(y_val, val_proba)
         
         print(f" Train Accuracy: {train_acc:.4f}")
         print(f" Val Accuracy:   {val_acc:.4f}")
@@ -167,16 +347,468 @@ class Trainer:
         
         print(feature_importance.head(10).to_string(index=False))
         
-        # 7. Guardar modelo
-        print(f"\n Guardando modelo en {MODEL_PATH}...")
-        joblib.dump(model, MODEL_PATH)
-        print(" Modelo guardado exitosamente")
+        # 7. Guardar modelo (Booster nativo + metadata)
+        stages.mark('save')
+        watermark_df = self.store.load_games(
+            self.data_csv, content_hash=self.dataset_hash(), columns=WATERMARK_COLUMNS + GAME_KEY_COLUMNS
+        )
+        metadata = {
+            'mode': 'full',
+            'feature_names': X.columns.tolist(),
+            'data_path': self.data_csv,
+            'data_hash': self.dataset_hash(),
+            'feature_spec': self.engineer.spec_hash(),
+            'fingerprint': fingerprint,
+            'watermark': compute_watermark(watermark_df),
+            'validation': {
+                'data_hash': self.dataset_hash(),
+                'split': split,
+                'test_size': test_size,
+                'random_state': random_state
+            },
+            'parent_version': None,
+            'lineage': [],
+            'params': params,
+            'metrics': {
+                'train_accuracy': float(train_acc),
+                'val_accuracy': float(val_acc),
+                'train_auc': float(train_auc),
+                'val_auc': float(val_auc),
+                'val_logloss': float(val_logloss),
+                'best_iteration': int(model.best_iteration),
+                'n_train': len(X_train),
+                'n_val': len(X_val)
+            }
+        }
+        
+        print(f"\n Guardando modelo en {self.registry.root}/...")
+        metadata = self.registry.save(model.get_booster(), metadata)
+        print(f" Modelo guardado como versión {metadata['version']}")
+        stages.finish()
         
         print("\n" + "="*60)
         print(" ENTRENAMIENTO COMPLETADO")
         print("="*60 + "\n")
         
-        return model
+        return metadata
+    
+    def train_external(self, test_size=0.2, random_state=42, n_jobs=-1, progress=None, force=False,
+                       chunk_rows=DEFAULT_CHUNK_ROWS, external_memory=False, max_bin=EXTERNAL_MAX_BIN):
+        """
+        Entrena leyendo el dataset por chunks, sin cargarlo completo en RAM
+        
+        Los chunks se convierten a features y se entregan a XGBoost por un
+        DataIter: con QuantileDMatrix solo queda en memoria la matriz
+        cuantizada (1 byte por celda con max_bin <= 256); con
+        external_memory=True las páginas se guardan en disco. Usa siempre
+        tree_method='hist'. El split de validación es determinista por
+        posición de fila (ver validation_mask).
+        
+        Args:
+            test_size: Proporción de datos para validación (default: 0.2)
+            random_state: Semilla para reproducibilidad (default: 42)
+            n_jobs: Hilos de XGBoost (default: -1, todos los cores)
+            progress: Callback opcional progress(event, **data)
+            force: Entrenar aunque exista un modelo con la misma huella
+            chunk_rows: Filas por chunk leídas del dataset
+            external_memory: Guardar las páginas en disco en vez de en memoria
+            max_bin: Bins del histograma por feature
+        
+        Returns:
+            Metadata de la versión registrada (con reused=True si no se entrenó)
+        """
+        print("\n" + "="*60)
+        print("🎓 ENTRENAMIENTO POR CHUNKS (hist)")
+        print("="*60 + "\n")
+        
+        progress = progress or _no_progress
+        stages = StageTimer(progress)
+        
+        # 0. Huella: tree_method y max_bin forman parte de los parámetros; el modo
+        # (memoria externa o no) y el tamaño de chunk cambian el sketch de cuantiles
+        stages.mark('fingerprint')
+        params = dict(DEFAULT_PARAMS, random_state=random_state, tree_method='hist', max_bin=max_bin)
+        fingerprint = self.fingerprint(
+            dict(params, external_memory=external_memory, chunk_rows=chunk_rows), test_size
+        )
+        
+        existing = None if force else self.registry.find_by_fingerprint(fingerprint)
+        if existing is not None:
+            stages.finish()
+            print(f" Modelo {existing['version']} ya entrenado con estos datos y parámetros")
+            print(" Se reutiliza sin entrenar (usa force=True para reentrenar)\n")
+            return dict(existing, reused=True)
+        
+        # 1. Iteradores sobre el dataset (Parquet del feature store si ya existe)
+        stages.mark('build_matrix')
+        source = self.store.dataset_source(self.data_csv, content_hash=self.dataset_hash())
+        columns = self.engineer.get_source_columns(read_columns(source))
+        print(f" Leyendo {source} en chunks de {chunk_rows} filas...")
+        
+        cache_prefix = None
+        if external_memory:
+            os.makedirs(EXTERNAL_CACHE_DIR, exist_ok=True)
+            cache_prefix = os.path.join(EXTERNAL_CACHE_DIR, self.dataset_hash()[:16])
+        
+        train_iter = GameBatchIter(source, self.engineer, 'train', test_size, columns,
+                                   chunk_rows, cache_prefix=cache_prefix and f"{cache_prefix}-train")
+        val_iter = GameBatchIter(source, self.engineer, 'validation', test_size, columns,
+                                 chunk_rows, cache_prefix=cache_prefix and f"{cache_prefix}-val")
+        
+        if external_memory:
+            dtrain = xgb.DMatrix(train_iter, nthread=n_jobs)
+            dval = xgb.DMatrix(val_iter, nthread=n_jobs)
+        else:
+            dtrain = xgb.QuantileDMatrix(train_iter, max_bin=max_bin, nthread=n_jobs)
+            dval = xgb.QuantileDMatrix(val_iter, ref=dtrain, max_bin=max_bin, nthread=n_jobs)
+        
+        print(f"\n Train set: {dtrain.num_row()} partidos")
+        print(f" Validation set: {dval.num_row()} partidos")
+        
+        # 2. Entrenar con la API nativa (mismos hiperparámetros que train())
+        stages.mark('fit')
+        print("\n Entrenando XGBoost (hist)...")
+        
+        booster_params = {
+            'objective': 'binary:logistic',
+            'eval_metric': params['eval_metric'],
+            'max_depth': params['max_depth'],
+            'learning_rate': params['learning_rate'],
+            'subsample': params['subsample'],
+            'colsample_bytree': params['colsample_bytree'],
+            'tree_method': 'hist',
+            'max_bin': max_bin,
+            'seed': random_state,
+            'nthread': n_jobs
+        }
+        
+        booster = xgb.train(
+            booster_params,
+            dtrain,
+            num_boost_round=params['n_estimators'],
+            evals=[(dval, 'validation_0')],
+            early_stopping_rounds=params['early_stopping_rounds'],
+            callbacks=[ProgressCallback(progress)],
+            verbose_eval=50
+        )
+        best_iteration = booster.best_iteration
+        
+        # 3. Evaluar en validación
+        stages.mark('evaluate')
+        y_val = dval.get_label().astype(int)
+        val_proba = booster.predict(dval, iteration_range=(0, best_iteration + 1))
+        
+        val_acc = accuracy_score(y_val, (val_proba > 0.5).astype(int))
+        val_auc = roc_auc_score(y_val, val_proba)
+        val_logloss = log_loss(y_val, val_proba, labels=[0, 1])
+        
+        print(f" Val Accuracy:   {val_acc:.4f}")
+        print(f" Val AUC:        {val_auc:.4f}")
+        print(f" Val Logloss:    {val_logloss:.4f}")
+        
+        # 4. Guardar modelo
+        stages.mark('save')
+        watermark_df = read_games(source, columns=WATERMARK_COLUMNS + GAME_KEY_COLUMNS, chunk_rows=chunk_rows)
+        metadata = {
+            'mode': 'external' if external_memory else 'quantile',
+            'feature_names': self.engineer.get_feature_names(),
+            'data_path': self.data_csv,
+            'data_hash': self.dataset_hash(),
+            'feature_spec': self.engineer.spec_hash(),
+            'fingerprint': fingerprint,
+            'watermark': compute_watermark(watermark_df),
+            'validation': {
+                'data_hash': self.dataset_hash(),
+                'split': 'position',
+                'test_size': test_size
+            },
+            'parent_version': None,
+            'lineage': [],
+            'params': params,
+            'metrics': {
+                'val_accuracy': float(val_acc),
+                'val_auc': float(val_auc),
+                'val_logloss': float(val_logloss),
+                'best_iteration': int(best_iteration),
+                'n_train': int(dtrain.num_row()),
+                'n_val': int(dval.num_row())
+            }
+        }
+        
+        print(f"\n Guardando modelo en {self.registry.root}/...")
+        metadata = self.registry.save(booster, metadata)
+        print(f" Modelo guardado como versión {metadata['version']}")
+        stages.finish()
+        
+        return metadata
+    
+    def validation_matrix(self, validation):
+        """
+        Filas de validación de un modelo ya registrado (nunca vistas en su entrenamiento)
+        
+        Repite el split original sobre el dataset de ese momento, que sigue en
+        el feature store bajo su hash aunque el CSV haya crecido después.
+        
+        Args:
+            validation: Registro 'validation' de la metadata del modelo
+        
+        Returns:
+            DMatrix de validación o None si ese dataset ya no está disponible
+        """
+        if not validation:
+            return None
+        
+        data_hash = validation['data_hash']
+        source = self.store.dataset_path(data_hash)
+        if not os.path.exists(source):
+            if data_hash != self.dataset_hash():
+                return None
+            source = self.store.dataset_source(self.data_csv, content_hash=data_hash)
+        columns = self.engineer.get_source_columns(read_columns(source))
+        
+        # train_external: validación por posición de fila (validation_mask)
+        if validation['split'] == 'position':
+            os.makedirs(EXTERNAL_CACHE_DIR, exist_ok=True)
+            cache_prefix = os.path.join(EXTERNAL_CACHE_DIR, f"{data_hash[:16]}-holdout")
+            val_iter = GameBatchIter(source, self.engineer, 'validation', validation['test_size'],
+                                     columns, cache_prefix=cache_prefix)
+            return xgb.DMatrix(val_iter)
+        
+        # train(chronological=True): los partidos más recientes de ese dataset
+        if validation['split'] == 'chronological':
+            X, y, _ = self.chronological_matrix(data_hash)
+            n_val = chronological_holdout(len(X), validation['test_size'])
+            return xgb.DMatrix(X[-n_val:], label=y[-n_val:], feature_names=self.engineer.get_feature_names())
+        
+        # train: mismo train_test_split estratificado sobre la misma matriz
+        cached = self.store.load_matrix(f"{data_hash[:16]}-{self.engineer.spec_hash()[:16]}")
+        if cached is not None:
+            X, y = cached
+        else:
+            features = self.engineer.build_features_from_csv(read_games(source, columns=columns), verbose=False)
+            X = features.drop(columns=["winner"])
+            y = features["winner"].astype(int)
+        
+        _, X_val, _, y_val = train_test_split(
+            X, y,
+            test_size=validation['test_size'],
+            random_state=validation['random_state'],
+            stratify=y
+        )
+        return xgb.DMatrix(X_val, label=y_val)
+    
+    def train_incremental(self, test_size=0.2, random_state=42, n_jobs=-1, progress=None,
+                          rounds=INCREMENTAL_ROUNDS, tolerance=INCREMENTAL_TOLERANCE):
+        """
+        Continúa el boosting del modelo activo con los partidos nuevos
+        
+        Detecta las filas posteriores al watermark del modelo activo y
+        agrega `rounds` árboles entrenados sobre ellas. Padre e incremental se
+        comparan en las filas de validación del padre (ninguno las vio); si el
+        logloss empeora más de `tolerance` (relativo), o esas filas ya no
+        están, hace un reentrenamiento completo.
+        
+        Args:
+            test_size: Proporción de validación si se hace un reentrenamiento completo
+            random_state: Semilla para reproducibilidad (default: 42)
+            n_jobs: Hilos de XGBoost (default: -1, todos los cores)
+            progress: Callback opcional progress(event, **data)
+            rounds: Árboles a agregar sobre el modelo existente
+            tolerance: Aumento relativo de logloss tolerado antes de reentrenar
+        
+        Returns:
+            Metadata de la versión registrada
+        """
+        print("\n" + "="*60)
+        print("🎓 ENTRENAMIENTO INCREMENTAL")
+        print("="*60 + "\n")
+        
+        progress = progress or _no_progress
+        stages = StageTimer(progress)
+        
+        def full_refit(reason):
+            stages.finish()
+            print(f" {reason}: se hace un entrenamiento completo\n")
+            return self.train(test_size=test_size, random_state=random_state,
+                              n_jobs=n_jobs, progress=progress, force=True)
+        
+        # 1. Modelo padre y su watermark
+        stages.mark('load_parent')
+        parent_version = self.registry.get_current_version()
+        if parent_version is None:
+            return full_refit("No hay modelo activo")
+        
+        parent, parent_meta = self.registry.load(parent_version)
+        watermark = parent_meta.get('watermark')
+        
+        if watermark is None:
+            return full_refit(f"El modelo {parent_version} no tiene watermark")
+        if parent_meta.get('feature_spec') != self.engineer.spec_hash():
+            return full_refit(f"El modelo {parent_version} usa otro spec de features")
+        
+        # 2. Datos y partidos nuevos desde el watermark
+        stages.mark('load_data')
+        df = self.load_data(columns=WATERMARK_COLUMNS + GAME_KEY_COLUMNS)
+        
+        if watermark['column'] not in df.columns:
+            return full_refit(f"El dataset no tiene la columna {watermark['column']}")
+        
+        new_mask = rows_after_watermark(df, watermark)
+        rows_added = int(new_mask.sum())
+        
+        print(f" Watermark {watermark['column']} = {watermark['value']}")
+        print(f" Partidos nuevos: {rows_added}")
+        
+        if rows_added == 0:
+            stages.finish()
+            print(f" Sin partidos nuevos: se mantiene el modelo {parent_version}\n")
+            return dict(parent_meta, reused=True)
+        
+        # Validación: las filas que el padre dejó fuera de su entrenamiento
+        stages.mark('validation')
+        dval = self.validation_matrix(parent_meta.get('validation'))
+        if dval is None:
+            return full_refit(f"No están las filas de validación del modelo {parent_version}")
+        y_val = dval.get_label().astype(int)
+        
+        stages.mark('feature_engineering')
+        features = self.engineer.build_features_from_csv(df)
+        X = features.drop(columns=["winner"])
+        y = features["winner"].astype(int)
+        
+        X_new, y_new = X[new_mask.to_numpy()], y[new_mask.to_numpy()]
+        
+        # 3. Continuar el boosting desde la mejor iteración del padre
+        stages.mark('fit')
+        best_iteration = parent.attr('best_iteration')
+        if best_iteration is not None:
+            parent = parent[:int(best_iteration) + 1]
+        parent.set_attr(best_iteration=None, best_score=None)
+        
+        params = parent_meta.get('params', DEFAULT_PARAMS)
+        booster_params = {
+            'objective': 'binary:logistic',
+            'eval_metric': params.get('eval_metric', 'logloss'),
+            'max_depth': params.get('max_depth', DEFAULT_PARAMS['max_depth']),
+            'learning_rate': params.get('learning_rate', DEFAULT_PARAMS['learning_rate']),
+            'subsample': params.get('subsample', DEFAULT_PARAMS['subsample']),
+            'colsample_bytree': params.get('colsample_bytree', DEFAULT_PARAMS['colsample_bytree']),
+            'seed': random_state,
+            'nthread': n_jobs
+        }
+        
+        dnew = xgb.DMatrix(X_new, label=y_new)
+        
+        parent_logloss = log_loss(y_val, parent.predict(dval), labels=[0, 1])
+        
+        booster = xgb.train(
+            booster_params,
+            dnew,
+            num_boost_round=rounds,
+            evals=[(dval, 'validation_0')],
+            xgb_model=parent,
+            callbacks=[ProgressCallback(progress)],
+            verbose_eval=False
+        )
+        
+        # 4. Comparar contra el padre en los mismos partidos
+        stages.mark('evaluate')
+        val_proba = booster.predict(dval)
+        val_logloss = log_loss(y_val, val_proba, labels=[0, 1])
+        
+        print(f" Val logloss padre:       {parent_logloss:.4f}")
+        print(f" Val logloss incremental: {val_logloss:.4f}")
+        
+        if val_logloss > parent_logloss * (1 + tolerance):
+            return full_refit("El modelo incremental empeoró la validación")
+        
+        val_acc = accuracy_score(y_val, (val_proba > 0.5).astype(int))
+        
+        # 5. Guardar con linaje
+        stages.mark('save')
+        metadata = {
+            'mode': 'incremental',
+            'feature_names': X.columns.tolist(),
+            'data_path': self.data_csv,
+            'data_hash': self.dataset_hash(),
+            'feature_spec': self.engineer.spec_hash(),
+            'fingerprint': None,
+            'watermark': compute_watermark(df, column=watermark['column']),
+            'validation': parent_meta['validation'],
+            'parent_version': parent_version,
+            'lineage': parent_meta.get('lineage', []) + [parent_version],
+            'params': params,
+            'incremental': {
+                'rows_added': rows_added,
+                'rounds': rounds,
+                'parent_val_logloss': float(parent_logloss)
+            },
+            'metrics': {
+                'val_accuracy': float(val_acc),
+                'val_logloss': float(val_logloss),
+                'n_train': rows_added,
+                'n_val': len(y_val)
+            }
+        }
+        
+        metadata = self.registry.save(booster, metadata)
+        stages.finish()
+        
+        print(f" Modelo incremental guardado como versión {metadata['version']} "
+              f"(padre: {parent_version})")
+        
+        return metadata
+
+
+def chronological_holdout(n_rows, test_size):
+    """Filas finales (las más recientes) que valida un split cronológico"""
+    return min(n_rows - 1, max(1, int(round(n_rows * test_size))))
+
+
+def compute_watermark(df, column=None):
+    """
+    Último partido incluido en un dataset
+    
+    Returns:
+        Dict {'column', 'value'} o None si no hay columna de watermark
+    """
+    column = column or next((c for c in WATERMARK_COLUMNS if c in df.columns), None)
+    if column is None or len(df) == 0:
+        return None
+    
+    value = df[column].max()
+    if column == 'game_id':
+        return {'column': column, 'value': str(value)}
+    
+    # Por fecha: se guardan los partidos de ese día para no perder los que lleguen tarde
+    watermark = {'column': column, 'value': pd.Timestamp(value).isoformat()}
+    if all(c in df.columns for c in GAME_KEY_COLUMNS):
+        last_day = df[pd.to_datetime(df[column]) == pd.Timestamp(value)]
+        watermark['seen'] = sorted(game_keys(last_day).unique().tolist())
+    return watermark
+
+
+def game_keys(df):
+    """Clave 'LOCAL@VISITANTE' de cada partido (única dentro de un día)"""
+    return df['home_team'].astype(str) + '@' + df['away_team'].astype(str)
+
+
+def rows_after_watermark(df, watermark):
+    """
+    Máscara booleana de las filas que el modelo del watermark no incluyó
+    
+    Con game_date se usa >= y se descartan los partidos del último día
+    que ya estaban (watermark['seen']).
+    """
+    column = watermark['column']
+    if column == 'game_id':
+        return df[column].astype(str) > watermark['value']
+    
+    dates = pd.to_datetime(df[column])
+    cutoff = pd.Timestamp(watermark['value'])
+    if 'seen' not in watermark:
+        return dates > cutoff
+    return (dates > cutoff) | ((dates == cutoff) & ~game_keys(df).isin(watermark['seen']))
 
 if __name__ == "__main__":
     """Ejecutar directamente para entrenar"""
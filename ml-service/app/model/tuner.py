@@ -0,0 +1,356 @@
+# ml-service/app/model/tuner.py
+"""
+Búsqueda de hiperparámetros con validación walk-forward
+
+Los partidos se ordenan por game_date y cada fold entrena solo con
+partidos anteriores a su bloque de validación, así ningún partido futuro
+entra al entrenamiento. Los trials corren en un pool de procesos; cada
+trial usa cpu_count // workers hilos de XGBoost para no sobresuscribir
+los cores.
+"""
+import argparse
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import xgboost as xgb
+from sklearn.metrics import log_loss
+
+from model.trainer import Trainer, DEFAULT_PARAMS
+
+SEARCH_STRATEGIES = ('random', 'halving')
+
+DEFAULT_TRIALS = 20
+DEFAULT_FOLDS = 4
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
+# Fracción inicial (más antigua) que solo se usa para entrenar
+MIN_TRAIN_FRACTION = 0.5
+
+# Successive halving: rondas del primer escalón y factor de reducción
+HALVING_MIN_ROUNDS = 50
+HALVING_ETA = 3
+
+TUNER_MAX_BIN = 256
+
+# Espacio de búsqueda
+MAX_DEPTH_RANGE = (3, 9)
+LEARNING_RATE_RANGE = (0.01, 0.3)
+SUBSAMPLE_RANGE = (0.6, 1.0)
+COLSAMPLE_RANGE = (0.6, 1.0)
+N_ESTIMATORS_RANGE = (100, 1000)
+
+
+def sample_configs(n, rng):
+    """
+    Muestrea `n` configuraciones al azar del espacio de búsqueda
+    
+    Returns:
+        Lista de dicts con los nombres de parámetros de XGBClassifier
+    """
+    depths = rng.integers(MAX_DEPTH_RANGE[0], MAX_DEPTH_RANGE[1] + 1, n)
+    learning_rates = np.exp(rng.uniform(np.log(LEARNING_RATE_RANGE[0]), np.log(LEARNING_RATE_RANGE[1]), n))
+    subsamples = rng.uniform(*SUBSAMPLE_RANGE, n)
+    colsamples = rng.uniform(*COLSAMPLE_RANGE, n)
+    n_estimators = rng.integers(N_ESTIMATORS_RANGE[0] // 50, N_ESTIMATORS_RANGE[1] // 50 + 1, n) * 50
+    
+    return [
+        {
+            'max_depth': int(depths[i]),
+            'learning_rate': round(float(learning_rates[i]), 4),
+            'subsample': round(float(subsamples[i]), 3),
+            'colsample_bytree': round(float(colsamples[i]), 3),
+            'n_estimators': int(n_estimators[i])
+        }
+        for i in range(n)
+    ]
+
+
+def walk_forward_folds(n_rows, n_folds=DEFAULT_FOLDS, min_train_fraction=MIN_TRAIN_FRACTION):
+    """
+    Folds walk-forward sobre filas ya ordenadas por fecha
+    
+    El tramo final se parte en `n_folds` bloques consecutivos; el fold k
+    valida en el bloque k y entrena con todas las filas anteriores.
+    
+    Returns:
+        Lista de tuplas (train_idx, val_idx)
+    """
+    start = int(n_rows * min_train_fraction)
+    blocks = np.array_split(np.arange(start, n_rows), n_folds)
+    return [(np.arange(block[0]), block) for block in blocks if len(block)]
+
+
+# Estado de cada proceso del pool: datos y DMatrix por fold (se construyen una vez)
+_worker = {}
+
+
+def _init_worker(X, y, folds, max_bin):
+    _worker.update(X=X, y=y, folds=folds, max_bin=max_bin, matrices={})
+
+
+def _fold_matrices(fold, nthread):
+    matrices = _worker['matrices']
+    if fold not in matrices:
+        train_idx, val_idx = _worker['folds'][fold]
+        X, y = _worker['X'], _worker['y']
+        dtrain = xgb.QuantileDMatrix(X[train_idx], label=y[train_idx],
+                                     max_bin=_worker['max_bin'], nthread=nthread)
+        dval = xgb.QuantileDMatrix(X[val_idx], label=y[val_idx], ref=dtrain,
+                                   max_bin=_worker['max_bin'], nthread=nthread)
+        matrices[fold] = (dtrain, dval)
+    return matrices[fold]
+
+
+def _run_trial(trial_id, config, num_rounds, nthread, seed):
+    """Evalúa una configuración en todos los folds (corre en un proceso del pool)"""
+    started = time.perf_counter()
+    
+    booster_params = {
+        'objective': 'binary:logistic',
+        'eval_metric': DEFAULT_PARAMS['eval_metric'],
+        'max_depth': config['max_depth'],
+        'learning_rate': config['learning_rate'],
+        'subsample': config['subsample'],
+        'colsample_bytree': config['colsample_bytree'],
+        'tree_method': 'hist',
+        'max_bin': _worker['max_bin'],
+        'seed': seed,
+        'nthread': nthread
+    }
+    
+    fold_logloss = []
+    best_rounds = []
+    for fold in range(len(_worker['folds'])):
+        dtrain, dval = _fold_matrices(fold, nthread)
+        booster = xgb.train(
+            booster_params,
+            dtrain,
+            num_boost_round=num_rounds,
+            evals=[(dval, 'validation')],
+            early_stopping_rounds=DEFAULT_PARAMS['early_stopping_rounds'],
+            verbose_eval=False
+        )
+        proba = booster.predict(dval, iteration_range=(0, booster.best_iteration + 1))
+        fold_logloss.append(float(log_loss(dval.get_label(), proba, labels=[0, 1])))
+        best_rounds.append(int(booster.best_iteration) + 1)
+    
+    return {
+        'trial_id': trial_id,
+        'params': config,
+        'num_rounds': num_rounds,
+        'logloss': float(np.mean(fold_logloss)),
+        'fold_logloss': fold_logloss,
+        'best_rounds': best_rounds,
+        'seconds': round(time.perf_counter() - started, 3)
+    }
+
+
+def _no_progress(event, **data):
+    pass
+
+
+def _check_positive(**values):
+    """ValueError si algún valor no es un entero >= 1"""
+    for name, value in values.items():
+        if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+            raise ValueError(f"{name} debe ser un entero >= 1 (recibido: {value!r})")
+
+
+class Tuner:
+    """
+    Búsqueda de hiperparámetros (random search o successive halving)
+    """
+    
+    def __init__(self, data_csv="data/nba_games_clean.csv", n_folds=DEFAULT_FOLDS,
+                 workers=DEFAULT_WORKERS, total_threads=None, seed=42):
+        """
+        Args:
+            data_csv: Dataset de partidos (debe tener game_date)
+            n_folds: Folds walk-forward
+            workers: Procesos del pool (trials en paralelo)
+            total_threads: Hilos totales a repartir entre los workers (default: todos los cores)
+            seed: Semilla del muestreo y de XGBoost
+        
+        Raises:
+            ValueError: si n_folds o workers no son enteros >= 1
+        """
+        _check_positive(n_folds=n_folds, workers=workers)
+        
+        self.trainer = Trainer(data_csv=data_csv)
+        self.n_folds = n_folds
+        self.workers = workers
+        self.total_threads = total_threads or os.cpu_count() or 1
+        self.nthread = max(1, self.total_threads // self.workers)
+        self.seed = seed
+    
+    def load_matrix(self):
+        """
+        Matriz de features ordenada cronológicamente
+        
+        Returns:
+            Tupla (X float32, y float32) en orden de game_date
+        """
+        X, y, _ = self.trainer.chronological_matrix()
+        return X, y
+    
+    def search(self, strategy='random', n_trials=DEFAULT_TRIALS, progress=None):
+        """
+        Ejecuta la búsqueda
+        
+        Args:
+            strategy: 'random' o 'halving'
+            n_trials: Configuraciones a probar
+            progress: Callback opcional progress(event, **data); emite 'trial'
+        
+        Returns:
+            Dict con la mejor configuración y el detalle de cada trial
+        """
+        if strategy not in SEARCH_STRATEGIES:
+            raise ValueError(f"Estrategia inválida: {strategy} (usa {', '.join(SEARCH_STRATEGIES)})")
+        _check_positive(n_trials=n_trials)
+        
+        progress = progress or _no_progress
+        started = time.perf_counter()
+        
+        X, y = self.load_matrix()
+        folds = walk_forward_folds(len(X), self.n_folds)
+        configs = sample_configs(n_trials, np.random.default_rng(self.seed))
+        
+        print(f"\n🔎 Búsqueda {strategy}: {n_trials} configuraciones, {len(folds)} folds walk-forward")
+        print(f" {self.workers} workers x {self.nthread} hilos\n")
+        
+        trials = []
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=mp.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(X, y, folds, TUNER_MAX_BIN)
+        )
+        
+        def run(candidates, rounds_for, rung=None):
+            futures = [
+                executor.submit(_run_trial, trial_id, config, rounds_for(config), self.nthread, self.seed)
+                for trial_id, config in candidates
+            ]
+            results = []
+            for future in futures:
+                result = future.result()
+                if rung is not None:
+                    result['rung'] = rung
+                print(f"   trial {result['trial_id']:>3} logloss={result['logloss']:.4f} "
+                      f"({result['num_rounds']} rondas, {result['seconds']:.1f}s)")
+                progress('trial', **result)
+                results.append(result)
+            trials.extend(results)
+            return results
+        
+        with executor:
+            candidates = list(enumerate(configs))
+            
+            if strategy == 'random':
+                results = run(candidates, lambda config: config['n_estimators'])
+            else:
+                rounds = HALVING_MIN_ROUNDS
+                rung = 0
+                finished = []
+                while candidates:
+                    results = run(candidates, lambda config: min(rounds, config['n_estimators']), rung)
+                    if len(candidates) == 1 or rounds >= N_ESTIMATORS_RANGE[1]:
+                        finished.extend(results)
+                        break
+                    
+                    results.sort(key=lambda r: r['logloss'])
+                    keep = max(1, len(results) // HALVING_ETA)
+                    
+                    # Los que ya corrieron todos sus árboles darían el mismo resultado
+                    # con más rondas: pasan a la selección final sin volver a correr
+                    finished.extend(r for r in results[:keep] if r['params']['n_estimators'] <= rounds)
+                    candidates = [(r['trial_id'], r['params']) for r in results[:keep]
+                                  if r['params']['n_estimators'] > rounds]
+                    rounds *= HALVING_ETA
+                    rung += 1
+                results = finished
+        
+        best = min(results, key=lambda r: r['logloss'])
+        
+        # n_estimators final: las rondas que realmente necesitó (early stopping)
+        best_params = dict(best['params'], n_estimators=int(max(best['best_rounds'])))
+        
+        summary = {
+            'strategy': strategy,
+            'n_trials': n_trials,
+            'n_folds': len(folds),
+            'holdout_fraction': len(folds[-1][1]) / len(X),
+            'workers': self.workers,
+            'nthread_per_trial': self.nthread,
+            'best_params': best_params,
+            'best_logloss': best['logloss'],
+            'best_trial_id': best['trial_id'],
+            'trials': trials,
+            'wall_time': round(time.perf_counter() - started, 3)
+        }
+        
+        print(f"\n🏆 Mejor trial {best['trial_id']}: logloss={best['logloss']:.4f}")
+        print(f"   {best_params}")
+        print(f" Tiempo total: {summary['wall_time']:.1f}s")
+        
+        return summary
+    
+    def tune(self, strategy='random', n_trials=DEFAULT_TRIALS, test_size=None, progress=None,
+             train_best=True, force=False):
+        """
+        Busca la mejor configuración y (opcional) entrena el modelo final con ella
+        
+        El modelo final se entrena con split cronológico: todo lo anterior al
+        último bloque walk-forward, con early stopping en ese bloque.
+        
+        Args:
+            test_size: Fracción final de validación del modelo final
+                (default: la del último bloque walk-forward)
+        
+        Returns:
+            Metadata del modelo registrado con la clave 'tuning', o solo el
+            resumen de la búsqueda si train_best=False
+        """
+        summary = self.search(strategy=strategy, n_trials=n_trials, progress=progress)
+        if not train_best:
+            return summary
+        
+        metadata = self.trainer.train(
+            test_size=test_size or summary['holdout_fraction'],
+            random_state=self.seed,
+            n_jobs=self.total_threads,
+            progress=progress,
+            force=force,
+            params=summary['best_params'],
+            chronological=True
+        )
+        return dict(metadata, tuning=summary)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Búsqueda de hiperparámetros walk-forward")
+    parser.add_argument("--data", default="data/nba_games_clean.csv", help="Dataset de partidos")
+    parser.add_argument("--strategy", choices=SEARCH_STRATEGIES, default="random")
+    parser.add_argument("--trials", type=int, default=DEFAULT_TRIALS)
+    parser.add_argument("--folds", type=int, default=DEFAULT_FOLDS)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--train-best", action="store_true",
+                        help="Entrenar y registrar el modelo final con la mejor configuración")
+    args = parser.parse_args(argv)
+    
+    for name in ('trials', 'folds', 'workers'):
+        if getattr(args, name) < 1:
+            parser.error(f"--{name} debe ser >= 1")
+    return args
+
+
+if __name__ == "__main__":
+    """Ejecutar desde app/: python -m model.tuner --strategy halving --trials 27"""
+    args = parse_args()
+    tuner = Tuner(data_csv=args.data, n_folds=args.folds, workers=args.workers, seed=args.seed)
+    tuner.tune(strategy=args.strategy, n_trials=args.trials, train_best=args.train_best)
@@ -0,0 +1,64 @@
+# ml-service/app/utils/helpers.py
+"""
+Utilidades compartidas del servicio ML
+"""
+import bisect
+import hashlib
+import threading
+
+
+class Histogram:
+    """
+    Histograma thread-safe con buckets fijos (estilo Prometheus)
+    
+    Cada bucket cuenta las observaciones <= a su límite; las mayores al
+    último límite caen en el bucket "+Inf".
+    """
+    
+    def __init__(self, bounds):
+        """
+        Args:
+            bounds: Límites superiores de los buckets, en orden creciente
+        """
+        self.bounds = list(bounds)
+        self._counts = [0] * (len(self.bounds) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+    
+    def observe(self, value):
+        """Registra una observación"""
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+    
+    def snapshot(self):
+        """Retorna conteos acumulados por bucket, total, suma y media"""
+        with self._lock:
+            counts = list(self._counts)
+            total = self._count
+            value_sum = self._sum
+        
+        buckets = {}
+        cumulative = 0
+        for bound, count in zip(self.bounds + ['+Inf'], counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        
+        return {
+            'count': total,
+            'sum': value_sum,
+            'mean': value_sum / total if total else 0.0,
+            'buckets': buckets
+        }
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    """Hash SHA-256 del contenido de un archivo, leído por bloques"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,56 @@
+# ml-service/app/utils/season_chunks.py
+"""
+Sorteo Monte Carlo de un chunk de temporadas
+
+Vive fuera del paquete `model` a propósito: los procesos del pool de
+simulación importan solo este módulo (y numpy), no xgboost ni sklearn.
+"""
+import numpy as np
+
+
+def simulate_chunk(seed_seq, n_seasons, game_probs, home_idx, away_idx,
+                   base_wins, conference_idx, n_conferences):
+    """
+    Simula `n_seasons` temporadas (corre en un proceso del pool)
+    
+    Returns:
+        Tupla (win_hist, seed_counts, best_record):
+        win_hist[t, w] = temporadas con w victorias totales del equipo t,
+        seed_counts[t, s] = temporadas terminando en el puesto s de su conferencia,
+        best_record[t] = temporadas con el mejor récord de la liga
+    """
+    rng = np.random.default_rng(seed_seq)
+    n_teams = len(base_wins)
+    n_games = len(game_probs)
+    
+    # Matrices partido -> equipo local / visitante (one-hot)
+    home_onehot = np.zeros((n_games, n_teams), dtype=np.float32)
+    away_onehot = np.zeros((n_games, n_teams), dtype=np.float32)
+    home_onehot[np.arange(n_games), home_idx] = 1
+    away_onehot[np.arange(n_games), away_idx] = 1
+    
+    # Un sorteo por partido y temporada: (temporadas x partidos)
+    home_won = (rng.random((n_seasons, n_games), dtype=np.float32) < game_probs).astype(np.float32)
+    wins = (home_won @ home_onehot + (1 - home_won) @ away_onehot).astype(np.int32) + base_wins
+    
+    max_wins = int(base_wins.max()) + n_games
+    team_offsets = np.arange(n_teams) * (max_wins + 1)
+    win_hist = np.bincount((wins + team_offsets).ravel(), minlength=n_teams * (max_wins + 1))
+    win_hist = win_hist.reshape(n_teams, max_wins + 1)
+    
+    # Desempate aleatorio: ruido < 1 no altera el orden por victorias
+    score = wins + rng.random((n_seasons, n_teams))
+    
+    seed_counts = np.zeros((n_teams, n_teams), dtype=np.int64)
+    for conference in range(n_conferences):
+        members = np.flatnonzero(conference_idx == conference)
+        order = np.argsort(-score[:, members], axis=1)
+        # Puesto de cada equipo dentro de su conferencia en cada temporada
+        seeds = np.empty_like(order)
+        np.put_along_axis(seeds, order, np.arange(len(members)), axis=1)
+        flat = members[np.newaxis, :] * n_teams + seeds
+        seed_counts += np.bincount(flat.ravel(), minlength=n_teams * n_teams).reshape(n_teams, n_teams)
+    
+    best_record = np.bincount(np.argmax(score, axis=1), minlength=n_teams)
+    
+    return win_hist, seed_counts, best_record
@@ -3,24 +3,17 @@
 Descarga datos REALES de NBA usando la API OFICIAL (100% GRATIS, sin API keys)
 UBICACIÓN: ml-service/fetch_nba_official_api.py
 """
+import argparse
+import numpy as np
 import pandas as pd
-import requests
 import time
 from datetime import datetime
 import os
 
-# API oficial de NBA Stats (NO REQUIERE API KEY)
-NBA_STATS_BASE = "https://stats.nba.com/stats"
-
-# Headers para simular navegador (requerido por NBA.com)
-HEADERS = {
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-    'Accept': 'application/json',
-    'Accept-Language': 'en-US,en;q=0.9',
-    'Referer': 'https://www.nba.com/',
-    'Origin': 'https://www.nba.com',
-    'Connection': 'keep-alive',
-}
+from app.data.rolling import compute_rolling_features
+from app.data.elo import EloEngine, ELO_STATE_PATH
+from app.data.nba_stats_client import NBAStatsClient, HTTP_CACHE_DIR
+from app.data.loader import read_games
 
 # Mapeo de abreviaturas a IDs oficiales
 TEAM_IDS = {
@@ -37,105 +30,83 @@ TEAM_IDS = {
 # Reverso (ID a abreviatura)
 ID_TO_TEAM = {v: k for k, v in TEAM_IDS.items()}
 
+# Rolling stats por equipo: ventanas (N partidos previos) y stats a promediar
+ROLLING_WINDOWS = (5, 10, 20)
+ROLLING_STATS = ['pts', 'reb', 'ast', 'tov', 'fg_pct']
+
+# Log de partidos enriquecido (salida del fetcher, entrada del entrenamiento)
+GAMES_CSV_PATH = "data/nba_games_clean.csv"
+
+# Stats del leaguegamelog que se conservan por lado (columna API -> sufijo)
+GAME_LOG_STATS = {'PTS': 'pts', 'REB': 'reb', 'AST': 'ast', 'TOV': 'tov', 'FG_PCT': 'fg_pct'}
+
 
-def fetch_season_games(season="2024-25", max_games=500):
+def season_params(season, season_type="Regular Season", date_from=None):
+    """Query params de leaguegamelog para una temporada y tipo de temporada"""
+    params = {
+        'Season': season,
+        'SeasonType': season_type,
+        'LeagueID': '00',  # NBA
+        'Direction': 'DESC',
+        'Sorter': 'DATE',
+        'Counter': 0
+    }
+    
+    # Solo partidos desde esa fecha (inclusive)
+    if date_from is not None:
+        params['DateFrom'] = pd.Timestamp(date_from).strftime('%m/%d/%Y')
+    
+    return params
+
+
+def parse_game_log(data):
+    """Respuesta JSON de leaguegamelog -> una fila por partido"""
+    headers = data['resultSets'][0]['headers']
+    rows = data['resultSets'][0]['rowSet']
+    
+    if not rows:
+        return pd.DataFrame()
+    
+    return pivot_game_log(pd.DataFrame(rows, columns=headers))
+
+
+def fetch_season_games(season="2024-25", max_games=500, season_type="Regular Season", client=None):
     """
     Descarga partidos de la temporada desde la API oficial de NBA
     
     Args:
         season: Temporada (ej: "2024-25")
-        max_games: Máximo de partidos a descargar
+        max_games: Máximo de partidos a descargar (None = todos)
+        season_type: "Regular Season", "Playoffs", ...
+        client: NBAStatsClient a usar (default: uno nuevo con caché en disco)
     
     Returns:
         DataFrame con partidos
     """
-    print(f"\n🏀 Descargando partidos de la temporada {season}")
+    print(f"\n🏀 Descargando partidos de la temporada {season} ({season_type})")
     print("="*60)
     
-    # Endpoint de scoreboard por fecha
-    url = f"{NBA_STATS_BASE}/leaguegamelog"
-    
-    params = {
-        'Season': season,
-        'SeasonType': 'Regular Season',
-        'LeagueID': '00',  # NBA
-        'Direction': 'DESC',
-        'Sorter': 'DATE',
-        'Counter': 0
-    }
+    client = client or NBAStatsClient()
     
     try:
         print("📡 Consultando NBA Stats API (oficial, sin API key)...")
-        response = requests.get(url, headers=HEADERS, params=params, timeout=30)
+        data = client.get_json('leaguegamelog', season_params(season, season_type))
         
-        if response.status_code == 200:
-            data = response.json()
-            
-            # Parsear respuesta
-            headers = data['resultSets'][0]['headers']
-            rows = data['resultSets'][0]['rowSet']
-            
-            if not rows:
-                print("❌ No hay datos disponibles")
-                return pd.DataFrame()
-            
-            df = pd.DataFrame(rows, columns=headers)
-            
-            print(f"✅ {len(df)} registros descargados")
-            
-            # Procesar datos
-            games_dict = {}
-            
-            for _, row in df.iterrows():
-                game_id = row['GAME_ID']
-                team_id = row['TEAM_ID']
-                team_abbr = ID_TO_TEAM.get(team_id, 'UNK')
-                
-                if game_id not in games_dict:
-                    games_dict[game_id] = {
-                        'game_id': game_id,
-                        'game_date': row['GAME_DATE'],
-                        'matchup': row['MATCHUP']
-                    }
-                
-                # Determinar si es home o away
-                if '@' in row['MATCHUP']:
-                    # Away team (juega "@")
-                    games_dict[game_id]['away_team'] = team_abbr
-                    games_dict[game_id]['away_pts'] = row['PTS']
-                    games_dict[game_id]['away_reb'] = row['REB']
-                    games_dict[game_id]['away_ast'] = row['AST']
-                    games_dict[game_id]['away_tov'] = row['TOV']
-                    games_dict[game_id]['away_fg_pct'] = row['FG_PCT']
-                else:
-                    # Home team (juega "vs.")
-                    games_dict[game_id]['home_team'] = team_abbr
-                    games_dict[game_id]['home_pts'] = row['PTS']
-                    games_dict[game_id]['home_reb'] = row['REB']
-                    games_dict[game_id]['home_ast'] = row['AST']
-                    games_dict[game_id]['home_tov'] = row['TOV']
-                    games_dict[game_id]['home_fg_pct'] = row['FG_PCT']
-            
-            # Convertir a DataFrame
-            games_list = []
-            for game_id, game_data in games_dict.items():
-                # Solo agregar si tiene ambos equipos
-                if 'home_team' in game_data and 'away_team' in game_data:
-                    games_list.append(game_data)
-            
-            df_games = pd.DataFrame(games_list)
-            
-            # Limitar a max_games
-            df_games = df_games.head(max_games)
-            
-            print(f"✅ {len(df_games)} partidos completos procesados")
-            
+        # Una fila por partido: local y visitante unidos por GAME_ID
+        df_games = parse_game_log(data)
+        
+        if len(df_games) == 0:
+            print("❌ No hay datos disponibles")
             return df_games
-            
-        else:
-            print(f"❌ Error {response.status_code}: {response.text[:200]}")
-            return pd.DataFrame()
-            
+        
+        # Limitar a max_games
+        if max_games:
+            df_games = df_games.head(max_games)
+        
+        print(f"✅ {len(df_games)} partidos completos procesados")
+        
+        return df_games
+    
     except Exception as e:
         print(f"❌ Error: {e}")
         import traceback
@@ -143,7 +114,132 @@ def fetch_season_games(season="2024-25", max_games=500):
         return pd.DataFrame()
 
 
-def fetch_team_stats(season="2024-25"):
+def fetch_games(seasons, season_types=("Regular Season",), client=None, max_games=None,
+                date_from=None, max_age=None):
+    """
+    Descarga varias temporadas y tipos de temporada en paralelo
+    
+    Cada respuesta queda en la caché del cliente, así que si el backfill se
+    interrumpe, al reintentarlo solo se descargan las que faltaron.
+    
+    Args:
+        seasons: Lista de temporadas (ej: ["2022-23", "2023-24"])
+        season_types: Tipos de temporada a incluir
+        client: NBAStatsClient a usar (default: uno nuevo con caché en disco)
+        max_games: Máximo de partidos en total (None = todos)
+        date_from: Solo partidos desde esta fecha, inclusive (None = temporada completa)
+        max_age: Antigüedad máxima (s) aceptada en caché (0 = siempre ir a la red)
+    
+    Returns:
+        DataFrame con partidos de todas las temporadas (más recientes primero)
+    """
+    client = client or NBAStatsClient()
+    
+    combos = [(season, season_type) for season in seasons for season_type in season_types]
+    print(f"\n🏀 Descargando {len(combos)} temporadas (concurrencia: {client.concurrency})")
+    print("="*60)
+    
+    results = client.fetch_many(
+        [('leaguegamelog', season_params(season, season_type, date_from), max_age)
+         for season, season_type in combos]
+    )
+    
+    frames = []
+    failed = []
+    for (season, season_type), result in zip(combos, results):
+        if isinstance(result, Exception):
+            print(f"❌ {season} ({season_type}): {result}")
+            failed.append((season, season_type))
+            continue
+        
+        games = parse_game_log(result)
+        print(f"✅ {season} ({season_type}): {len(games)} partidos")
+        
+        if len(games):
+            frames.append(games.assign(season=season, season_type=season_type))
+    
+    if failed:
+        print(f"⚠️  {len(failed)} descargas fallidas; vuelve a ejecutar para reanudar "
+              "(lo ya descargado se lee de la caché)")
+    
+    print(f"📦 Caché: {client.stats['cache_hits']} hits, "
+          f"{client.stats['requests']} requests, {client.stats['retries']} reintentos")
+    
+    if not frames:
+        return pd.DataFrame()
+    
+    df_games = (pd.concat(frames, ignore_index=True)
+                .drop_duplicates('game_id')
+                .sort_values(['game_date', 'game_id'], ascending=False, kind='mergesort')
+                .reset_index(drop=True))
+    
+    if max_games:
+        df_games = df_games.head(max_games)
+    
+    return df_games
+
+
+def pivot_game_log(df):
+    """
+    Convierte el log equipo-partido (2 filas por juego) en una fila por partido
+    
+    Separa local/visitante por MATCHUP ("@" = visitante) y une ambos lados
+    por GAME_ID de forma vectorizada. Los partidos a los que les falta un
+    lado se informan y quedan en df.attrs['incomplete_game_ids'].
+    
+    Args:
+        df: DataFrame de leaguegamelog (GAME_ID, GAME_DATE, MATCHUP, TEAM_ID, stats)
+    
+    Returns:
+        DataFrame con game_id, game_date, matchup, home_* y away_*
+    """
+    df = df.assign(TEAM=df['TEAM_ID'].map(ID_TO_TEAM).fillna('UNK'))
+    is_away = df['MATCHUP'].str.contains('@', regex=False)
+    
+    def side(rows, prefix):
+        columns = {'GAME_ID': 'game_id', 'TEAM': f'{prefix}_team'}
+        columns.update({api: f'{prefix}_{name}' for api, name in GAME_LOG_STATS.items()})
+        extra = {'GAME_DATE': f'{prefix}_game_date', 'MATCHUP': f'{prefix}_matchup'}
+        
+        rows = rows[list(columns) + list(extra)].rename(columns={**columns, **extra})
+        
+        duplicated = rows['game_id'].duplicated(keep='first')
+        if duplicated.any():
+            print(f"⚠️  {duplicated.sum()} filas duplicadas de {prefix} ignoradas")
+        return rows[~duplicated]
+    
+    games = side(df[~is_away], 'home').merge(
+        side(df[is_away], 'away'), on='game_id', how='outer', indicator=True
+    )
+    
+    # Fecha y matchup: de cualquiera de los dos lados disponibles
+    games['game_date'] = games['away_game_date'].fillna(games['home_game_date'])
+    games['matchup'] = games['away_matchup'].fillna(games['home_matchup'])
+    
+    complete = games['_merge'] == 'both'
+    incomplete_ids = games.loc[~complete, 'game_id'].tolist()
+    
+    if incomplete_ids:
+        print(f"⚠️  {len(incomplete_ids)} partidos sin local o visitante (excluidos): "
+              f"{incomplete_ids[:10]}{' ...' if len(incomplete_ids) > 10 else ''}")
+    
+    ordered_columns = (
+        ['game_id', 'game_date', 'matchup', 'home_team']
+        + [f'home_{name}' for name in GAME_LOG_STATS.values()]
+        + ['away_team']
+        + [f'away_{name}' for name in GAME_LOG_STATS.values()]
+    )
+    
+    # Más recientes primero, como devuelve la API
+    result = (games.loc[complete, ordered_columns]
+              .sort_values(['game_date', 'game_id'], ascending=False, kind='mergesort')
+              .reset_index(drop=True))
+    result.attrs['incomplete_game_ids'] = incomplete_ids
+    
+    return result
+
+
+def fetch_team_stats(season="2024-25", client=None):
     """
     Obtiene estadísticas de todos los equipos
     
@@ -152,7 +248,7 @@ def fetch_team_stats(season="2024-25"):
     """
     print(f"\n📊 Descargando estadísticas de equipos...")
     
-    url = f"{NBA_STATS_BASE}/leaguestandingsv3"
+    client = client or NBAStatsClient()
     
     params = {
         'Season': season,
@@ -161,53 +257,42 @@ def fetch_team_stats(season="2024-25"):
     }
     
     try:
-        response = requests.get(url, headers=HEADERS, params=params, timeout=30)
+        data = client.get_json('leaguestandingsv3', params)
         
-        if response.status_code == 200:
-            data = response.json()
-            headers = data['resultSets'][0]['headers']
-            rows = data['resultSets'][0]['rowSet']
-            
-            df = pd.DataFrame(rows, columns=headers)
-            
-            team_stats = {}
-            for _, row in df.iterrows():
-                team_id = row['TeamID']
-                team_abbr = ID_TO_TEAM.get(team_id, 'UNK')
-                
-                wins = row['WINS']
-                losses = row['LOSSES']
-                total = wins + losses
-                win_pct = wins / total if total > 0 else 0.5
-                
-                # Calcular ELO basado en win%
-                elo = 1500 + (win_pct - 0.5) * 400
-                
-                team_stats[team_abbr] = {
-                    'wins': wins,
-                    'losses': losses,
-                    'win_pct': win_pct,
-                    'elo': round(elo, 1)
-                }
-            
-            print(f"✅ Stats de {len(team_stats)} equipos obtenidas")
-            return team_stats
+        headers = data['resultSets'][0]['headers']
+        rows = data['resultSets'][0]['rowSet']
+        
+        df = pd.DataFrame(rows, columns=headers)
+        
+        team_stats = {}
+        for _, row in df.iterrows():
+            team_id = row['TeamID']
+            team_abbr = ID_TO_TEAM.get(team_id, 'UNK')
             
-        else:
-            print(f"⚠️  No se pudieron obtener stats de equipos")
-            return {}
+            wins = row['WINS']
+            losses = row['LOSSES']
+            total = wins + losses
+            win_pct = wins / total if total > 0 else 0.5
             
+            # El Elo se calcula partido a partido con EloEngine (app/data/elo.py)
+            team_stats[team_abbr] = {
+                'wins': wins,
+                'losses': losses,
+                'win_pct': win_pct
+            }
+        
+        print(f"✅ Stats de {len(team_stats)} equipos obtenidas")
+        return team_stats
+    
     except Exception as e:
         print(f"⚠️  Error obteniendo stats: {e}")
         return {}
 
 
-def enrich_games_with_stats(df, team_stats):
+def add_result_features(df):
     """
-    Enriquece los partidos con estadísticas adicionales
+    Columnas que dependen solo del propio partido (resultado, diferencias, lesiones)
     """
-    print(f"\n🔧 Enriqueciendo datos con features ML...")
-    
     # Determinar ganador
     df['home_win'] = (df['home_pts'] > df['away_pts']).astype(int)
     df['point_diff'] = df['home_pts'] - df['away_pts']
@@ -217,73 +302,288 @@ def enrich_games_with_stats(df, team_stats):
     df['ast_diff'] = df['home_ast'] - df['away_ast']
     df['tov_diff'] = df['home_tov'] - df['away_tov']
     
-    # Asignar ELO a cada equipo
-    df['home_elo'] = df['home_team'].map(lambda x: team_stats.get(x, {}).get('elo', 1500))
-    df['away_elo'] = df['away_team'].map(lambda x: team_stats.get(x, {}).get('elo', 1500))
-    df['elo_diff'] = df['home_elo'] - df['away_elo']
-    
     # Lesiones (simuladas - en producción usar API de injuries)
-    import numpy as np
     np.random.seed(42)
     df['home_injuries'] = np.random.randint(0, 4, size=len(df))
     df['away_injuries'] = np.random.randint(0, 4, size=len(df))
     df['injury_diff'] = df['away_injuries'] - df['home_injuries']
     
-    # Rolling stats (últimos 5 partidos)
-    df = df.sort_values('game_date')
-    
-    df['home_roll5_pts'] = df.groupby('home_team')['home_pts'].transform(
-        lambda x: x.rolling(5, min_periods=1).mean()
-    )
-    df['away_roll5_pts'] = df.groupby('away_team')['away_pts'].transform(
-        lambda x: x.rolling(5, min_periods=1).mean()
-    )
-    
-    df['home_roll5_reb'] = df.groupby('home_team')['home_reb'].transform(
-        lambda x: x.rolling(5, min_periods=1).mean()
-    )
-    df['away_roll5_reb'] = df.groupby('away_team')['away_reb'].transform(
-        lambda x: x.rolling(5, min_periods=1).mean()
-    )
-    
-    df['home_roll5_ast'] = df.groupby('home_team')['home_ast'].transform(
-        lambda x: x.rolling(5, min_periods=1).mean()
-    )
-    df['away_roll5_ast'] = df.groupby('away_team')['away_ast'].transform(
-        lambda x: x.rolling(5, min_periods=1).mean()
-    )
+    # Home advantage
+    df['home_advantage'] = 1
     
-    # Diferencias rolling
+    return df
+
+
+def add_rolling_diffs(df):
+    """Diferencias local - visitante de las rolling stats de 5 partidos"""
     df['roll5_point_diff'] = df['home_roll5_pts'] - df['away_roll5_pts']
     df['roll5_reb_diff'] = df['home_roll5_reb'] - df['away_roll5_reb']
     df['roll5_ast_diff'] = df['home_roll5_ast'] - df['away_roll5_ast']
     
-    # Home advantage
-    df['home_advantage'] = 1
+    return df
+
+
+def enrich_games_with_stats(df, elo_engine=None, windows=ROLLING_WINDOWS):
+    """
+    Enriquece los partidos con estadísticas adicionales
+    
+    Args:
+        df: DataFrame de partidos (una fila por juego)
+        elo_engine: EloEngine a actualizar con estos partidos (default: uno nuevo)
+        windows: Ventanas de rolling stats a calcular (debe incluir 5)
+    """
+    print(f"\n🔧 Enriqueciendo datos con features ML...")
+    
+    df = add_result_features(df)
+    
+    # Elo previo a cada partido, procesando el log en orden cronológico
+    elo_engine = elo_engine if elo_engine is not None else EloEngine()
+    elo = elo_engine.process(df)
+    df['home_elo'] = elo['home_elo']
+    df['away_elo'] = elo['away_elo']
+    df['elo_diff'] = elo['elo_diff']
+    
+    # Rolling stats: línea de tiempo única por equipo (local + visitante),
+    # solo partidos anteriores al actual
+    df = df.sort_values('game_date')
+    rolling = compute_rolling_features(df, windows=windows, stats=ROLLING_STATS)
+    df = df.drop(columns=[c for c in rolling.columns if c in df.columns]).join(rolling)
+    
+    df = add_rolling_diffs(df)
     
     print(f"✅ Features añadidos correctamente")
     
     return df
 
 
-def main():
+def read_game_log(csv_path=GAMES_CSV_PATH):
+    """
+    Lee el log enriquecido con el loader compartido
+    
+    Stats en float64: el log se vuelve a escribir a CSV y float32 añadiría
+    decimales espurios.
+    """
+    return read_games(csv_path, float_dtype=np.float64)
+
+
+def write_game_log(df, csv_path=GAMES_CSV_PATH):
+    """
+    Escribe el log completo de forma atómica, del partido más reciente al
+    más antiguo (el mismo orden en descarga completa, reconstrucción e
+    ingesta incremental)
+    """
+    df = df.sort_values(['game_date', 'game_id'], ascending=False, kind='mergesort')
+    
+    tmp_path = f"{csv_path}.tmp"
+    df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, csv_path)
+
+
+def game_log_watermark(df):
+    """
+    Marca de agua del log: (game_date, game_id) del último partido
+    """
+    last = df.sort_values(['game_date', 'game_id'], kind='mergesort').iloc[-1]
+    return pd.Timestamp(last['game_date']), str(last['game_id'])
+
+
+def recent_team_games(df, teams, n):
+    """
+    Últimos `n` partidos de cada equipo de `teams` (como local o visitante)
+    
+    Es todo el contexto que necesitan las rolling stats de ventana <= n
+    para calcular los partidos siguientes de esos equipos.
+    """
+    positions = np.arange(len(df))
+    sides = pd.concat([
+        pd.DataFrame({
+            'pos': positions,
+            'team': df[f'{prefix}_team'].astype(str).to_numpy(),
+            'game_date': df['game_date'].to_numpy(),
+            'game_id': df['game_id'].to_numpy()
+        })
+        for prefix in ('home', 'away')
+    ], ignore_index=True)
+    
+    sides = sides[sides['team'].isin(teams)]
+    sides = sides.sort_values(['game_date', 'game_id'], ascending=False, kind='mergesort')
+    keep = np.unique(sides.groupby('team', sort=False).head(n)['pos'].to_numpy())
+    
+    return df.iloc[keep]
+
+
+def enrich_new_games(existing, new_games, elo_engine, windows=ROLLING_WINDOWS):
+    """
+    Enriquece solo los partidos nuevos, partiendo del log ya enriquecido
+    
+    El Elo continúa desde el estado guardado y las rolling stats se
+    recalculan solo sobre los últimos max(windows) partidos de los equipos
+    que jugaron, en vez de sobre todo el log.
+    
+    Args:
+        existing: Log enriquecido actual
+        new_games: Partidos nuevos (posteriores a la marca de agua)
+        elo_engine: EloEngine cuyo estado corresponde a `existing`
+        windows: Ventanas de rolling stats (debe incluir 5)
+    
+    Returns:
+        DataFrame con los partidos nuevos enriquecidos
+    """
+    print(f"\n🔧 Enriqueciendo {len(new_games)} partidos nuevos...")
+    
+    new_games = add_result_features(new_games.copy())
+    
+    elo = elo_engine.process(new_games)
+    new_games['home_elo'] = elo['home_elo']
+    new_games['away_elo'] = elo['away_elo']
+    new_games['elo_diff'] = elo['elo_diff']
+    
+    teams = pd.unique(np.concatenate([
+        new_games['home_team'].astype(str).to_numpy(),
+        new_games['away_team'].astype(str).to_numpy()
+    ]))
+    context = recent_team_games(existing, teams, max(windows))
+    
+    combined = pd.concat([context, new_games], ignore_index=True)
+    rolling = compute_rolling_features(combined, windows=windows, stats=ROLLING_STATS)
+    rolling = rolling.iloc[len(context):].set_axis(new_games.index)
+    
+    new_games = new_games.drop(columns=[c for c in rolling.columns if c in new_games.columns]).join(rolling)
+    new_games = add_rolling_diffs(new_games)
+    
+    print(f"✅ {len(teams)} equipos actualizados (contexto: {len(context)} partidos)")
+    
+    return new_games.sort_values(['game_date', 'game_id'], kind='mergesort')
+
+
+def load_elo_state(path, watermark):
+    """
+    Estado Elo guardado, o None si falta o no corresponde a la marca de agua del log
+    """
+    if not os.path.exists(path):
+        return None
+    
+    elo_engine = EloEngine.load(path)
+    if (elo_engine.last_game_date, elo_engine.last_game_id) != watermark:
+        return None
+    
+    return elo_engine
+
+
+def ingest_incremental(seasons, season_types, client, csv_path=GAMES_CSV_PATH,
+                       elo_path=ELO_STATE_PATH, windows=ROLLING_WINDOWS):
+    """
+    Ingesta incremental: descarga solo partidos desde la marca de agua del log
+    y los añade sin duplicar game_id
+    
+    Si el estado Elo falta, no coincide con el log, o llegan partidos
+    anteriores a la marca de agua, se reconstruye todo el log.
+    
+    Args:
+        seasons: Temporadas a consultar (normalmente la actual)
+        season_types: Tipos de temporada a consultar
+        client: NBAStatsClient a usar
+        csv_path: Log enriquecido existente
+        elo_path: Estado Elo persistido
+        windows: Ventanas de rolling stats
+    
+    Returns:
+        Número de partidos nuevos añadidos
+    """
+    existing = read_game_log(csv_path)
+    watermark = game_log_watermark(existing)
+    print(f"💧 Marca de agua: {watermark[0].date()} (game_id {watermark[1]}), {len(existing)} partidos")
+    
+    # DateFrom es inclusivo: los partidos del mismo día se filtran por game_id
+    fetched = fetch_games(seasons, season_types, client=client, date_from=watermark[0], max_age=0)
+    if len(fetched):
+        fetched = fetched[~fetched['game_id'].isin(existing['game_id'])]
+    
+    if len(fetched) == 0:
+        print("✅ Sin partidos nuevos, el log está al día")
+        return 0
+    
+    new_games = fetched.assign(game_date=pd.to_datetime(fetched['game_date']))
+    print(f"🆕 {len(new_games)} partidos nuevos")
+    
+    elo_engine = load_elo_state(elo_path, watermark)
+    late = (new_games['game_date'] < watermark[0]) | (
+        (new_games['game_date'] == watermark[0]) & (new_games['game_id'] <= watermark[1])
+    )
+    
+    if elo_engine is None or late.any():
+        reason = "estado Elo ausente o desfasado" if elo_engine is None else "partidos anteriores a la marca de agua"
+        print(f"⚠️  Reconstrucción completa ({reason})")
+        
+        elo_engine = EloEngine()
+        games = pd.concat([existing, new_games], ignore_index=True)
+        games = enrich_games_with_stats(games, elo_engine=elo_engine, windows=windows)
+    else:
+        # Solo se enriquecen los partidos nuevos; el archivo se reescribe para
+        # que queden arriba, en el mismo orden descendente que el resto
+        enriched = enrich_new_games(existing, new_games, elo_engine, windows=windows)
+        games = pd.concat([existing, enriched.reindex(columns=existing.columns)], ignore_index=True)
+    
+    write_game_log(games, csv_path)
+    
+    # El estado Elo se guarda después del CSV: si algo falla en medio, la
+    # siguiente ejecución detecta el desfase y reconstruye
+    elo_engine.save(elo_path)
+    
+    return len(new_games)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Descarga partidos reales de la API oficial de NBA")
+    parser.add_argument("--seasons", nargs="+", default=["2024-25"],
+                        help="Temporadas a descargar (ej: 2022-23 2023-24 2024-25)")
+    parser.add_argument("--season-types", nargs="+", default=["Regular Season"],
+                        help='Tipos de temporada (ej: "Regular Season" Playoffs)')
+    parser.add_argument("--max-games", type=int, default=None,
+                        help="Máximo de partidos en total (default: todos)")
+    parser.add_argument("--concurrency", type=int, default=4,
+                        help="Requests simultáneas a la API")
+    parser.add_argument("--rate", type=float, default=2.0,
+                        help="Requests por segundo permitidas")
+    parser.add_argument("--cache-dir", default=HTTP_CACHE_DIR,
+                        help="Directorio de la caché HTTP en disco")
+    parser.add_argument("--cache-ttl", type=float, default=None,
+                        help="Segundos de validez de la caché (default: sin expiración)")
+    parser.add_argument("--offline", action="store_true",
+                        help="Solo leer de la caché, sin tocar la red")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Añadir solo partidos nuevos al CSV existente (marca de agua)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
     """Función principal"""
+    args = parse_args(argv)
+    
     print("\n" + "="*60)
     print("🏀 NBA DATA FETCHER - API Oficial (SIN API KEYS)")
     print("="*60)
     
-    # 1. Obtener stats de equipos (para ELO)
-    print("\n[PASO 1/3] Obteniendo estadísticas de equipos...")
-    team_stats = fetch_team_stats(season="2024-25")
+    client = NBAStatsClient(
+        cache_dir=args.cache_dir,
+        concurrency=args.concurrency,
+        rate=args.rate,
+        cache_ttl=args.cache_ttl,
+        offline=args.offline
+    )
+    
+    if args.incremental and os.path.exists(GAMES_CSV_PATH):
+        print("\n[INCREMENTAL] Buscando partidos nuevos...")
+        added = ingest_incremental(args.seasons, args.season_types, client)
+        print(f"\n✅ {added} partidos añadidos a {GAMES_CSV_PATH}")
+        return
     
-    if not team_stats:
-        print("⚠️  No se pudieron obtener stats, usando defaults")
-        team_stats = {team: {'elo': 1500, 'wins': 15, 'losses': 15} 
-                     for team in TEAM_IDS.keys()}
+    if args.incremental:
+        print(f"⚠️  {GAMES_CSV_PATH} no existe, se hace una descarga completa")
     
-    # 2. Descargar partidos
-    print("\n[PASO 2/3] Descargando partidos...")
-    df_games = fetch_season_games(season="2024-25", max_games=500)
+    # 1. Descargar partidos
+    print("\n[PASO 1/3] Descargando partidos...")
+    df_games = fetch_games(args.seasons, args.season_types, client=client, max_games=args.max_games)
     
     if len(df_games) == 0:
         print("\n❌ No se pudieron descargar partidos")
@@ -293,20 +593,24 @@ def main():
     
     print(f"✅ {len(df_games)} partidos descargados")
     
-    # 3. Enriquecer con stats
-    print("\n[PASO 3/3] Enriqueciendo datos...")
-    df_enriched = enrich_games_with_stats(df_games, team_stats)
+    # 2. Enriquecer con stats (rolling + Elo secuencial)
+    print("\n[PASO 2/3] Enriqueciendo datos...")
+    elo_engine = EloEngine()
+    df_enriched = enrich_games_with_stats(df_games, elo_engine=elo_engine)
     
-    # 4. Guardar CSV
+    # 3. Guardar CSV y estado Elo
+    print("\n[PASO 3/3] Guardando datos...")
     os.makedirs("data", exist_ok=True)
-    output_path = "data/nba_games_clean.csv"
+    output_path = GAMES_CSV_PATH
     
-    df_enriched.to_csv(output_path, index=False)
+    write_game_log(df_enriched, output_path)
+    elo_engine.save(ELO_STATE_PATH)
     
     print("\n" + "="*60)
     print("✅ DATOS DESCARGADOS Y GUARDADOS")
     print("="*60)
     print(f"📂 Archivo: {output_path}")
+    print(f"📈 Estado Elo: {ELO_STATE_PATH} ({elo_engine.games_processed} partidos)")
     print(f"📊 Total partidos: {len(df_enriched)}")
     print(f"🏆 Victorias locales: {df_enriched['home_win'].sum()} ({df_enriched['home_win'].mean()*100:.1f}%)")
     print(f"✈️  Victorias visitantes: {(1-df_enriched['home_win']).sum()} ({(1-df_enriched['home_win']).mean()*100:.1f}%)")
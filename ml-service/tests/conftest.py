@@ -0,0 +1,6 @@
+# ml-service/tests/conftest.py
+import os
+import sys
+
+# Los módulos del servicio se importan como en app/ (ej: from data.x import ...)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
@@ -0,0 +1,100 @@
+# ml-service/tests/test_nba_stats_client.py
+"""
+NBAStatsClient sin red: replay offline desde la caché y reintentos con una sesión falsa
+"""
+import json
+import os
+
+import pytest
+
+from data.nba_stats_client import NBAStatsClient, ResponseCache, OfflineCacheMiss, NBA_STATS_BASE
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+PARAMS = {'Season': '2024-25', 'SeasonType': 'Regular Season', 'LeagueID': '00'}
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name)) as f:
+        return json.load(f)
+
+
+class FakeResponse:
+    def __init__(self, status_code, data=None, headers=None):
+        self.status_code = status_code
+        self.data = data
+        self.headers = headers or {}
+        self.text = json.dumps(data)
+    
+    def json(self):
+        return self.data
+
+
+class FakeSession:
+    """Sesión que devuelve respuestas predefinidas y registra cada GET"""
+    
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = []
+    
+    def get(self, url, params=None, timeout=None):
+        self.calls.append((url, params))
+        return self.responses.pop(0)
+
+
+def no_network(*args, **kwargs):
+    raise AssertionError("el cliente intentó usar la red")
+
+
+@pytest.fixture
+def fixture_data():
+    return load_fixture('leaguegamelog_2024-25.json')
+
+
+def test_offline_replays_cached_fixture(tmp_path, fixture_data):
+    url = f"{NBA_STATS_BASE}/leaguegamelog"
+    cache = ResponseCache(str(tmp_path))
+    cache.put(cache.key(url, PARAMS), url, PARAMS, fixture_data)
+    
+    client = NBAStatsClient(cache_dir=str(tmp_path), offline=True)
+    client.session.get = no_network
+    
+    assert client.get_json('leaguegamelog', PARAMS) == fixture_data
+    assert client.stats == {'cache_hits': 1, 'requests': 0, 'retries': 0}
+
+
+def test_offline_cache_miss_raises(tmp_path):
+    client = NBAStatsClient(cache_dir=str(tmp_path), offline=True)
+    client.session.get = no_network
+    
+    with pytest.raises(OfflineCacheMiss):
+        client.get_json('leaguegamelog', dict(PARAMS, Season='1999-00'))
+    assert client.stats['requests'] == 0
+
+
+def test_offline_ignores_cache_ttl(tmp_path, fixture_data):
+    url = f"{NBA_STATS_BASE}/leaguegamelog"
+    cache = ResponseCache(str(tmp_path))
+    cache.put(cache.key(url, PARAMS), url, PARAMS, fixture_data)
+    
+    client = NBAStatsClient(cache_dir=str(tmp_path), offline=True, cache_ttl=0)
+    client.session.get = no_network
+    
+    assert client.get_json('leaguegamelog', PARAMS, max_age=0) == fixture_data
+
+
+def test_retries_then_caches_response(tmp_path, fixture_data):
+    client = NBAStatsClient(cache_dir=str(tmp_path), backoff=0, rate=1000, burst=10)
+    client.session = FakeSession([
+        FakeResponse(503, {'error': 'unavailable'}),
+        FakeResponse(429, {'error': 'slow down'}, headers={'Retry-After': '0'}),
+        FakeResponse(200, fixture_data)
+    ])
+    
+    assert client.get_json('leaguegamelog', PARAMS) == fixture_data
+    assert client.stats == {'cache_hits': 0, 'requests': 3, 'retries': 2}
+    
+    # La respuesta quedó en caché: un cliente offline la reproduce
+    offline = NBAStatsClient(cache_dir=str(tmp_path), offline=True)
+    offline.session.get = no_network
+    assert offline.get_json('leaguegamelog', PARAMS) == fixture_data
@@ -32,15 +32,11 @@ def train_model():
             print("\n Entrenamiento iniciado correctamente")
             print(f" Dataset: {result.get('data_path')}")
             print(f" Test size: {result.get('test_size')}")
-            print("\n El entrenamiento se está ejecutando en background...")
-            print(" Puedes ver el progreso en la terminal del servidor ML")
+            print(f" Job ID: {result.get('job_id')}")
+            print("\n El entrenamiento se está ejecutando en un proceso aparte...")
             
-            # Esperar un poco y verificar que el modelo esté listo
-            print("\n Esperando 15 segundos para que termine el entrenamiento...")
-            for i in range(15, 0, -1):
-                print(f"   {i} segundos...", end='\r')
-                time.sleep(1)
-            print("\n")
+            # Consultar el estado del job hasta que termine
+            wait_for_training(result['job_id'])
             
             # Verificar health
             check_health()
@@ -58,6 +54,53 @@ def train_model():
     except Exception as e:
         print(f"\n Error inesperado: {e}")
 
+def wait_for_training(job_id, poll_interval=2, max_wait=600):
+    """Consulta GET /train/{job_id} hasta que el entrenamiento termine"""
+    
+    print(f"\n Esperando a que termine el job {job_id}...")
+    
+    deadline = time.time() + max_wait
+    last_stage = None
+    
+    while time.time() < deadline:
+        response = requests.get(f"{ML_API_URL}/train/{job_id}", timeout=5)
+        
+        if response.status_code != 200:
+            print(f"\n Error consultando el job: {response.status_code}")
+            print(response.text)
+            return None
+        
+        job = response.json()
+        
+        if job.get('current_stage') != last_stage and job.get('current_stage'):
+            last_stage = job['current_stage']
+            print(f"\n   Etapa: {last_stage}")
+        
+        if job.get('rounds'):
+            last_round = job['rounds'][-1]
+            metrics = last_round['metrics'].get('validation_0', {})
+            print(f"   Ronda {last_round['round']}: {metrics}", end='\r')
+        
+        if job['status'] == 'completed':
+            print("\n\n Entrenamiento completado")
+            print(f" Versión: {job['result']['version']}")
+            print(f" Duración por etapa: {job['stages']}")
+            print(f" Métricas: {job['result']['metrics']}")
+            if job.get('model_activated'):
+                print(" Modelo activado en el servicio")
+            else:
+                print(f"❌ El modelo no se activó: {job.get('activation_error')}")
+            return job
+        
+        if job['status'] == 'failed':
+            print(f"\n\n Entrenamiento fallido: {job.get('error')}")
+            return job
+        
+        time.sleep(poll_interval)
+    
+    print(f"\n El entrenamiento no terminó en {max_wait} segundos")
+    return None
+
 def check_health():
     """Verifica el estado del servidor ML"""
     
@@ -84,7 +127,7 @@ def check_health():
             else:
                 print("\n  Modelo no cargado todavía")
                 print(" Opciones:")
-                print("   1. Espera 5-10 segundos más y vuelve a ejecutar: python train_model.py")
+                print("   1. Consulta el estado del entrenamiento: GET /train")
                 print("   2. Verifica logs del servidor ML")
                 print("   3. Revisa que exista: data/nba_games_clean.csv")
         else:
@@ -202,6 +245,6 @@ if __name__ == "__main__":
     print("=" * 50)
     print("\n PRÓXIMOS PASOS:")
     print("   1. Si el modelo está cargado: cd backend && node server.js")
-    print("   2. Si no está cargado: espera 10 seg y vuelve a ejecutar este script")
+    print("   2. Si no está cargado: revisa GET /train y vuelve a ejecutar este script")
     print("   3. Verifica logs del servidor ML en la otra terminal")
     print("\n Para entrenar de nuevo: python train_model.py")
\ No newline at end of file